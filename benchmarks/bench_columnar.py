@@ -0,0 +1,106 @@
+"""
+bench_columnar - Time the loading of columnar datasets (Parquet, Arrow IPC, HDF5).
+
+For each scale, a dataset is written in every format whose package is installed, then loaded
+with DataSet.load_columnar and every figure is built (its columns read), as plotting would.
+A subset is also loaded by selecting a single figure. The JSON file of the same dataset is
+loaded with DataSet.load_file for reference, up to --json-points points.
+
+Usage:
+    python benchmarks/bench_columnar.py [--scales 10x4x250000 10x4x2500000] [--repeat 3]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy
+
+from plotish import DataSet
+from plotish.columnar import write_columnar
+
+FORMATS = [("parquet", "pyarrow"), ("arrow", "pyarrow"), ("hdf5", "h5py")]
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "hdf5": ".h5"}
+
+
+def _document(figures: int, lines: int, points: int, seed: int = 0) -> dict:
+    """Return a dataset whose lines are NumPy arrays."""
+    rng = numpy.random.default_rng(seed)
+    x = numpy.linspace(0, 100, points)
+    return {
+        "name": f"bench_{figures}x{lines}x{points}",
+        "data": [{"title": f"Figure {f}", "lines": [
+            {"xdata": x, "ydata": rng.normal(size=points).cumsum(), "legend": f"line {k}"} for k in range(lines)
+        ]} for f in range(figures)],
+    }
+
+
+def _load(filename: str, columnar: bool, figures=None) -> None:
+    ds = DataSet()
+    if columnar:
+        ds.load_columnar(filename)
+    else:
+        ds.load_file(filename)
+    ds.select(figures)
+    for _, fi in ds.items():
+        fi.lines
+    ds.close()
+
+
+def _best(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["10x4x250000"], help="Scales as FIGURESxLINESxPOINTS.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json-points", type=int, default=10_000_000,
+                        help="Largest dataset, in points, also loaded from JSON. Defaults to 10M.")
+    args = parser.parse_args()
+
+    formats = []
+    for name, module in FORMATS:
+        try:
+            __import__(module)
+        except ImportError:
+            print(f"{name}: {module} is not installed, skipped")
+            continue
+        formats.append(name)
+
+    print(f"{'scale':>14} {'format':>8} {'MB':>8} {'write (s)':>10} {'load (s)':>9} {'one fig (s)':>12}")
+    with tempfile.TemporaryDirectory() as folder:
+        for scale in args.scales:
+            figures, lines, points = (int(n) for n in scale.lower().split("x"))
+            document = _document(figures, lines, points)
+            for name in formats:
+                filename = os.path.join(folder, f"{scale}{EXTENSIONS[name]}")
+                start = time.perf_counter()
+                write_columnar(filename, document)
+                written = time.perf_counter() - start
+                load = _best(lambda: _load(filename, True), args.repeat)
+                one = _best(lambda: _load(filename, True, [figures - 1]), args.repeat)
+                size = os.path.getsize(filename) / 1e6
+                print(f"{scale:>14} {name:>8} {size:>8.1f} {written:>10.3f} {load:>9.3f} {one:>12.4f}")
+                os.remove(filename)
+            if figures * lines * points <= args.json_points:
+                import json
+                filename = os.path.join(folder, f"{scale}.json")
+                with open(filename, "w") as f:
+                    json.dump({**document, "data": [{**fig, "lines": [
+                        {**line, "xdata": line["xdata"].tolist(), "ydata": line["ydata"].tolist()}
+                        for line in fig["lines"]]} for fig in document["data"]]}, f)
+                load = _best(lambda: _load(filename, False), 1)
+                size = os.path.getsize(filename) / 1e6
+                print(f"{scale:>14} {'json':>8} {size:>8.1f} {'':>10} {load:>9.3f}")
+                os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
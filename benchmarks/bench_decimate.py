@@ -0,0 +1,53 @@
+"""
+bench_decimate - Measure the downsampling stage and its effect on rendering large lines.
+
+For each line size, the figure is made and saved as PNG without downsampling and with each
+downsampling method; the time spent in the decimation itself is reported separately.
+
+Usage:
+    python benchmarks/bench_decimate.py [--points 1000000 10000000 100000000] [--methods minmax lttb]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy
+
+from plotish import DataSet, FigType, FigureInterface, Plottish
+from plotish.decimation import decimate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--methods", nargs="+", default=["minmax", "lttb"])
+    args = parser.parse_args()
+
+    print(f"{'points':>10} {'method':>8} {'decimate (s)':>13} {'render (s)':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as outfolder:
+        for points in args.points:
+            x = numpy.linspace(0, 1000, points)
+            y = numpy.sin(x) + numpy.random.default_rng(0).normal(scale=0.1, size=points)
+            fi = FigureInterface({"lines": [{"xdata": x, "ydata": y}]})
+            ds = DataSet()
+            ds.load("Decimation benchmark", "", "bench", [fi])
+
+            baseline = None
+            for method in [None] + args.methods:
+                pl = Plottish(outfolder, [FigType.PNG], ds, downsample=method)
+                start = time.perf_counter()
+                pl.render(0, fi)
+                elapsed = time.perf_counter() - start
+                if method is None:
+                    baseline = elapsed
+                    print(f"{points:>10} {'none':>8} {'-':>13} {elapsed:>11.3f} {1:>7.2f}x")
+                    continue
+                start = time.perf_counter()
+                decimate(x, y, method, 2 * int(6.4 * 300))
+                cost = time.perf_counter() - start
+                print(f"{points:>10} {method:>8} {cost:>13.3f} {elapsed:>11.3f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
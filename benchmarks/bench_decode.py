@@ -0,0 +1,64 @@
+"""
+bench_decode - Compare the JSON decoders of DataSet on large dataset files.
+
+For each dataset size, the file is decoded with every installed decoder, with and without the
+array fast path, and the figures are built (FigureInterface and LineInterface). The pandas
+decoder is the path of the earlier versions of plotish and serves as the reference.
+
+Usage:
+    python benchmarks/bench_decode.py [--scales 10x4x100000 1000x4x1000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from plotish import FigureInterface
+from plotish.decoders import available, decode_file
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate  # noqa: E402
+
+
+def _load(filename, decoder, arrays):
+    raw = decode_file(filename, decoder, arrays)
+    return [FigureInterface(fig) for fig in raw["data"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["10x4x100000", "1000x4x1000"],
+                        help="Scales as FIGURESxLINESxPOINTS.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    variants = [(name, arrays) for name in available() if name != "auto" for arrays in (True, False)
+                if name != "pandas" or not arrays]
+    print(f"{'scale':>14} {'MB':>6} {'decoder':>16} {'time (s)':>9} {'peak (MB)':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as folder:
+        for scale in args.scales:
+            figures, lines, points = (int(n) for n in scale.lower().split("x"))
+            filename = os.path.join(folder, f"{scale}.json")
+            generate.write(filename, figures, lines, points)
+            size = os.path.getsize(filename) / 1e6
+            reference = None
+            for name, arrays in sorted(variants, key=lambda v: v[0] != "pandas"):
+                best = float("inf")
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    _load(filename, name, arrays)
+                    best = min(best, time.perf_counter() - start)
+                tracemalloc.start()
+                _load(filename, name, arrays)
+                peak = tracemalloc.get_traced_memory()[1] / 1e6
+                tracemalloc.stop()
+                reference = reference or best
+                label = f"{name}{'+arrays' if arrays else ''}"
+                print(f"{scale:>14} {size:>6.1f} {label:>16} {best:>9.3f} {peak:>10.1f} {reference / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
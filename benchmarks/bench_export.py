@@ -0,0 +1,67 @@
+"""
+bench_export - Compare the multi-format export with overlapped writes (Plottish(overlap_writes=True))
+with one savefig call per format.
+
+Usage:
+    python benchmarks/bench_export.py [--points 100000 1000000] [--types png svg] [--repeat 3]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy
+
+from plotish import DataSet, FigType, FigureInterface, Plottish
+
+
+def _dataset(points: int) -> DataSet:
+    x = numpy.linspace(0, 100, points)
+    figure = {
+        "title": f"{points} points",
+        "legend_position": "best",
+        "lines": [
+            {"xdata": x, "ydata": numpy.sin(x), "legend": "sin"},
+            {"xdata": x, "ydata": numpy.cos(x), "legend": "cos"},
+        ],
+    }
+    ds = DataSet()
+    ds.load("Export benchmark", "", "bench", [FigureInterface(figure)])
+    return ds
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--types", nargs="+", default=["png", "svg"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    types = [FigType[t.upper()] for t in args.types]
+
+    print(f"{'points':>10} {'per-format (s)':>15} {'export (s)':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as outfolder:
+        for points in args.points:
+            ds = _dataset(points)
+            pl = Plottish(outfolder, types, ds, overlap_writes=True)
+            fig, _ = pl.make_fig(ds.data[0])
+
+            def per_format():
+                for fig_type in types:
+                    pl.save(fig_type, 0, fig)
+
+            looped = _time(per_format, args.repeat)
+            exported = _time(lambda: pl.export(fig, 0), args.repeat)
+            print(f"{points:>10} {looped:>15.3f} {exported:>11.3f} {looped / exported:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+bench_import - Measure the start-up cost of plotish with `python -X importtime`.
+
+Each scenario runs in a fresh interpreter and is timed from its first statement to its end.
+The slowest imported modules are read from the -X importtime report, and the run fails
+(exit status 1) when the median time exceeds the budget or when pandas or pyplot is imported.
+
+Scenarios:
+- import: `import plotish`.
+- load: `import plotish` then load and validate a small dataset file with DataSet.load_file.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 5] [--budget 500] [--top 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BUDGET_MS = 500
+FORBIDDEN = ("pandas", "matplotlib.pyplot")
+
+SCENARIOS = {
+    "import": "import plotish",
+    "load": "import plotish\nds = plotish.DataSet()\nds.load_file(sys.argv[1])\nassert len(ds.data) == 2",
+}
+
+
+def run(code, filename):
+    """
+    Run a scenario in a fresh interpreter.
+
+    Returns the elapsed time (ms), the self import time of each module (us) and the forbidden modules loaded.
+    """
+    script = (f"import time\nstart = time.perf_counter()\nimport sys\n{code}\n"
+              f"print((time.perf_counter() - start) * 1000)\n"
+              f"print(' '.join(m for m in {FORBIDDEN!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", script, filename],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us)
+    elapsed, *loaded = result.stdout.split("\n", 1)
+    return float(elapsed), times, loaded[0].split() if loaded else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="Budget of the median, in ms.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest modules listed.")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "data.json")
+        line = {"xdata": [0, 1, 2], "ydata": [1, 2, 3]}
+        with open(filename, "w") as f:
+            json.dump({"name": "bench", "data": [{"lines": [line]}, {"lines": [line, line]}]}, f)
+
+        for scenario, code in SCENARIOS.items():
+            totals = []
+            for _ in range(args.runs):
+                elapsed, times, loaded = run(code, filename)
+                totals.append(elapsed)
+            median = statistics.median(totals)
+            status = "ok" if median <= args.budget and not loaded else "FAILED"
+            failed |= status == "FAILED"
+            print(f"{scenario}: median {median:.1f} ms (budget {args.budget:.0f} ms) {status}")
+            if loaded:
+                print(f"  imported: {', '.join(loaded)}")
+            slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:args.top]
+            for name, self_us in slowest:
+                print(f"  {self_us / 1000:8.1f} ms  {name}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+bench_lines - Measure the rendering of figures with many lines, one Line2D per line against
+the LineCollection batching used above plotish.COLLECTION_THRESHOLD lines.
+
+For each line count, a figure of random walks is made and saved as PNG with each path; half
+of the lines are dashed and a few have a legend label.
+
+Usage:
+    python benchmarks/bench_lines.py [--lines 100 500 2000 10000] [--points 200] [--repeat 3]
+"""
+
+import argparse
+import io
+import time
+
+import numpy
+
+import plotish
+from plotish import DataSet, FigType, FigureInterface, Plottish
+
+
+def _figure(lines: int, points: int) -> FigureInterface:
+    """Return a figure of random walks."""
+    rng = numpy.random.default_rng(0)
+    x = numpy.linspace(0, 1, points)
+    return FigureInterface({"legend_position": "upper left", "lines": [
+        {"xdata": x, "ydata": rng.normal(size=points).cumsum(), "style": "--" if k % 2 else "-",
+         "legend": f"line {k}" if k < 5 else None} for k in range(lines)
+    ]})
+
+
+def _best(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[100, 500, 2000, 10000])
+    parser.add_argument("--points", type=int, default=200, help="Points per line. Defaults to 200.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'lines':>7} {'mode':>11} {'make_fig (s)':>13} {'save (s)':>9} {'total (s)':>10} {'speedup':>8}")
+    for lines in args.lines:
+        fi = _figure(lines, args.points)
+        ds = DataSet()
+        ds.load("Lines benchmark", "", "bench", [fi])
+        pl = Plottish(".", [FigType.PNG], ds)
+        baseline = None
+        for mode, threshold in (("line2d", float("inf")), ("collection", 0)):
+            plotish.COLLECTION_THRESHOLD = threshold
+            make = _best(lambda: pl.make_fig(fi), args.repeat)
+            fig, _ = pl.make_fig(fi)
+            save = _best(lambda: fig.savefig(io.BytesIO(), format="png"), args.repeat)
+            total = make + save
+            baseline = baseline or total
+            print(f"{lines:>7} {mode:>11} {make:>13.3f} {save:>9.3f} {total:>10.3f} {baseline / total:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+bench_raster - Measure the vector outputs of dense marker series with each raster method.
+
+For each size, a scatter figure is rendered to SVG and PDF with the markers drawn as vector
+paths (raster: false), rasterized and aggregated into hexagons; the render time and the size
+of each output are reported.
+
+Usage:
+    python benchmarks/bench_raster.py [--points 100000 1000000] [--types svg pdf]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy
+
+from plotish import DataSet, FigType, FigureInterface, Plottish
+
+METHODS = [("vector", False), ("raster", "raster"), ("hexbin", "hexbin")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--types", nargs="+", default=["svg", "pdf"])
+    args = parser.parse_args()
+
+    print(f"{'points':>10} {'type':>5} {'method':>7} {'render (s)':>11} {'MB':>9} {'smaller':>8}")
+    with tempfile.TemporaryDirectory() as outfolder:
+        for points in args.points:
+            rng = numpy.random.default_rng(0)
+            x, y = rng.normal(size=points), rng.normal(size=points)
+            for name in args.types:
+                fig_type = FigType[name.upper()]
+                baseline = None
+                for method, option in METHODS:
+                    fi = FigureInterface({"title": "Scatter", "lines": [
+                        {"xdata": x, "ydata": y, "marker": "o", "style": "None", "raster": option}]})
+                    ds = DataSet()
+                    ds.load("Raster benchmark", "", "bench", [fi])
+                    pl = Plottish(outfolder, [fig_type], ds)
+                    start = time.perf_counter()
+                    pl.render(0, fi)
+                    elapsed = time.perf_counter() - start
+                    size = os.path.getsize(pl._output(fig_type, 0)[0]) / 1e6
+                    baseline = baseline or size
+                    print(f"{points:>10} {name:>5} {method:>7} {elapsed:>11.2f} {size:>9.2f} {baseline / size:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
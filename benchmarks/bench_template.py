@@ -0,0 +1,58 @@
+"""
+bench_template - Measure the template mode on a series of figures sharing the same layout.
+
+A dataset of figures that only differ by their y data is rendered with a fresh figure per
+figure and with Plottish(template=True); the make_fig time per figure and the total render
+time are reported for each output type.
+
+Usage:
+    python benchmarks/bench_template.py [--figures 100] [--lines 4] [--points 1000] [--types png svg]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy
+
+from plotish import DataSet, FigType, FigureInterface, Plottish
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--figures", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=4)
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--types", nargs="+", default=["png", "svg"])
+    args = parser.parse_args()
+
+    rng = numpy.random.default_rng(0)
+    x = numpy.linspace(0, 1, args.points)
+    figures = [FigureInterface({"title": f"Frame {i}", "xlabel": "x", "ylabel": "y", "legend_position": "upper right",
+                                "lines": [{"xdata": x, "ydata": rng.normal(size=args.points).cumsum(),
+                                           "legend": f"line {k}"} for k in range(args.lines)]})
+               for i in range(args.figures)]
+    ds = DataSet()
+    ds.load("Template benchmark", "", "bench", figures)
+
+    print(f"{'type':>5} {'mode':>9} {'make_fig (ms)':>14} {'total (s)':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as outfolder:
+        for name in args.types:
+            baseline = None
+            for mode, template in (("fresh", False), ("template", True)):
+                pl = Plottish(outfolder, [FigType[name.upper()]], ds, template=template)
+                make_fig = 0.0
+                start = time.perf_counter()
+                for i, fi in ds.items():
+                    begin = time.perf_counter()
+                    fig, _ = pl.make_fig(fi)
+                    make_fig += time.perf_counter() - begin
+                    pl.export(fig, i)
+                total = time.perf_counter() - start
+                pl.close()
+                baseline = baseline or total
+                print(f"{name:>5} {mode:>9} {1000 * make_fig / args.figures:>14.2f} {total:>10.2f} {baseline / total:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+compare - Compare two result files of run.py and report regressions.
+
+Results are matched by stage and scale. The wall time and peak RSS ratios (new / base) are
+printed for each pair; the exit status is 1 if a ratio exceeds the threshold.
+
+Usage:
+    python benchmarks/compare.py base.jsonl new.jsonl [--threshold 1.10]
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(filename: str) -> dict:
+    """Read a result file, keeping the last result of each stage and scale."""
+    results = {}
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                results[(record["scale"], record["stage"])] = record
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="Ratio above which a result is a regression. Defaults to 1.10.")
+    args = parser.parse_args()
+
+    base = load(args.base)
+    new = load(args.new)
+    regressions = 0
+    print(f"{'scale':>14} {'stage':>10} {'base (s)':>10} {'new (s)':>10} {'time':>7} {'rss':>7}")
+    for key in sorted(base.keys() & new.keys()):
+        old, cur = base[key], new[key]
+        if "error" in old or "error" in cur:
+            print(f"{key[0]:>14} {key[1]:>10} {'error':>10}")
+            continue
+        time_ratio = cur["wall_s"] / old["wall_s"] if old["wall_s"] else float("inf")
+        rss_ratio = cur["peak_rss_mb"] / old["peak_rss_mb"] if old["peak_rss_mb"] else float("inf")
+        flag = ""
+        if time_ratio > args.threshold or rss_ratio > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key[0]:>14} {key[1]:>10} {old['wall_s']:>10.4f} {cur['wall_s']:>10.4f} "
+              f"{time_ratio:>6.2f}x {rss_ratio:>6.2f}x{flag}")
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"{key[0]:>14} {key[1]:>10} only in {'base' if key in base else 'new'}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
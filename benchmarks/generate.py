@@ -0,0 +1,66 @@
+"""
+generate - Write synthetic datasets in the schema of template.json.
+
+The size of a dataset is given by three numbers: the figure count, the lines per figure and
+the points per line. Data is random but seeded, so that a scale always produces the same file.
+
+Usage:
+    python benchmarks/generate.py out.json --figures 10 --lines 4 --points 10000 [--seed 0]
+"""
+
+import argparse
+import json
+
+import numpy
+
+STYLES = ["-", "--", "-.", ":"]
+COLORS = ["purple", "red", "blue", "green", "orange", "black"]
+
+
+def dataset(figures: int, lines: int, points: int, seed: int = 0) -> dict:
+    """Return a dataset as a dictionary in the schema of template.json."""
+    rng = numpy.random.default_rng(seed)
+    x = numpy.linspace(0, 100, points).round(6).tolist()
+    data = []
+    for f in range(figures):
+        data.append({
+            "xlabel": "x",
+            "ylabel": "y",
+            "title": f"Figure {f}",
+            "legend_position": "best",
+            "lines": [{
+                "xdata": x,
+                "ydata": rng.normal(size=points).cumsum().round(6).tolist(),
+                "color": COLORS[k % len(COLORS)],
+                "style": STYLES[k % len(STYLES)],
+                "marker": "",
+                "legend": f"line {k}",
+            } for k in range(lines)],
+        })
+    return {
+        "date": "01/01/2024",
+        "name": f"bench_{figures}x{lines}x{points}",
+        "description": "Synthetic benchmark dataset",
+        "data": data,
+    }
+
+
+def write(filename: str, figures: int, lines: int, points: int, seed: int = 0) -> None:
+    """Write a synthetic dataset to a JSON file."""
+    with open(filename, "w") as f:
+        json.dump(dataset(figures, lines, points, seed), f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("filename")
+    parser.add_argument("--figures", type=int, default=10)
+    parser.add_argument("--lines", type=int, default=4)
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write(args.filename, args.figures, args.lines, args.points, args.seed)
+
+
+if __name__ == "__main__":
+    main()
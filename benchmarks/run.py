@@ -0,0 +1,163 @@
+"""
+run - Time the hot paths of plotish on synthetic datasets and record machine-readable results.
+
+For each scale (figures x lines per figure x points per line), a dataset is generated with
+generate.py and every stage runs in a fresh interpreter, so that its peak RSS is not hidden by
+the previous stages:
+
+- load: DataSet.load_file on the JSON file.
+- build: FigureInterface and LineInterface construction from the decoded JSON.
+- make_fig: Plottish.make_fig for every figure.
+- save_<type>: Plottish.save of every figure for one FigType (png, svg, pdf, pgf, ...).
+
+Each result is a JSON line with the stage, the scale, the best and median wall time over the
+repetitions, the peak RSS of the process and its growth during the stage, plus the versions
+of plotish, matplotlib, numpy and Python. Compare two result files with compare.py.
+
+Usage:
+    python benchmarks/run.py [--scales 10x4x10000 100x4x1000] [--types png svg pdf]
+                             [--repeat 3] [--label v1.0] [--output results.jsonl]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate  # noqa: E402
+
+DEFAULT_SCALES = ["10x4x10000", "100x4x1000", "2x4x1000000"]
+DEFAULT_TYPES = ["png", "svg", "pdf"]
+
+
+def _rss_mb() -> float:
+    """Return the peak resident set size of the process in MB."""
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(stage: str, filename: str, repeat: int) -> dict:
+    """Run one stage in the current process and return its measurements."""
+    from plotish import DataSet, FigType, FigureInterface, Plottish
+
+    root = os.path.dirname(os.path.abspath(filename))
+    with tempfile.TemporaryDirectory() as outfolder:
+        if stage == "load":
+            def run():
+                DataSet().load_file(filename)
+        elif stage == "build":
+            with open(filename) as f:
+                raw = json.load(f)["data"]
+
+            def run():
+                [FigureInterface(fig, root=root) for fig in raw]
+        else:
+            ds = DataSet()
+            ds.load_file(filename)
+            if stage == "make_fig":
+                pl = Plottish(outfolder, [FigType.PNG], ds)
+
+                def run():
+                    [pl.make_fig(fi) for fi in ds.data]
+            else:
+                fig_type = FigType[stage[len("save_"):].upper()]
+                pl = Plottish(outfolder, [fig_type], ds)
+                figures = [pl.make_fig(fi)[0] for fi in ds.data]
+
+                def run():
+                    for i, fig in enumerate(figures):
+                        pl.save(fig_type, i, fig)
+
+        rss_before = _rss_mb()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        peak = _rss_mb()
+    return {
+        "wall_s": min(times),
+        "median_s": statistics.median(times),
+        "peak_rss_mb": round(peak, 1),
+        "rss_growth_mb": round(peak - rss_before, 1),
+    }
+
+
+def _versions() -> dict:
+    """Return the versions the results depend on."""
+    import matplotlib
+    import numpy
+    import plotish
+
+    return {
+        "plotish": plotish.__version__,
+        "matplotlib": matplotlib.__version__,
+        "numpy": numpy.__version__,
+        "python": platform.python_version(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES,
+                        help="Scales as FIGURESxLINESxPOINTS.")
+    parser.add_argument("--types", nargs="+", default=DEFAULT_TYPES, help="Figure types of the save stages.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--label", default="", help="Label stored with each result, e.g. a version or commit.")
+    parser.add_argument("--output", default=None, help="JSON lines file the results are appended to.")
+    # Internal: run a single stage and print its measurements
+    parser.add_argument("--stage", help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        print(json.dumps(_measure(args.stage, args.file, args.repeat)))
+        return
+
+    versions = _versions()
+    stages = ["load", "build", "make_fig"] + [f"save_{t.lower()}" for t in args.types]
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            for scale in args.scales:
+                figures, lines, points = (int(n) for n in scale.lower().split("x"))
+                filename = os.path.join(folder, f"{scale}.json")
+                generate.write(filename, figures, lines, points)
+                for stage in stages:
+                    result = subprocess.run(
+                        [sys.executable, __file__, "--stage", stage, "--file", filename, "--repeat", str(args.repeat)],
+                        capture_output=True, text=True,
+                    )
+                    record = {"label": args.label, "stage": stage, "scale": scale,
+                              "figures": figures, "lines": lines, "points": points, "repeat": args.repeat}
+                    if result.returncode == 0:
+                        record.update(json.loads(result.stdout.splitlines()[-1]))
+                    else:
+                        record["error"] = result.stderr.strip().splitlines()[-1] if result.stderr else "failed"
+                    record.update(versions)
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+                    if output is not sys.stdout:
+                        print(f"{scale:>14} {stage:>10} "
+                              f"{record.get('wall_s', float('nan')):9.4f} s {record.get('peak_rss_mb', float('nan')):8.1f} MB")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
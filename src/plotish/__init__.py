@@ -2,8 +2,8 @@
 plottish - Module for creating and saving plots using Matplotlib.
 
 This module defines a class, Plottish, that facilitates the creation and saving of plots.
-It includes support for various figure types, such as PDF, PGF, PNG, SVG, and the option to
-display the figure directly without saving it. The module also provides functionality for
+It includes support for various figure types, such as PDF, PGF, PNG, SVG, a multi-page PDF
+gathering every figure of a dataset, and the option to display the figure directly without saving it. The module also provides functionality for
 handling warnings during the plotting process.
 
 Usage:
@@ -22,6 +22,9 @@ Usage:
 Note:
     This module assumes the existence of the DataSet and FigureInterface classes
 
+    matplotlib is imported on first use, and pyplot only to display figures, so that importing
+    plotish and loading a DataSet stay fast (see benchmarks/bench_import.py).
+
 Dependencies:
     - Matplotlib
     - DataSet class (defined in dataset.py)
@@ -36,17 +39,75 @@ Date:
 """
 
 
+import hashlib
+import io
+import json
 import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
 
-import matplotlib.pyplot as plt 
 from enum import Enum
-from typing import List ,Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING ,Any ,List ,Optional ,Tuple
+
+import numpy
 
+from . import decimation, parallel, raster, template
+from .cache import RenderCache
+from .profiling import Listener, emit, measure
 from .dataset import DataSet
 from .interfaces.figureinterface import FigureInterface
 from .interfaces.linesInterface import LineInterface
-from importlib.metadata import version 
-__version__ = version("plotish")
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+
+STYLE = 'ggplot'
+DPI = 300
+# Figures with more lines than this draw their lines without markers as one LineCollection per line style
+COLLECTION_THRESHOLD = 500
+# Marker and line style values drawing no marker, or no line
+_NO_MARKER = (None, "", " ", "None", "none")
+_NO_LINE = ("", " ", "None", "none")
+_style_lock = threading.Lock()
+_style_applied = False
+
+
+@lru_cache(maxsize=None)
+def _version() -> str:
+    """Return the installed version of plotish, read from the package metadata on first use."""
+    from importlib.metadata import version
+    return version("plotish")
+
+
+def __getattr__(name: str) -> Any:
+    # __version__ is computed on access, reading the package metadata slows down the import
+    if name == "__version__":
+        return _version()
+    # The asyncio interface is imported on first use, asyncio slows down the import
+    if name in ("render_async", "load_async"):
+        from . import aio
+        return getattr(aio, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _apply_style():
+    """
+    Apply the plotting style to the global matplotlib rcParams, once per process.
+
+    Comments:
+    - rcParams are shared by every thread, so the style is set a single time instead of
+      at each Plottish creation, which could race with figures being drawn in other threads.
+    """
+    global _style_applied
+    with _style_lock:
+        if not _style_applied:
+            import matplotlib.style
+            matplotlib.style.use(STYLE)
+            _style_applied = True
 
 
 def make_out_folder(dir: str):
@@ -87,30 +148,70 @@ def treat_warnings(warnings: List[str]):
 
 
 
+def _write_file(filename: str, buffer: io.BytesIO) -> None:
+    """
+    Write the content of an in-memory buffer to a file.
+
+    Parameters:
+    - filename (str): The path of the file to write.
+    - buffer (io.BytesIO): The content to write.
+    """
+    with open(filename, "wb") as f:
+        f.write(buffer.getbuffer())
+
+
+def _plotted_points(fig: "Figure") -> int:
+    """
+    Return the number of points plotted in a figure, after downsampling.
+
+    Parameters:
+    - fig (Figure): The figure.
+
+    Returns:
+    int: The number of points of the lines and line collections of every axes.
+    """
+    from matplotlib.collections import LineCollection
+
+    points = sum(len(line.get_ydata(orig=False)) for ax in fig.axes for line in ax.get_lines())
+    return points + sum(len(path.vertices) for ax in fig.axes for collection in ax.collections
+                        if isinstance(collection, LineCollection) for path in collection.get_paths())
+
+
 class FigType(Enum):
     """
     Enumeration representing different types of figures.
 
     Enumeration Values:
-    - PDF (int): Value 0, representing the PDF file format.
+    - PDF (int): Value 0, representing the PDF file format, written by matplotlib's native PDF backend.
     - PGF (int): Value 1, representing the PGF (Portable Graphics Format) file format.
     - PNG (int): Value 2, representing the PNG (Portable Network Graphics) file format.
     - SVG (int): Value 3, representing the SVG (Scalable Vector Graphics) file format.
     - SHOW (int): Value 4, representing the option to display the figure rather than saving it.
+    - PDF_LATEX (int): Value 5, representing the PDF file format typeset by LaTeX through the pgf backend.
+    - PDF_PAGES (int): Value 6, representing a single multi-page PDF file holding every figure of the dataset.
 
     Comments:
     - This enumeration defines symbolic names for different types of figure formats,
       making the code more readable and self-explanatory.
     - Each enumeration value is assigned a unique integer value for easy comparison and identification.
     - The 'SHOW' option allows displaying the figure directly instead of saving it to a file.
+    - 'PDF_LATEX' requires a TeX installation and starts a LaTeX process per figure, it is much
+      slower than 'PDF'. Its files are named '{name}_{i}_latex.pdf', so both types can be generated together.
+    - 'PDF_PAGES' writes '{name}.pdf' in the output folder, one page per figure, in dataset order.
     """
     PDF=0,
     PGF=1,
     PNG=2,
     SVG=3,
     SHOW=4,
+    PDF_LATEX=5,
+    PDF_PAGES=6,
     
 
+# Outputs gathering every figure in one place, handled by the main process
+_PARENT_TYPES = (FigType.SHOW, FigType.PDF_PAGES)
+
+
 class Plottish:
     """
     Class for creating and saving plots.
@@ -119,9 +220,18 @@ class Plottish:
     - _outfolder (str): The output folder for saving plots.
     - _dataset (DataSet): The dataset containing plot data.
     - types (List[FigType]): List of figure types to generate.
+    - workers (int): Number of worker processes used to render figures (1 renders in-process).
+    - downsample (Any): Default downsampling option for lines of figures that don't set one.
+    - cache (RenderCache): Cache of rendered outputs, or None to always render.
+    - pool (Executor): Pool of worker processes shared with other instances, or None.
+    - rendered (List[int]): The indices of the figures processed by the last plot(), including the
+      figures restored from the cache.
+    - _listeners (List[Listener]): The listeners notified of the rendering stages, see plotish.profiling.
     """
 
-    def __init__(self, outfolder: str, types: List[FigType], dataset: DataSet) -> None:
+    def __init__(self, outfolder: str, types: List[FigType], dataset: DataSet, workers: int = 1,
+                 downsample: Any = None, cache: Optional[RenderCache] = None,
+                 pool: Optional[Executor] = None, template: bool = False, overlap_writes: bool = False) -> None:
         """
         Initialize a Plottish instance.
 
@@ -129,79 +239,572 @@ class Plottish:
         - outfolder (str): The output folder for saving plots.
         - types (List[FigType]): List of figure types to generate.
         - dataset (DataSet): The dataset containing plot data.
+        - workers (int): Number of worker processes used to render figures. Defaults to 1 (serial).
+        - downsample (Any): Default downsampling option (see plotish.decimation) for lines of figures
+          that don't set one in the JSON file. Defaults to None (disabled).
+        - cache (RenderCache): Cache of rendered outputs. Figures whose outputs are up to date
+          are not rendered again. Defaults to None (always render).
+        - pool (Executor): A pool made by plotish.parallel.make_pool, used instead of starting one
+          for this instance when workers > 1. It is left running, so that several datasets can be
+          rendered by the same warm workers. Defaults to None.
+        - template (bool): Reuse the previous figure when the next one has the same layout,
+          updating only its title, line data and limits (see plotish.template). Defaults to False.
+        - overlap_writes (bool): Write the files of a figure in background threads while its next
+          format is drawn (see export). Defaults to False.
         """
         self._outfolder = outfolder
         self._dataset = dataset
-        plt.style.use('ggplot')
+        _apply_style()
         self.types = types
+        self.workers = workers
+        self.downsample = downsample
+        self.cache = cache
+        self.pool = pool
+        self.template = template
+        self.overlap_writes = overlap_writes
+        self.rendered = []
+        self._listeners = []
         self._show = False
+        self._pages = None
+        self._pages_lock = threading.Lock()
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        Register a callable receiving the timing events of the rendering.
+
+        The 'make_fig', 'save_<type>' and 'cache' stages are reported for each figure, including
+        the figures rendered by worker processes.
+
+        Parameters:
+        - listener (Listener): The callable, receiving a plotish.profiling.Event.
+        """
+        self._listeners.append(listener)
 
     def plot(self) -> List[str]:
         """
-        Create and save plots for each figure in the dataset.
+        Create and save plots for each selected figure in the dataset.
 
         Returns:
         List[str]: List of warnings generated during the plot generation.
         """
+        self.rendered = []
+        if self.workers > 1:
+            return self._plot_parallel()
+
         warns = []
-        for i, fig in enumerate(self._dataset.data):
-            fig, warn = self.make_fig(fig)
-            for fig_type in self.types:
-                self.save(fig_type, i)
-            warns.append(warn)
+        try:
+            for i, fig in self._dataset.items():
+                warns.append(self.render(i, fig))
+                self.rendered.append(i)
+        finally:
+            self.close()
+            if self.cache is not None:
+                self.cache.flush()
 
         if self._show:
+            import matplotlib.pyplot as plt
             plt.show()
         return warns
 
-    def save(self, fig_type: FigType, i: int) -> None:
+    def render(self, i: int, fi: FigureInterface) -> str:
+        """
+        Create one figure and save it in every requested format.
+
+        Figures are plain matplotlib objects released once written, only figures kept to be
+        displayed with FigType.SHOW are registered in pyplot. Memory then stays bounded for long batches.
+        With a cache, the figure is only made if one of its outputs is not up to date.
+
+        Parameters:
+        - i (int): Index of the figure in the dataset.
+        - fi (FigureInterface): An interface containing data for plotting.
+
+        Returns:
+        str: The warning message generated while making the figure.
+        """
+        with measure(self._listeners if self.cache is not None else [], "cache", i):
+            pending, warn = self._restore(i, fi, self.types)
+        if not pending and warn is not None:
+            return warn
+        with measure(self._listeners, "make_fig", i) as event:
+            fig, warn = self.make_fig(fi)
+            if event is not None:
+                event.points = _plotted_points(fig)
+        self.export(fig, i, pending)
+        self._store(i, fi, pending, warn)
+        return warn
+
+    def cache_key(self, fi: FigureInterface, fig_type: FigType) -> str:
+        """
+        Return the key identifying an output in the render cache.
+
+        The key covers the content of the figure and every setting changing its rendering:
+        the figure type, DPI, style, default downsampling and the matplotlib and plotish versions.
+
+        Parameters:
+        - fi (FigureInterface): The figure.
+        - fig_type (FigType): The type of the output.
+
+        Returns:
+        str: The hexadecimal SHA-256 digest.
+        """
+        import matplotlib
+
+        settings = {
+            "figure": fi.fingerprint(),
+            "type": fig_type.name,
+            "dpi": DPI,
+            "style": STYLE,
+            "downsample": self.downsample,
+            "matplotlib": matplotlib.__version__,
+            "plotish": _version(),
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _restore(self, i: int, fi: FigureInterface, types: List[FigType]) -> Tuple[List[FigType], Optional[str]]:
         """
-        Save the current plot in a specified format.
+        Restore the up-to-date outputs of a figure from the cache.
+
+        Parameters:
+        - i (int): Index of the figure in the dataset.
+        - fi (FigureInterface): The figure.
+        - types (List[FigType]): The requested types.
+
+        Returns:
+        Tuple[List[FigType], Optional[str]]: The types still to render, and the cached warning of
+        the figure (None if nothing was restored).
+        """
+        if self.cache is None:
+            return list(types), None
+        pending = []
+        warn = None
+        for fig_type in types:
+            cached = None
+            if fig_type not in _PARENT_TYPES:
+                cached = self.cache.restore(self.cache_key(fi, fig_type), self._output(fig_type, i)[0])
+            if cached is None:
+                pending.append(fig_type)
+            else:
+                warn = cached
+        return pending, warn
+
+    def _store(self, i: int, fi: FigureInterface, types: List[FigType], warn: str) -> None:
+        """
+        Keep the freshly rendered outputs of a figure in the cache.
+
+        Parameters:
+        - i (int): Index of the figure in the dataset.
+        - fi (FigureInterface): The figure.
+        - types (List[FigType]): The rendered types.
+        - warn (str): The warning generated while making the figure.
+        """
+        if self.cache is None:
+            return
+        for fig_type in types:
+            if fig_type not in _PARENT_TYPES:
+                self.cache.store(self.cache_key(fi, fig_type), self._output(fig_type, i)[0], warn)
+
+    def _plot_parallel(self) -> List[str]:
+        """
+        Render the figures of the dataset in a pool of worker processes.
+
+        Per-figure files are produced by the workers, which memory-map the line buffers instead
+        of receiving a pickled copy (see plotish.sharing). Outputs that can't be split between
+        processes (FigType.SHOW and FigType.PDF_PAGES) are made again in this process once
+        all files are written. The render cache is checked and updated by this process, figures
+        whose outputs are up to date are not sent to the workers.
+
+        Returns:
+        List[str]: List of warnings, in dataset order.
+        """
+        from .sharing import SharedBuffers
+
+        worker_types = [t for t in self.types if t not in _PARENT_TYPES]
+        options = {"downsample": self.downsample, "template": self.template, "overlap_writes": self.overlap_writes}
+        profile = bool(self._listeners)
+        rendered = deque()
+
+        def jobs():
+            for i, fi in self._dataset.items():
+                self.rendered.append(i)
+                with measure(self._listeners if self.cache is not None else [], "cache", i):
+                    pending, warn = self._restore(i, fi, worker_types)
+                if not pending and warn is not None:
+                    rendered.append(None)
+                    yield parallel.done((warn, []) if profile else warn)
+                else:
+                    rendered.append((i, fi, pending))
+                    yield (self._outfolder, self._dataset.name, pending, options, i, shared.share(i, fi), profile)
+
+        warns = []
+        try:
+            with SharedBuffers() as shared, \
+                    nullcontext(self.pool) if self.pool is not None else parallel.make_pool(self.workers) as pool:
+                for warn in parallel.imap_ordered(pool, parallel.render_figure, jobs(), 2 * self.workers):
+                    if profile:
+                        warn, events = warn
+                        for event in events:
+                            emit(self._listeners, event)
+                    job = rendered.popleft()
+                    if job is not None:
+                        shared.release(job[0])
+                        self._store(*job, warn)
+                    warns.append(warn)
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+
+        parent_types = [t for t in self.types if t in _PARENT_TYPES]
+        if parent_types:
+            try:
+                for i, fi in self._dataset.items():
+                    with measure(self._listeners, "make_fig", i) as event:
+                        fig, _ = self.make_fig(fi)
+                        if event is not None:
+                            event.points = _plotted_points(fig)
+                    self.export(fig, i, parent_types)
+            finally:
+                self.close()
+        if self._show:
+            import matplotlib.pyplot as plt
+            plt.show()
+        return warns
+
+    def save(self, fig_type: FigType, i: int, fig: Optional["Figure"] = None) -> None:
+        """
+        Save a plot in a specified format.
 
         Parameters:
         - fig_type (FigType): The type of figure to save.
         - i (int): Index of the current figure in the dataset.
+        - fig (Figure): The figure to save. Defaults to the pyplot current figure.
+        """
+        if fig is None:
+            import matplotlib.pyplot as plt
+            fig = plt.gcf()
+        if fig_type == FigType.SHOW:
+            self._show = True
+            return
+        with measure(self._listeners, f"save_{fig_type.name.lower()}", i) as event:
+            if fig_type == FigType.PDF_PAGES:
+                self._add_page(fig)
+                return
+            filename, kwargs = self._output(fig_type, i)
+            fig.savefig(filename, **kwargs)
+            if event is not None:
+                event.bytes = os.path.getsize(filename)
+                event.detail = filename
+
+    def close(self) -> None:
+        """
+        Finish the outputs spanning several figures, i.e. the multi-page PDF.
+
+        Comments:
+        - plot() calls it once every figure is rendered. It only has to be called explicitly
+          when figures are rendered one by one with render().
+        - The figure kept by the template mode in the calling thread is released.
+        """
+        template.keep(None)
+        with self._pages_lock:
+            if self._pages is not None:
+                self._pages.close()
+                self._pages = None
+
+    def _add_page(self, fig: "Figure") -> None:
+        """
+        Append a figure to the multi-page PDF of the dataset, creating the file on first use.
+
+        Parameters:
+        - fig (Figure): The figure to append.
+        """
+        with self._pages_lock:
+            if self._pages is None:
+                from matplotlib.backends.backend_pdf import PdfPages
+                self._pages = PdfPages(self.pages_filename)
+            self._pages.savefig(fig, dpi=DPI)
+
+    def export(self, fig: "Figure", i: int, types: Optional[List[FigType]] = None) -> None:
+        """
+        Save a plot in every requested format.
+
+        Each format is drawn and written in turn. With overlap_writes, each format is drawn into
+        an in-memory buffer handed to a writer thread, so that writing a file overlaps with
+        drawing the next format. This only helps when writing is slow, e.g. on network file
+        systems, and holds every output of the figure in memory until it is written.
+
+        Parameters:
+        - fig (Figure): The figure to save.
+        - i (int): Index of the current figure in the dataset.
+        - types (List[FigType]): The types to save. Defaults to the types of the instance.
+        """
+        file_types = []
+        for fig_type in self.types if types is None else types:
+            if fig_type in _PARENT_TYPES:
+                self.save(fig_type, i, fig)
+            else:
+                file_types.append(fig_type)
+        if not self.overlap_writes or len(file_types) <= 1:
+            for fig_type in file_types:
+                self.save(fig_type, i, fig)
+            return
+
+        with ThreadPoolExecutor(max_workers=len(file_types)) as writer:
+            writes = []
+            for fig_type in file_types:
+                filename, kwargs = self._output(fig_type, i)
+                buffer = io.BytesIO()
+                with measure(self._listeners, f"save_{fig_type.name.lower()}", i, detail=filename) as event:
+                    fig.savefig(buffer, format=os.path.splitext(filename)[1][1:], **kwargs)
+                    if event is not None:
+                        event.bytes = buffer.getbuffer().nbytes
+                writes.append(writer.submit(_write_file, filename, buffer))
+            for write in writes:
+                write.result()
+
+    @property
+    def pages_filename(self) -> str:
+        """Read-only property returning the path of the multi-page PDF (FigType.PDF_PAGES)."""
+        return f"{self._outfolder}/{self._dataset.name}.pdf"
+
+    def outputs(self, i: int) -> List[str]:
+        """
+        Return the files written for a figure, without the multi-page PDF shared by every figure.
+
+        Parameters:
+        - i (int): Index of the figure in the dataset.
+
+        Returns:
+        List[str]: The paths of the output files, one per figure type.
+        """
+        return [self._output(fig_type, i)[0] for fig_type in self.types if fig_type not in _PARENT_TYPES]
+
+    def _output(self, fig_type: FigType, i: int) -> Tuple[str, dict]:
+        """
+        Return the output file name and savefig options of a figure type.
+
+        Parameters:
+        - fig_type (FigType): The type of figure to save, other than FigType.SHOW and FigType.PDF_PAGES.
+        - i (int): Index of the current figure in the dataset.
+
+        Returns:
+        Tuple[str, dict]: The file name and the keyword arguments for Figure.savefig.
         """
         name = f"{self._outfolder}/{self._dataset.name}_{i}"
         match fig_type:
-            case FigType.PDF:   
-                plt.savefig(f"{name}.pdf",backend="pgf",dpi=300)
+            case FigType.PDF:
+                return f"{name}.pdf", {"dpi": DPI}
+            case FigType.PDF_LATEX:
+                return f"{name}_latex.pdf", {"backend": "pgf", "dpi": DPI}
             case FigType.PGF:
-                plt.savefig(f"{name}.pgf",backend="pgf",dpi=300)
+                return f"{name}.pgf", {"backend": "pgf", "dpi": DPI}
             case FigType.PNG:
-                plt.savefig(f"{name}.png",dpi=300)
+                return f"{name}.png", {"dpi": DPI}
             case FigType.SVG:
-                plt.savefig(f"{name}.svg",dpi=300)
-            case FigType.SHOW:
-                # plt.show()
-                self._show = True
+                return f"{name}.svg", {"dpi": DPI}
             case _:
-                plt.savefig(f"{name}.png",dpi=50)      
+                return f"{name}.png", {"dpi": 50}
 
-    def make_fig(self, fi: FigureInterface) -> Tuple[plt.Figure, str]:
+    def make_fig(self, fi: FigureInterface) -> Tuple["Figure", str]:
         """
         Create a new figure and plot data from FigureInterface.
 
+        The figure is a standalone matplotlib Figure drawn by the Agg canvas, so figures can be
+        made from several threads at once. pyplot is only used when FigType.SHOW is requested.
+
+        In template mode, the figure made last by the calling thread is returned instead when
+        it has the same layout, updated with the data of fi.
+
         Parameters:
         - fi (FigureInterface): An interface containing data for plotting.
 
         Returns:
-        Tuple[plt.Figure, str]: The generated figure and a warning message.
+        Tuple[Figure, str]: The generated figure and a warning message.
         """
-        fig, ax = plt.subplots()
+        reuse = self.template and FigType.SHOW not in self.types
+        if reuse:
+            reused = self._reuse_template(fi)
+            if reused is not None:
+                return reused
+        if FigType.SHOW in self.types:
+            import matplotlib.pyplot as plt
+            fig = plt.figure()
+        else:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+            fig = Figure()
+            FigureCanvasAgg(fig)
+        ax = fig.subplots()
         ax.set_title(fi.title)
         ax.set_xlabel(fi.xlabel)
         ax.set_ylabel(fi.ylabel)
 
-        for line in fi.lines:
-            ax.plot(line._xdata, line._ydata, **line.kwargs)
+        points = 2 * int(fig.get_figwidth() * DPI)
+        legend = {}
+        if len(fi.lines) > COLLECTION_THRESHOLD:
+            legend["handles"] = self._plot_collections(ax, fi, points)
+        else:
+            for line in fi.lines:
+                self._plot_line(ax, fi, line, points, line.kwargs)
 
+        warn = "OK"
         try:
             if fi.legendPosition is not None and fi.legendPosition != "None":
-                ax.legend(loc=fi.legendPosition)
+                ax.legend(loc=fi.legendPosition, **legend)
         except Exception as e:
-            ax.legend(loc="best")
-            return fig, f"Plotting:makefig legend:\r\n{str(e)}"
+            ax.legend(loc="best", **legend)
+            warn = f"Plotting:makefig legend:\r\n{str(e)}"
+
+        if reuse:
+            self._keep_template(fi, fig, warn)
+        return fig, warn
+
+    def _reuse_template(self, fi: FigureInterface) -> Optional[Tuple["Figure", str]]:
+        """
+        Update the template figure of the calling thread with a figure of the same layout.
+
+        Parameters:
+        - fi (FigureInterface): The figure to show.
+
+        Returns:
+        Optional[Tuple[Figure, str]]: The updated figure and its warning, or None if there is no
+        template or its layout differs.
+        """
+        current = template.get()
+        if current is None or current.layout != template.layout(fi):
+            return None
+        points = 2 * int(current.fig.get_figwidth() * DPI)
+        data = [self._line_data(fi, line, points) for line in fi.lines]
+        methods = []
+        for line, (_, y) in zip(fi.lines, data):
+            method = raster.resolve(line.raster, len(y), line.kwargs["marker"] not in _NO_MARKER)
+            methods.append(None if method is None else method[0])
+        if tuple(methods) != current.methods:
+            return None
+        return current.update(fi.title, data), current.warn
+
+    def _keep_template(self, fi: FigureInterface, fig: "Figure", warn: str) -> None:
+        """
+        Keep a new figure as the template of the calling thread, if its lines can be updated in place.
+
+        Parameters:
+        - fi (FigureInterface): The figure data.
+        - fig (Figure): The figure made from fi.
+        - warn (str): The warning generated while making the figure.
+        """
+        ax = fig.axes[0]
+        lines = ax.get_lines()
+        if ax.collections or len(lines) != len(fi.lines):
+            template.keep(None)
+            return
+        methods = tuple("raster" if line.get_rasterized() else None for line in lines)
+        template.keep(template.FigureTemplate(fig, warn, template.layout(fi), methods))
+
+    def _plot_collections(self, ax: "Axes", fi: FigureInterface, points: int) -> List[Any]:
+        """
+        Plot the lines of a figure with many lines, batching the lines without markers.
+
+        Creating and drawing one Line2D per line is slow for thousands of lines. Instead, the
+        lines sharing a line style are packed into a single (n, 2) buffer whose slices are the
+        segments of one LineCollection, with a color per line. Lines without a color take the
+        colors of the property cycle in turn, as with ax.plot. Lines with markers or a raster
+        option are plotted with _plot_line.
 
-        return fig, "OK"
+        Parameters:
+        - ax (Axes): The axes to plot in.
+        - fi (FigureInterface): The figure holding the lines.
+        - points (int): The default target point count of the downsampling.
 
+        Returns:
+        List[Any]: The legend handles of the labelled lines, in line order. Batched lines are
+        represented by Line2D artists of the same color and style, not added to the axes.
+        """
+        import matplotlib
+        from matplotlib.collections import LineCollection
+        from matplotlib.lines import Line2D
+
+        rc = matplotlib.rcParams
+        cycle = rc["axes.prop_cycle"].by_key().get("color") or ["C0"]
+        groups = {}
+        handles = []
+        n = 0
+        for line in fi.lines:
+            kwargs = line.kwargs
+            if kwargs["color"] is None:
+                kwargs["color"] = cycle[n % len(cycle)]
+                n += 1
+            if kwargs["marker"] not in _NO_MARKER or kwargs["linestyle"] in _NO_LINE or line.raster is not None:
+                artist = self._plot_line(ax, fi, line, points, kwargs)
+            else:
+                x, y = self._line_data(fi, line, points)
+                style = kwargs["linestyle"] or rc["lines.linestyle"]
+                group = groups.setdefault(style, ([], [], []))
+                group[0].append(x)
+                group[1].append(y)
+                group[2].append(kwargs["color"])
+                artist = Line2D([], [], color=kwargs["color"], linestyle=style, label=kwargs["label"])
+            if kwargs["label"] is not None and not str(kwargs["label"]).startswith("_"):
+                handles.append(artist)
+
+        for style, (xs, ys, colors) in groups.items():
+            sizes = [len(x) for x in xs]
+            buffer = numpy.empty((sum(sizes), 2))
+            numpy.concatenate(xs, out=buffer[:, 0])
+            numpy.concatenate(ys, out=buffer[:, 1])
+            segments = numpy.split(buffer, numpy.cumsum(sizes[:-1]))
+            collection = LineCollection(segments, colors=colors, linestyles=style,
+                                        capstyle=rc["lines.solid_capstyle"], joinstyle=rc["lines.solid_joinstyle"])
+            ax.add_collection(collection, autolim=False)
+            # NaN values break the lines, as with Line2D, and are left out of the data limits
+            if buffer.size:
+                ax.update_datalim((numpy.fmin.reduce(buffer), numpy.fmax.reduce(buffer)))
+        ax.autoscale_view()
+        return handles
+
+    def _plot_line(self, ax: "Axes", fi: FigureInterface, line: LineInterface, points: int, kwargs: dict) -> Any:
+        """
+        Plot a line with ax.plot, rasterized or aggregated into a density map when requested
+        or when its markers are dense (see plotish.raster).
+
+        Parameters:
+        - ax (Axes): The axes to plot in.
+        - fi (FigureInterface): The figure holding the line.
+        - line (LineInterface): The line to plot.
+        - points (int): The default target point count of the downsampling.
+        - kwargs (dict): The matplotlib properties of the line.
+
+        Returns:
+        Line2D: The artist standing for the line in the legend.
+        """
+        x, y = self._line_data(fi, line, points)
+        method = raster.resolve(line.raster, len(y), kwargs["marker"] not in _NO_MARKER)
+        if method is None:
+            artist, = ax.plot(x, y, **kwargs)
+        elif method[0] == "raster":
+            artist, = ax.plot(x, y, rasterized=True, **kwargs)
+        else:
+            # The empty line takes the color of the line and represents the density map in the legend
+            artist, = ax.plot([], [], **kwargs)
+            raster.hexbin(ax, line._xdata, line._ydata, artist.get_color(), method[1])
+        return artist
+
+    def _line_data(self, fi: FigureInterface, line: LineInterface, points: int) -> Tuple[Any, Any]:
+        """
+        Return the data of a line to plot, downsampled if requested.
+
+        The option of the line takes precedence over the one of the figure, which takes
+        precedence over the default of the instance.
+
+        Parameters:
+        - fi (FigureInterface): The figure holding the line.
+        - line (LineInterface): The line to plot.
+        - points (int): The default target point count, two points per pixel column of the figure.
+
+        Returns:
+        Tuple[Any, Any]: The x and y data to plot.
+        """
+        option = line.downsample
+        if option is None:
+            option = fi.downsample if fi.downsample is not None else self.downsample
+        method = decimation.resolve(option, points)
+        if method is None:
+            return line._xdata, line._ydata
+        return decimation.decimate(line._xdata, line._ydata, *method)
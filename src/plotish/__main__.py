@@ -30,23 +30,198 @@ Date:
     02/01/2024
 """
 
+import argparse
+import glob
+import os
 import sys
-from typing import List
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from .dataset import DataSet
-from . import Plottish, FigType
+from . import Plottish, FigType, columnar, parallel
+from .decoders import DECODERS
+from .profiling import Profiler
 from . import make_out_folder,treat_warnings
 
+# The cache, server and watch modules are imported by the modes using them
+if TYPE_CHECKING:
+    from .cache import RenderCache
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m plotish",
+        description="Generate and save plots from a JSON file using Matplotlib.",
+    )
+    parser.add_argument("inputs", nargs="*", metavar="FILE",
+                        help="JSON or columnar (Parquet, Arrow IPC, HDF5) files, glob patterns (quoted) or "
+                             "'@manifest' files listing one file or pattern "
+                             "per line. For compatibility, 'FILE OUTFOLDER' sets the output folder when "
+                             "OUTFOLDER is not an existing file.")
+    parser.add_argument("-o", "--outfolder", default=None,
+                        help="Path to the output folder. Defaults to 'out'. With several files, the outputs "
+                             "of each file go to a subfolder named after its path relative to the common folder.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse figures one at a time instead of loading the whole file.")
+    parser.add_argument("--lazy", action="store_true",
+                        help="Build each figure only when it is plotted.")
+    parser.add_argument("--decoder", choices=DECODERS, default="auto",
+                        help="JSON decoder. Defaults to 'auto', the fastest installed among orjson, ujson and json.")
+    parser.add_argument("-f", "--figures", nargs="+", metavar="FIGURE",
+                        help="Indices or titles of the figures to plot. Defaults to every figure.")
+    parser.add_argument("-t", "--types", nargs="+", default=["png", "show"],
+                        choices=[t.name.lower() for t in FigType],
+                        help="Figure types to generate. Defaults to 'png show'.")
+    parser.add_argument("--downsample", choices=["minmax", "lttb"], default=None,
+                        help="Downsample large lines that don't set a 'downsample' option in the JSON file.")
+    parser.add_argument("--template", action="store_true",
+                        help="Reuse the previous figure for figures of the same layout, updating only their data.")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Number of worker processes used to render figures. Defaults to 1.")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="Render every figure, even if its outputs are up to date.")
+    parser.add_argument("--cache-copies", action="store_true",
+                        help="Keep a copy of each output in the render cache, to restore deleted or modified "
+                             "outputs without rendering.")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Folder of the render cache. Defaults to '$XDG_CACHE_HOME/plotish'.")
+    parser.add_argument("--cache-size", type=int, default=None,
+                        help="Maximal size of the render cache in MB. Defaults to 512.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and render again the figures that change in the JSON file.")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Time between two checks of the file in watch mode, in seconds. Defaults to 1.")
+    parser.add_argument("--serve", default=None, metavar="ADDRESS",
+                        help="Run a render server on a Unix socket path or a HOST:PORT TCP address instead of "
+                             "rendering FILE arguments, see plotish.server.")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="Server mode: allow a HOST:PORT address other than a loopback one. "
+                             "Requests are not authenticated.")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="Server mode: requests waiting at most, more are answered 'busy'. Defaults to 16.")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Server mode: default timeout of a request, in seconds. Defaults to 60.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the time spent in each stage (read, build, make_fig, save_<type>, cache).")
+    parser.add_argument("--trace", default=None, metavar="FILE",
+                        help="Write the profiling events to FILE in the Chrome trace event format. Implies --profile.")
+    return parser
+
 
 def _print_help():
-    help_message = r"""
-Usage: python -m plotish <filename> [outfolder]
-Generate and save plots from a JSON file using Matplotlib.
+    _parser().print_help()
 
-Options:
-  <filename>: Path to the JSON file.
-  [outfolder]: Optional. Path to the output folder. Defaults to 'out'.
-"""
-    print(help_message)
+def _expand(inputs: List[str]) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Expand glob patterns and manifest files into the list of files to render.
+
+    Parameters:
+    - inputs (List[str]): File names, glob patterns or '@manifest' files.
+
+    Returns:
+    Tuple[List[str], List[Tuple[str, str]]]: The files in order without duplicates, and the
+    (input, error) pairs of the inputs matching no file.
+    """
+    files = []
+    errors = []
+    for item in inputs:
+        if item.startswith("@"):
+            manifest = item[1:]
+            try:
+                with open(manifest, "r", encoding="utf-8") as f:
+                    lines = [line.strip() for line in f]
+            except OSError as e:
+                errors.append((item, str(e)))
+                continue
+            base = os.path.dirname(manifest)
+            entries = [line if os.path.isabs(line) else os.path.join(base, line)
+                       for line in lines if line and not line.startswith("#")]
+            sub_files, sub_errors = _expand(entries)
+            files.extend(sub_files)
+            errors.extend(sub_errors)
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                errors.append((item, "no file matches the pattern"))
+            files.extend(matches)
+        else:
+            files.append(item)
+    return list(dict.fromkeys(files)), errors
+
+def _out_folders(files: List[str], outfolder: str) -> List[str]:
+    """
+    Return the output folder of each file.
+
+    A single file is rendered into the output folder. With several files, each file gets a
+    subfolder named after its path relative to the folder common to every file, without
+    extension: 'runs/a/data.json' and 'runs/b/data.json' are rendered into 'a/data' and 'b/data'.
+
+    Parameters:
+    - files (List[str]): The files to render.
+    - outfolder (str): The output folder.
+
+    Returns:
+    List[str]: The output folder of each file, in order.
+    """
+    if len(files) <= 1:
+        return [outfolder] * len(files)
+    paths = [os.path.abspath(filename) for filename in files]
+    common = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return [os.path.join(outfolder, os.path.splitext(os.path.relpath(path, common))[0]) for path in paths]
+
+def _split_inputs(args: argparse.Namespace) -> Tuple[List[str], str]:
+    """
+    Return the inputs and the output folder, handling the former 'FILE OUTFOLDER' form.
+
+    Parameters:
+    - args (argparse.Namespace): The parsed command-line arguments.
+
+    Returns:
+    Tuple[List[str], str]: The inputs and the output folder.
+    """
+    inputs = args.inputs
+    if args.outfolder is not None:
+        return inputs, args.outfolder
+    if len(inputs) == 2 and not os.path.isfile(inputs[1]) and not glob.has_magic(inputs[1]) \
+            and not inputs[1].startswith("@"):
+        return inputs[:1], inputs[1]
+    return inputs, "out"
+
+def _render_file(filename: str, outfolder: str, args: argparse.Namespace, types: List[FigType],
+                 cache: Optional["RenderCache"], pool, profiler: Optional[Profiler]) -> List[str]:
+    """
+    Load one dataset file and render its figures.
+
+    Parameters:
+    - filename (str): The path to the JSON file.
+    - outfolder (str): The output folder.
+    - args (argparse.Namespace): The parsed command-line arguments.
+    - types (List[FigType]): The figure types to generate.
+    - cache (RenderCache): The render cache, or None.
+    - pool (Executor): The shared pool of worker processes, or None.
+    - profiler (Profiler): The profiler receiving the timing events, or None.
+
+    Returns:
+    List[str]: The warnings of the figures.
+    """
+    make_out_folder(outfolder)
+    ds = DataSet()
+    if profiler is not None:
+        ds.add_listener(profiler)
+    if columnar.detect(filename) is not None:
+        ds.load_columnar(filename)
+    else:
+        ds.load_file(filename, stream=args.stream, lazy=not args.stream and (args.lazy or bool(args.figures)),
+                     decoder=args.decoder)
+    try:
+        ds.select(args.figures)
+        print(f"dataset: {ds.name} is loaded")
+        pl = Plottish(outfolder, types, ds, workers=args.workers, downsample=args.downsample, cache=cache, pool=pool,
+                      template=args.template)
+        if profiler is not None:
+            pl.add_listener(profiler)
+        return pl.plot()
+    finally:
+        ds.close()
 
 def main(argc: int, argv: List[str]):
     """
@@ -57,39 +232,168 @@ def main(argc: int, argv: List[str]):
     - argv (List[str]): List of command-line arguments.
 
     Usage:
-    - The main function expects at least one command-line argument, which is the filename.
-    - An optional second argument can be provided for specifying the output folder.
-      If not provided, the default output folder is 'out'.
+    - The main function expects at least one input: a JSON file, a glob pattern or '@manifest',
+      a file listing one file or pattern per line (empty lines and lines starting with '#' are skipped).
+      Every file is rendered in the same process, sharing the worker pool and the render cache.
+    - The output folder is set with -o/--outfolder and defaults to 'out'. With several files, the
+      outputs of each file go to a subfolder named after its path relative to the folder common
+      to every file (see _out_folders). For compatibility, the second of exactly two inputs is
+      the output folder when it is not an existing file nor a pattern.
+    - Parquet, Arrow IPC and HDF5 inputs are read with DataSet.load_columnar (see plotish.columnar),
+      the JSON options --stream, --lazy and --decoder do not apply to them.
+    - The --stream option parses the figures incrementally to bound memory usage on large files.
+    - The --decoder option selects the JSON decoder (see plotish.decoders).
+    - The --figures option plots only the figures with the given indices or titles; the other
+      figures are not converted unless --stream is used. --lazy builds the figures on access.
+    - The --types option selects the figure types to generate, e.g. '--types png pdf_pages'.
+    - The --workers option renders the figures in a pool of worker processes.
+    - The --downsample option reduces large lines to the resolution of the figure before plotting.
+    - The --template option reuses the previous figure for the next figures of the same layout
+      (see plotish.template).
+    - Figures whose outputs are up to date are not rendered again, unless --no-cache is given.
+      --cache-copies keeps a copy of each output to restore it, --cache-dir and --cache-size set
+      the folder and the size limit of the render cache.
+    - The --watch option keeps running and renders the figures that were added or modified
+      each time the file changes, until interrupted with Ctrl+C.
+    - The --serve option runs a render server answering requests on a local socket instead of
+      rendering files; --queue-size bounds its queue and --timeout sets the default request timeout.
+      TCP addresses must be loopback addresses unless --allow-remote is given.
+    - The --profile option prints the time spent in each stage once every file is rendered,
+      --trace writes the events to a Chrome trace file.
 
     Example:
-    - main(2,["__main__.py","json_file"]  # Uses default output folder 'out' # Uses specified output folder 'custom_outfolder'
-    - main(3,["__main__.py","json_file","custom_outfolder"]  # Uses default output folder 'out' # Uses specified output folder 'custom_outfolder'
+    - main(2,["__main__.py","json_file"]  # Uses default output folder 'out'
+    - main(3,["__main__.py","json_file","custom_outfolder"]  # Uses specified output folder 'custom_outfolder'
+    - main(4,["__main__.py","runs/*.json","-o","plots"]  # Renders every matching file into 'plots/<file>'
 
     Raises:
-    - SystemExit: If the required command-line arguments are not provided or an error occurs during execution.
+    - SystemExit: If the required command-line arguments are not provided, or with status 1 once
+      every file is processed if one of them failed.
     """
     
-    if len(argv) < 2 or "--help" in argv or "-h" in argv:
+    if len(argv) < 2:
         _print_help()
         sys.exit(0)
 
-    filename = argv[1]
-    outfolder = argv[2] if len(argv) == 3 else "out"
+    parser = _parser()
+    args = parser.parse_args(argv[1:])
+    if args.serve is not None:
+        _serve(args)
+        return
+    if not args.inputs:
+        parser.error("the following arguments are required: FILE")
+    inputs, outfolder = _split_inputs(args)
+    files, errors = _expand(inputs)
+    types = [FigType[t.upper()] for t in args.types]
 
-    make_out_folder(outfolder)
-    ds = DataSet()
+    if args.watch:
+        if len(files) != 1:
+            print("Error: --watch takes a single file")
+            sys.exit(1)
+        make_out_folder(outfolder)
+        _watch(args, files[0], outfolder)
+        return
 
-    try:
-        ds.load_file(filename)
-        print(f"dataset: {ds.name} is loaded")
-        pl = Plottish(outfolder, [FigType.PNG, FigType.SHOW], ds)
-        warns = pl.plot()
+    cache = _cache(args)
+    profiler = Profiler() if args.profile or args.trace else None
+    rendered = 0
+    owners = {}
+    with parallel.make_pool(args.workers) if args.workers > 1 and len(files) > 1 else nullcontext() as pool:
+        for filename, folder in zip(files, _out_folders(files, outfolder)):
+            # e.g. data.json and data.parquet of the same folder
+            if folder in owners:
+                error = f"its output folder {folder} is already used by {owners[folder]}"
+                print(f"Error: {filename}: {error}")
+                errors.append((filename, error))
+                continue
+            owners[folder] = filename
+            try:
+                warns = _render_file(filename, folder, args, types, cache, pool, profiler)
+            except Exception as e:
+                print(f"Error: {filename}: {e}")
+                errors.append((filename, str(e)))
+                continue
+            rendered += 1
+            treat_warnings(warns)
 
-    except Exception as e:
-        print(f"Error: {e}")
+    if profiler is not None:
+        print(profiler.summary())
+        if args.trace:
+            profiler.dump(args.trace)
+    if len(files) > 1 or errors:
+        print(f"{rendered} of {len(files)} files rendered")
+        for item, error in errors:
+            print(f"Failed: {item}: {error}")
+    if errors:
         sys.exit(1)
 
-    treat_warnings(warns)
+def _cache(args: argparse.Namespace) -> Optional["RenderCache"]:
+    """
+    Open the render cache selected by the command-line arguments.
+
+    Parameters:
+    - args (argparse.Namespace): The parsed command-line arguments.
+
+    Returns:
+    Optional[RenderCache]: The render cache, or None with --no-cache.
+    """
+    if not args.cache:
+        return None
+    from .cache import DEFAULT_MAX_BYTES, RenderCache
+    max_bytes = DEFAULT_MAX_BYTES if args.cache_size is None else args.cache_size * 1024 * 1024
+    return RenderCache(args.cache_dir, max_bytes, copies=args.cache_copies)
+
+def _watch(args: argparse.Namespace, filename: str, outfolder: str) -> None:
+    """
+    Render the figures of the file each time they change, until interrupted.
+
+    Parameters:
+    - args (argparse.Namespace): The parsed command-line arguments.
+    - filename (str): The path to the JSON file.
+    - outfolder (str): The output folder.
+    """
+    from .watch import Watcher
+
+    types = [FigType[t.upper()] for t in args.types]
+    cache = _cache(args)
+    watcher = Watcher(filename, outfolder, types, figures=args.figures, interval=args.interval,
+                      downsample=args.downsample, cache=cache, template=args.template)
+    if len(watcher.types) < len(types):
+        print("Watch mode: 'show' and 'pdf_pages' are ignored")
+
+    def report(rendered):
+        print(f"rendered figures: {', '.join(str(i) for i, _ in rendered if i >= 0)}")
+        treat_warnings([warn for _, warn in rendered])
+
+    print(f"watching {filename}")
+    try:
+        watcher.run(report)
+    except KeyboardInterrupt:
+        pass
+
+def _serve(args: argparse.Namespace) -> None:
+    """
+    Run a render server until interrupted.
+
+    Parameters:
+    - args (argparse.Namespace): The parsed command-line arguments.
+    """
+    from .server import DEFAULT_QUEUE_SIZE, DEFAULT_TIMEOUT, RenderServer
+
+    queue_size = DEFAULT_QUEUE_SIZE if args.queue_size is None else args.queue_size
+    timeout = DEFAULT_TIMEOUT if args.timeout is None else args.timeout
+    cache = _cache(args)
+    server = RenderServer(args.serve, workers=args.workers, queue_size=queue_size, timeout=timeout,
+                          outfolder=args.outfolder or "out", downsample=args.downsample, cache=cache,
+                          allow_remote=args.allow_remote)
+    if args.allow_remote:
+        print("Warning: requests are not authenticated, any client reaching the server can read and write "
+              "files as this user")
+    print(f"serving on {args.serve}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
 
 if __name__== "__main__":
     main(len(sys.argv), sys.argv)
@@ -0,0 +1,288 @@
+"""
+plotish.aio - Asyncio interface for loading and rendering datasets.
+
+DataSet.load_file and Plottish.plot block for as long as the file is parsed and the figures are
+drawn. The functions of this module run that work off the event loop and report each figure as
+soon as it is written, so that a service can stream the outputs to its clients:
+
+- reading, parsing and building the figures run in a helper thread;
+- rendering runs in an executor: a dedicated thread by default, or a pool of worker processes
+  with workers > 1 (see plotish.parallel), or the executor given.
+
+render_async returns an AsyncRender that can be iterated with `async for`, yielding a
+FigureResult per figure in completion order, or awaited to get every result in dataset order.
+
+FigType.SHOW is ignored. The multi-page PDF of FigType.PDF_PAGES (<outfolder>/<name>.pdf) is
+complete once the iteration ends.
+
+Example Usage:
+```python
+import plotish
+from plotish import FigType
+
+async def handler(path):
+    async for result in plotish.render_async(path, "out", [FigType.PNG, FigType.SVG]):
+        await send(result.outputs)
+
+results = await plotish.render_async("data.json", "out", [FigType.PNG])
+```
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Generator, Iterator, List, Optional, Tuple, Union
+
+from . import FigType, Plottish, _PARENT_TYPES, columnar, make_out_folder, parallel
+from .cache import RenderCache
+from .dataset import DataSet
+from .interfaces.figureinterface import FigureInterface
+
+
+@dataclass
+class FigureResult:
+    """
+    A figure rendered by render_async.
+
+    Attributes:
+    - index (int): The index of the figure in the dataset.
+    - title (str): The title of the figure.
+    - outputs (List[str]): The files written for the figure, without the multi-page PDF.
+    - warning (str): The warning of the figure, 'OK' if none.
+    - seconds (float): The time from the submission of the figure to its completion.
+    """
+    index: int
+    title: str
+    outputs: List[str]
+    warning: str
+    seconds: float
+
+
+async def load_async(filename: str, decoder: Optional[str] = None) -> DataSet:
+    """
+    Load a dataset file in a thread, without blocking the event loop.
+
+    JSON files are loaded lazily (see DataSet.load_file): their figures are built when they are
+    rendered. Columnar files are loaded with DataSet.load_columnar.
+
+    Parameters:
+    - filename (str): The path to the dataset file.
+    - decoder (str): The JSON decoder, one of plotish.decoders.DECODERS. Defaults to 'auto'.
+
+    Returns:
+    DataSet: The dataset.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, _load, filename, decoder)
+
+
+def render_async(source: Union[str, DataSet], outfolder: str = "out", types: Optional[List[FigType]] = None,
+                 figures: Optional[List[Union[int, str]]] = None, workers: int = 1,
+                 executor: Optional[Executor] = None, downsample: Any = None,
+                 cache: Optional[RenderCache] = None, decoder: Optional[str] = None) -> "AsyncRender":
+    """
+    Render a dataset without blocking the event loop.
+
+    Parameters:
+    - source (Union[str, DataSet]): The path to a dataset file, or a loaded DataSet.
+    - outfolder (str): The output folder. Defaults to 'out'.
+    - types (List[FigType]): The figure types to generate. Defaults to PNG.
+    - figures (List[Union[int, str]]): The indices or titles of the figures to render. Defaults to all.
+    - workers (int): With more than one, figures are rendered by a pool of as many worker processes.
+      Defaults to 1, a dedicated thread. Two figures per worker are submitted at once.
+    - executor (Executor): The executor rendering the figures instead, a thread or process pool
+      of `workers` workers. It is left running.
+    - downsample (Any): The default downsampling option, see plotish.decimation. Defaults to None.
+    - cache (RenderCache): The render cache. Defaults to None (always render).
+    - decoder (str): The JSON decoder used to load a file. Defaults to 'auto'.
+
+    Returns:
+    AsyncRender: The rendering, to iterate with `async for` or to await.
+    """
+    return AsyncRender(source, outfolder, types, figures, workers, executor, downsample, cache, decoder)
+
+
+class AsyncRender:
+    """
+    Rendering of a dataset, yielding the figures as they are written.
+
+    Iterating starts the rendering: `async for result in render` yields a FigureResult per figure
+    in completion order, `await render` returns the list of FigureResult in dataset order.
+    Leaving the iteration early cancels the figures that were not started.
+
+    Attributes:
+    - outfolder (str): The output folder.
+    - types (List[FigType]): The figure types to generate, without FigType.SHOW.
+    - workers (int): The number of worker processes, 1 to render in a thread.
+    """
+
+    def __init__(self, source: Union[str, DataSet], outfolder: str = "out", types: Optional[List[FigType]] = None,
+                 figures: Optional[List[Union[int, str]]] = None, workers: int = 1,
+                 executor: Optional[Executor] = None, downsample: Any = None,
+                 cache: Optional[RenderCache] = None, decoder: Optional[str] = None) -> None:
+        """
+        Initialize an AsyncRender, see render_async for the parameters. Nothing runs before it is iterated.
+        """
+        self.outfolder = outfolder
+        self.types = [t for t in (types or [FigType.PNG]) if t != FigType.SHOW]
+        self.workers = max(1, workers)
+        self._source = source
+        self._figures = figures
+        self._executor = executor
+        self._options = {"downsample": downsample, "cache": cache}
+        self._decoder = decoder
+
+    def __aiter__(self) -> AsyncIterator[FigureResult]:
+        return self._run()
+
+    def __await__(self) -> Generator[Any, None, List[FigureResult]]:
+        return self._collect().__await__()
+
+    async def _collect(self) -> List[FigureResult]:
+        """
+        Render every figure.
+
+        Returns:
+        List[FigureResult]: The results, in dataset order.
+        """
+        results = [result async for result in self]
+        return sorted(results, key=lambda result: result.index)
+
+    async def _run(self) -> AsyncIterator[FigureResult]:
+        """
+        Render the figures, at most two per worker at once, and yield them as they complete.
+
+        Returns:
+        AsyncIterator[FigureResult]: The results, in completion order.
+        """
+        from .sharing import SharedBuffers
+
+        loop = asyncio.get_running_loop()
+        dataset = self._source
+        if not isinstance(dataset, DataSet):
+            dataset = await load_async(dataset, self._decoder)
+        if self._figures:
+            dataset.select(self._figures)
+        make_out_folder(self.outfolder)
+
+        process = self.workers > 1 or isinstance(self._executor, ProcessPoolExecutor)
+        executor = self._executor
+        if executor is None:
+            executor = parallel.make_pool(self.workers) if process else ThreadPoolExecutor(max_workers=1)
+        # Builds the figures, checks the cache and writes the shared buffers, one call at a time
+        helper = ThreadPoolExecutor(max_workers=1)
+        shared = SharedBuffers()
+        pl = Plottish(self.outfolder, self.types, dataset, workers=self.workers, **self._options)
+        worker_types = [t for t in self.types if t not in _PARENT_TYPES]
+        items = iter(dataset.items())
+        running = {}
+        finished = False
+        try:
+            while True:
+                while not finished and len(running) < 2 * self.workers:
+                    job = await loop.run_in_executor(helper, _next_job, items, pl, worker_types, shared, process)
+                    if job is None:
+                        finished = True
+                        break
+                    i, fi, task, pending, warn = job
+                    start = time.perf_counter()
+                    if warn is not None:
+                        future = loop.create_future()
+                        future.set_result(warn)
+                    elif process:
+                        future = loop.run_in_executor(executor, parallel.render_figure, self.outfolder,
+                                                      dataset.name, pending, {"downsample": pl.downsample},
+                                                      i, task, False)
+                    else:
+                        future = loop.run_in_executor(executor, pl.render, i, fi)
+                    running[future] = (i, fi, pending, start)
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: running[f][0]):
+                    i, fi, pending, start = running.pop(future)
+                    warn = future.result()
+                    if process and pending:
+                        shared.release(i)
+                        await loop.run_in_executor(helper, pl._store, i, fi, pending, warn)
+                    yield FigureResult(i, fi.title, pl.outputs(i), warn, time.perf_counter() - start)
+            await loop.run_in_executor(helper, _finish, pl, dataset, process)
+        finally:
+            for future in running:
+                future.cancel()
+            if dataset is not self._source:
+                # After the figure the helper may still be building
+                helper.submit(dataset.close)
+            helper.shutdown(wait=False)
+            if self._executor is None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            shared.close()
+
+
+def _load(filename: str, decoder: Optional[str]) -> DataSet:
+    """
+    Load a dataset file, see load_async.
+
+    Parameters:
+    - filename (str): The path to the dataset file.
+    - decoder (str): The JSON decoder.
+
+    Returns:
+    DataSet: The dataset.
+    """
+    dataset = DataSet()
+    if columnar.detect(filename) is not None:
+        dataset.load_columnar(filename)
+    else:
+        dataset.load_file(filename, lazy=True, decoder=decoder)
+    return dataset
+
+
+def _next_job(items: Iterator[Tuple[int, FigureInterface]], pl: Plottish, types: List[FigType],
+              shared: Any, process: bool) -> Optional[Tuple[int, FigureInterface, Any, List[FigType], Optional[str]]]:
+    """
+    Build the next figure and prepare its rendering. Executed by the helper thread.
+
+    Parameters:
+    - items (Iterator[Tuple[int, FigureInterface]]): The selected figures of the dataset.
+    - pl (Plottish): The Plottish instance of the dataset.
+    - types (List[FigType]): The figure types rendered by worker processes.
+    - shared (SharedBuffers): The buffers shared with the worker processes.
+    - process (bool): True if the figures are rendered by worker processes.
+
+    Returns:
+    Optional[Tuple[int, FigureInterface, Any, List[FigType], Optional[str]]]: The index of the
+    figure, the figure, what to send to the worker process (a plotish.sharing.FigureSpec), the
+    types to render and the warning if nothing is left to render; None once every figure is prepared.
+    """
+    item = next(items, None)
+    if item is None:
+        return None
+    i, fi = item
+    if not process:
+        return i, fi, fi, [], None
+    pending, warn = pl._restore(i, fi, types)
+    if not pending and warn is not None:
+        return i, fi, fi, [], warn
+    return i, fi, shared.share(i, fi), pending, None
+
+
+def _finish(pl: Plottish, dataset: DataSet, process: bool) -> None:
+    """
+    Write the multi-page PDF and flush the cache once every figure is rendered. Executed by the helper thread.
+
+    Parameters:
+    - pl (Plottish): The Plottish instance of the dataset.
+    - dataset (DataSet): The dataset.
+    - process (bool): True if the figures were rendered by worker processes, so that the pages
+      of the multi-page PDF remain to be made.
+    """
+    try:
+        if process and FigType.PDF_PAGES in pl.types:
+            for i, fi in dataset.items():
+                fig, _ = pl.make_fig(fi)
+                pl.export(fig, i, [FigType.PDF_PAGES])
+    finally:
+        pl.close()
+        if pl.cache is not None:
+            pl.cache.flush()
@@ -0,0 +1,188 @@
+"""
+plotish.cache - On-disk cache of rendered figures keyed by their content.
+
+Re-running plotish on a dataset that barely changed re-renders every figure. The RenderCache
+remembers, for each output file, the hash of everything that determines its content (see
+Plottish.cache_key): when the hash matches and the file is still intact, the figure is not
+rendered again. Only the hashes and the paths, sizes and modification times of the outputs are
+kept by default. With RenderCache(copies=True) (--cache-copies), a copy of each rendered file is
+also kept in the cache folder, so that a deleted or modified output is restored without
+rendering, at the cost of writing every output twice.
+
+The copies are limited to a total size; the least recently used ones are evicted first.
+
+Example Usage:
+```python
+from plotish import Plottish, FigType
+from plotish.cache import RenderCache
+
+cache = RenderCache(max_bytes=256 * 1024 * 1024, copies=True)
+Plottish("out", [FigType.PNG], dataset, cache=cache).plot()
+```
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Optional
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_folder() -> str:
+    """
+    Return the default cache folder, '$XDG_CACHE_HOME/plotish' or '~/.cache/plotish'.
+
+    Returns:
+    str: The path of the folder.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "plotish")
+
+
+class RenderCache:
+    """
+    On-disk cache of rendered figures keyed by their content hash.
+
+    Attributes:
+    - folder (str): The cache folder, holding 'index.json' and the file copies in 'blobs'.
+    - max_bytes (int): The maximal total size of the file copies.
+    - copies (bool): True if a copy of each output is kept to restore it.
+    - _entries (Dict[str, Dict]): For each key, the size of its copy (0 without copy), its last use and the
+      warning of the figure.
+    - _outputs (Dict[str, Dict]): For each output file, the key it was rendered from, its size and modification time.
+    """
+
+    def __init__(self, folder: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES, copies: bool = False) -> None:
+        """
+        Initialize a RenderCache, loading its index if the folder already holds one.
+
+        Parameters:
+        - folder (str): The cache folder. Defaults to default_folder().
+        - max_bytes (int): The maximal total size of the file copies. Defaults to 512 MiB.
+        - copies (bool): If True, keep a copy of each output to restore it when it is deleted or
+          modified. Defaults to False, such outputs are rendered again.
+        """
+        self.folder = folder if folder is not None else default_folder()
+        self.max_bytes = max_bytes
+        self.copies = copies
+        self._lock = threading.Lock()
+        self._entries, self._outputs = self._load_index()
+
+    def restore(self, key: str, path: str) -> Optional[str]:
+        """
+        Make sure `path` holds the output rendered from `key`, without rendering.
+
+        Parameters:
+        - key (str): The cache key of the output.
+        - path (str): The path of the output file.
+
+        Returns:
+        Optional[str]: The warning of the figure if the output is up to date, None if it must be rendered.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not self._intact(key, path):
+                if not self.copies:
+                    return None
+                try:
+                    shutil.copyfile(self._blob(key), path)
+                except OSError:
+                    del self._entries[key]
+                    return None
+                self._record(key, path)
+            entry["used"] = time.time()
+            return entry["warning"]
+
+    def store(self, key: str, path: str, warning: str) -> None:
+        """
+        Remember a freshly rendered output, and keep a copy of it with `copies`.
+
+        Parameters:
+        - key (str): The cache key of the output.
+        - path (str): The path of the output file.
+        - warning (str): The warning generated while making the figure.
+        """
+        path = os.path.abspath(path)
+        size = 0
+        if self.copies:
+            blob = self._blob(key)
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob))
+            os.close(fd)
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, blob)
+            size = os.path.getsize(blob)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self.copies:
+                # A copy stored by an earlier run stays valid
+                size = entry["size"]
+            self._entries[key] = {"size": size, "used": time.time(), "warning": warning}
+            self._record(key, path)
+
+    def flush(self) -> None:
+        """
+        Evict the least recently used copies above the size limit and write the index.
+
+        Without copies, the keys of outputs that no longer exist are forgotten as well.
+        """
+        with self._lock:
+            self._outputs = {path: output for path, output in self._outputs.items() if os.path.exists(path)}
+            total = sum(entry["size"] for entry in self._entries.values())
+            used = {output["key"] for output in self._outputs.values()}
+            for key in sorted(self._entries, key=lambda k: self._entries[k]["used"]):
+                if total <= self.max_bytes and (self.copies or key in used):
+                    continue
+                size = self._entries.pop(key)["size"]
+                total -= size
+                if size:
+                    try:
+                        os.remove(self._blob(key))
+                    except FileNotFoundError:
+                        pass
+            os.makedirs(self.folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.folder)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"entries": self._entries, "outputs": self._outputs}, f)
+            os.replace(tmp, os.path.join(self.folder, "index.json"))
+
+    def _intact(self, key: str, path: str) -> bool:
+        """Tell whether the output file is the one rendered from `key` and was not modified since."""
+        output = self._outputs.get(path)
+        if output is None or output["key"] != key:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == output["size"] and stat.st_mtime_ns == output["mtime_ns"]
+
+    def _record(self, key: str, path: str) -> None:
+        """Remember that the output file holds the rendering of `key`."""
+        stat = os.stat(path)
+        self._outputs[path] = {"key": key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _blob(self, key: str) -> str:
+        """Return the path of the copy of the output rendered from `key`."""
+        return os.path.join(self.folder, "blobs", key[:2], key)
+
+    def _load_index(self):
+        """
+        Read the index of the cache folder.
+
+        Returns:
+        Tuple[Dict, Dict]: The entries and outputs, empty if there is no readable index.
+        """
+        try:
+            with open(os.path.join(self.folder, "index.json"), "r") as f:
+                index = json.load(f)
+            return index["entries"], index["outputs"]
+        except (OSError, ValueError, KeyError):
+            return {}, {}
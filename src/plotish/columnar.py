@@ -0,0 +1,436 @@
+"""
+plotish.columnar - Datasets stored in columnar files (Parquet, Arrow IPC, HDF5).
+
+A columnar dataset holds the line arrays in the columns of a file and a small metadata table
+describing the figures. The metadata is the document of a JSON dataset (name, date, description
+and the figures with their titles, labels and line styles) in which the "xdata" and "ydata" of
+each line reference a range of rows of a column instead of listing numbers:
+
+```json
+"lines": [{"xdata": {"column": "x", "start": 0, "count": 1000}, "ydata": {"column": "y", "start": 0, "count": 1000}}]
+```
+
+"start" and "count" select the rows, by default the whole column. write_columnar stores the
+lines one after the other in a column per axis and type: "x" and "y" for float64 data,
+"x.float32" and "y.float32" for float32 data, and so on.
+
+Formats:
+- Parquet (pyarrow): the metadata is stored as JSON in the "plotish" key of the schema metadata.
+- Arrow IPC / Feather v2 (pyarrow): same as Parquet. Uncompressed files are memory-mapped, so
+  the columns are used without any copy.
+- HDF5 (h5py): each column is a dataset of the file and the metadata is the "plotish" attribute
+  of the root group. Contiguous, uncompressed datasets are memory-mapped.
+
+Columns are read when a figure is built, and only the rows of that figure, so selecting a few
+figures of a large file reads only their arrays. In Parquet and Arrow IPC files, write_columnar
+writes each figure as its own row group or record batch, whose columns all have the same
+length: the columns of a figure holding fewer rows than the others are padded with NaN.
+
+Example Usage:
+```python
+from plotish import DataSet
+from plotish.columnar import write_columnar
+
+write_columnar("data.parquet", document)  # document: a JSON dataset as a dictionary
+ds = DataSet()
+ds.load_columnar("data.parquet")
+```
+"""
+
+import bisect
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy
+
+# Magic numbers of the supported formats
+_FORMATS = (
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "arrow"),
+    (b"\x89HDF\r\n\x1a\n", "hdf5"),
+)
+_EXTENSIONS = {
+    ".parquet": "parquet", ".pq": "parquet",
+    ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+    ".h5": "hdf5", ".hdf5": "hdf5", ".hdf": "hdf5",
+}
+METADATA_KEY = "plotish"
+
+
+def detect(filename: str) -> Optional[str]:
+    """
+    Detect the format of a columnar file from its first bytes.
+
+    Parameters:
+    - filename (str): The path of the file.
+
+    Returns:
+    Optional[str]: 'parquet', 'arrow', 'hdf5', or None if the file is not a columnar file.
+    """
+    with open(filename, "rb") as f:
+        head = f.read(8)
+    for magic, name in _FORMATS:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def is_column(value: Any) -> bool:
+    """
+    Tell whether a line data value references a column of a columnar file.
+
+    Parameters:
+    - value (Any): The "xdata" or "ydata" value of a line.
+
+    Returns:
+    bool: True if the value is a column reference.
+    """
+    return isinstance(value, dict) and "column" in value
+
+
+def columns(figure: Dict[str, Any]) -> Dict[str, Tuple[int, Optional[int]]]:
+    """
+    Return the rows of the columns referenced by the lines of a figure.
+
+    Parameters:
+    - figure (Dict[str, Any]): The raw data dictionary of the figure.
+
+    Returns:
+    Dict[str, Tuple[int, Optional[int]]]: The first row and the end row (None for the end of
+    the column) spanning the rows of the lines, by column name.
+    """
+    ranges = {}
+    for line in figure.get("lines", []):
+        for key in ("xdata", "ydata"):
+            value = line.get(key)
+            if not is_column(value):
+                continue
+            start = int(value.get("start", 0))
+            stop = None if value.get("count") is None else start + int(value["count"])
+            if value["column"] in ranges:
+                first, end = ranges[value["column"]]
+                start = min(start, first)
+                stop = None if stop is None or end is None else max(stop, end)
+            ranges[value["column"]] = (start, stop)
+    return ranges
+
+
+def resolve(figure: Dict[str, Any], arrays: Dict[str, numpy.ndarray],
+            ranges: Optional[Dict[str, Tuple[int, Optional[int]]]] = None) -> Dict[str, Any]:
+    """
+    Replace the column references of a figure by the arrays of the columns.
+
+    Parameters:
+    - figure (Dict[str, Any]): The raw data dictionary of the figure, left unchanged.
+    - arrays (Dict[str, numpy.ndarray]): The rows read from each column, by name.
+    - ranges (Dict[str, Tuple[int, Optional[int]]]): The rows read, see columns(). Defaults to
+      whole columns.
+
+    Returns:
+    Dict[str, Any]: A copy of the figure whose lines hold arrays.
+    """
+    lines = []
+    for line in figure.get("lines", []):
+        line = dict(line)
+        for key in ("xdata", "ydata"):
+            value = line.get(key)
+            if is_column(value):
+                first = ranges[value["column"]][0] if ranges else 0
+                start = int(value.get("start", 0)) - first
+                count = value.get("count")
+                stop = None if count is None else start + int(count)
+                line[key] = arrays[value["column"]][start:stop]
+        lines.append(line)
+    return {**figure, "lines": lines}
+
+
+class ColumnarFile:
+    """
+    Read access to the metadata and the columns of a columnar dataset file.
+
+    Attributes:
+    - filename (str): The path of the file.
+    - format (str): 'parquet', 'arrow' or 'hdf5'.
+    - _handle (Any): The open pyarrow.parquet.ParquetFile, Arrow IPC file reader or h5py.File.
+    - _mmap (Optional[pyarrow.MemoryMappedFile]): The memory map read by the Arrow IPC reader, None
+      for the other formats.
+    - _offsets (List[int]): The first row of each row group or record batch, then the row count
+      (Parquet and Arrow IPC).
+    """
+
+    def __init__(self, filename: str, format: str = None) -> None:
+        """
+        Open a columnar file.
+
+        Parameters:
+        - filename (str): The path of the file.
+        - format (str): 'parquet', 'arrow' or 'hdf5'. Defaults to the format detected from the content.
+
+        Raises:
+        - Exception: If the format is unknown or the package reading it is not installed.
+        """
+        self.filename = filename
+        self.format = format or detect(filename)
+        self._mmap = None
+        if self.format in ("parquet", "arrow"):
+            try:
+                import pyarrow
+            except ImportError:
+                raise Exception(f"Reading {filename} requires the pyarrow package")
+            if self.format == "parquet":
+                import pyarrow.parquet
+                self._handle = pyarrow.parquet.ParquetFile(filename, memory_map=True)
+                sizes = [self._handle.metadata.row_group(i).num_rows for i in range(self._handle.num_row_groups)]
+            else:
+                self._mmap = pyarrow.memory_map(filename)
+                self._handle = pyarrow.ipc.open_file(self._mmap)
+                sizes = [self._handle.get_batch(i).num_rows for i in range(self._handle.num_record_batches)]
+            self._offsets = numpy.cumsum([0] + sizes).tolist()
+        elif self.format == "hdf5":
+            try:
+                import h5py
+            except ImportError:
+                raise Exception(f"Reading {filename} requires the h5py package")
+            self._handle = h5py.File(filename, "r")
+        else:
+            raise Exception(f"{filename} is not a Parquet, Arrow IPC or HDF5 file")
+
+    def metadata(self) -> Dict[str, Any]:
+        """
+        Return the metadata table of the file.
+
+        Returns:
+        Dict[str, Any]: The dataset document, whose lines reference columns.
+        """
+        if self.format == "hdf5":
+            text = self._handle.attrs.get(METADATA_KEY)
+        else:
+            schema = self._handle.schema_arrow if self.format == "parquet" else self._handle.schema
+            text = (schema.metadata or {}).get(METADATA_KEY.encode())
+        if text is None:
+            raise Exception(f"{self.filename} has no plotish metadata")
+        return json.loads(text)
+
+    def __enter__(self) -> "ColumnarFile":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def read(self, columns: Union[List[str], Dict[str, Tuple[int, Optional[int]]]]) -> Dict[str, numpy.ndarray]:
+        """
+        Read rows of columns as NumPy arrays, without copy where the format allows it.
+
+        Only the row groups (Parquet) or record batches (Arrow IPC) holding the rows are read.
+
+        Parameters:
+        - columns (Union[List[str], Dict[str, Tuple[int, Optional[int]]]]): The column names, to
+          read whole columns, or the first and end rows (None for the end) to read by column
+          name, see columns().
+
+        Returns:
+        Dict[str, numpy.ndarray]: The rows read, by column name.
+        """
+        if not isinstance(columns, dict):
+            columns = {name: (0, None) for name in columns}
+        if not columns:
+            return {}
+        if self.format == "hdf5":
+            return {name: self._hdf5_array(name)[start:stop] for name, (start, stop) in columns.items()}
+        total = self._offsets[-1]
+        start = min(start for start, _ in columns.values())
+        stop = max(total if stop is None else stop for _, stop in columns.values())
+        # The row groups or record batches overlapping the rows
+        first = max(0, bisect.bisect_right(self._offsets, start) - 1)
+        chunks = [i for i in range(first, len(self._offsets) - 1) if self._offsets[i] < stop]
+        names = list(columns)
+        if not chunks:
+            schema = self._handle.schema_arrow if self.format == "parquet" else self._handle.schema
+            return {name: numpy.empty(0, dtype=schema.field(name).type.to_pandas_dtype()) for name in names}
+        if self.format == "parquet":
+            table = self._handle.read_row_groups(chunks, columns=names)
+        else:
+            import pyarrow
+            table = pyarrow.Table.from_batches([self._handle.get_batch(i).select(names) for i in chunks])
+        base = self._offsets[chunks[0]]
+        arrays = {}
+        for name, (start, stop) in columns.items():
+            column = table.column(name)
+            column = column.chunk(0) if column.num_chunks == 1 else column
+            stop = table.num_rows + base if stop is None else min(stop, table.num_rows + base)
+            arrays[name] = column.slice(start - base, max(0, stop - start)).to_numpy()
+        return arrays
+
+    def _hdf5_array(self, name: str) -> Any:
+        """
+        Open an HDF5 dataset, memory-mapped when it is stored contiguously and uncompressed.
+
+        Parameters:
+        - name (str): The path of the dataset in the file.
+
+        Returns:
+        Any: The memory-mapped array, or the h5py dataset, read when sliced.
+        """
+        dataset = self._handle[name]
+        offset = dataset.id.get_offset()
+        if dataset.chunks is None and dataset.compression is None and offset is not None:
+            return numpy.memmap(self.filename, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape)
+        return dataset
+
+    def close(self) -> None:
+        """
+        Close the file. Arrays already read stay valid.
+        """
+        if self.format in ("hdf5", "parquet"):
+            self._handle.close()
+        if self._mmap is not None:
+            self._mmap.close()
+
+
+def write_columnar(filename: str, document: Dict[str, Any], format: str = None,
+                   root: str = None, compression: Optional[str] = None) -> None:
+    """
+    Write a dataset to a columnar file.
+
+    The lines are stored one after the other in a column per axis and type, see the module
+    documentation; each line references its rows.
+
+    Parameters:
+    - filename (str): The path of the file to write.
+    - document (Dict[str, Any]): The dataset, as the content of a JSON dataset file. Line data
+      can be lists, arrays or binary file references.
+    - format (str): 'parquet', 'arrow' or 'hdf5'. Defaults to the format of the file extension.
+    - root (str): The folder binary file references are resolved against.
+    - compression (str): The compression of the columns, e.g. 'zstd' for Parquet or 'gzip' for
+      HDF5. Defaults to none, which allows memory-mapping Arrow and HDF5 files.
+
+    Raises:
+    - Exception: If the format is unknown or the package writing it is not installed.
+    """
+    from .interfaces.arrays import is_reference, load_array
+
+    format = format or _EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+    if format not in ("hdf5", "parquet", "arrow"):
+        raise Exception(f"Unknown columnar format for {filename}, expected one of parquet, arrow, hdf5")
+    metadata = {key: value for key, value in document.items() if key != "data"}
+    metadata["data"] = []
+    # The arrays of each figure, by column, and their row count
+    figures = []
+    for figure in document.get("data", []):
+        parts = {}
+        rows = {}
+        lines = []
+        for line in figure.get("lines", []):
+            line = dict(line)
+            for key in ("xdata", "ydata"):
+                value = line.get(key)
+                if value is None:
+                    continue
+                if is_reference(value):
+                    value = load_array(value, root)
+                array = numpy.asarray(value, dtype=None if isinstance(value, numpy.ndarray) else numpy.float64)
+                name = key[0] if array.dtype == numpy.float64 else f"{key[0]}.{array.dtype.name}"
+                line[key] = {"column": name, "start": rows.get(name, 0), "count": len(array)}
+                parts.setdefault(name, []).append(array)
+                rows[name] = rows.get(name, 0) + len(array)
+            lines.append(line)
+        metadata["data"].append({**figure, "lines": lines})
+        figures.append({name: numpy.concatenate(arrays) for name, arrays in parts.items()})
+
+    if format == "hdf5":
+        _write_hdf5(filename, metadata, figures, compression)
+    else:
+        _write_arrow(filename, format, metadata, figures, compression)
+
+
+def _shift(figure: Dict[str, Any], offsets: Dict[str, int]) -> None:
+    """
+    Move the row references of the lines of a figure from the figure to the file.
+
+    Parameters:
+    - figure (Dict[str, Any]): The metadata of the figure, updated.
+    - offsets (Dict[str, int]): The first row of the figure, by column name.
+    """
+    for line in figure["lines"]:
+        for key in ("xdata", "ydata"):
+            if is_column(line.get(key)):
+                line[key]["start"] += offsets[line[key]["column"]]
+
+
+def _write_arrow(filename: str, format: str, metadata: Dict[str, Any], figures: List[Dict[str, numpy.ndarray]],
+                 compression: Optional[str]) -> None:
+    """
+    Write a Parquet or Arrow IPC file, one row group or record batch per figure.
+
+    Parameters:
+    - filename (str): The path of the file to write.
+    - format (str): 'parquet' or 'arrow'.
+    - metadata (Dict[str, Any]): The dataset document referencing the rows of each figure, updated.
+    - figures (List[Dict[str, numpy.ndarray]]): The columns of each figure, by name.
+    - compression (str): The compression codec, or None.
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        raise Exception(f"Writing {filename} requires the pyarrow package")
+    dtypes = {}
+    for arrays in figures:
+        for name, array in arrays.items():
+            dtypes.setdefault(name, array.dtype)
+    names = sorted(dtypes)
+    row = 0
+    for figure, arrays in zip(metadata["data"], figures):
+        _shift(figure, {name: row for name in names})
+        row += max((len(array) for array in arrays.values()), default=0)
+    schema = pyarrow.schema([(name, pyarrow.from_numpy_dtype(dtypes[name])) for name in names],
+                            metadata={METADATA_KEY: json.dumps(metadata)})
+
+    if format == "parquet":
+        import pyarrow.parquet
+        writer = pyarrow.parquet.ParquetWriter(filename, schema, compression=compression or "none")
+    else:
+        writer = pyarrow.ipc.new_file(filename, schema, options=pyarrow.ipc.IpcWriteOptions(compression=compression))
+    with writer:
+        for arrays in figures:
+            rows = max((len(array) for array in arrays.values()), default=0)
+            if not rows:
+                continue
+            columns = []
+            for name in names:
+                array = arrays.get(name, numpy.empty(0, dtype=dtypes[name]))
+                if len(array) < rows:
+                    fill = numpy.nan if array.dtype.kind in "fc" else 0
+                    array = numpy.concatenate((array, numpy.full(rows - len(array), fill, dtype=array.dtype)))
+                columns.append(pyarrow.array(array))
+            batch = pyarrow.record_batch(columns, schema=schema)
+            if format == "parquet":
+                writer.write_table(pyarrow.Table.from_batches([batch]), row_group_size=rows)
+            else:
+                writer.write_batch(batch)
+
+
+def _write_hdf5(filename: str, metadata: Dict[str, Any], figures: List[Dict[str, numpy.ndarray]],
+                compression: Optional[str]) -> None:
+    """
+    Write an HDF5 file with one dataset per column.
+
+    Parameters:
+    - filename (str): The path of the file to write.
+    - metadata (Dict[str, Any]): The dataset document referencing the rows of each figure, updated.
+    - figures (List[Dict[str, numpy.ndarray]]): The columns of each figure, by name.
+    - compression (str): The HDF5 compression filter, or None.
+    """
+    try:
+        import h5py
+    except ImportError:
+        raise Exception(f"Writing {filename} requires the h5py package")
+    columns = {}
+    for figure, arrays in zip(metadata["data"], figures):
+        _shift(figure, {name: sum(len(part) for part in columns.get(name, [])) for name in arrays})
+        for name, array in arrays.items():
+            columns.setdefault(name, []).append(array)
+    with h5py.File(filename, "w") as f:
+        f.attrs[METADATA_KEY] = json.dumps(metadata)
+        for name, parts in columns.items():
+            f.create_dataset(name, data=numpy.concatenate(parts), compression=compression)
@@ -0,0 +1,97 @@
+"""
+plotish.compression - Transparent decompression of dataset files.
+
+Dataset files can be compressed with gzip, bz2, xz or zstd. The format is detected from the
+first bytes of the file, so the extension does not matter, and the content is decompressed
+while it is read: nothing is written to disk, and with the streaming reader (DataSet.load_file
+with stream=True) only the figure being parsed is held in memory.
+
+zstd requires the `zstandard` package, or Python 3.14 and its compression.zstd module.
+
+Example Usage:
+```python
+from plotish.compression import open_input
+
+with open_input("data.json.gz") as f:
+    print(f.read(100))
+```
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+from typing import Optional, TextIO
+
+# Magic numbers of the supported formats
+_FORMATS = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+
+
+def detect(filename: str) -> Optional[str]:
+    """
+    Detect the compression of a file from its first bytes.
+
+    Parameters:
+    - filename (str): The path of the file.
+
+    Returns:
+    Optional[str]: 'gzip', 'bz2', 'xz', 'zstd', or None for an uncompressed file.
+    """
+    with open(filename, "rb") as f:
+        head = f.read(6)
+    for magic, name in _FORMATS:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_input(filename: str) -> TextIO:
+    """
+    Open a dataset file for reading as UTF-8 text, decompressing it on the fly if needed.
+
+    Parameters:
+    - filename (str): The path of the file.
+
+    Returns:
+    TextIO: The text stream of the decompressed content.
+
+    Raises:
+    - Exception: If the file is compressed with zstd and no zstd module is installed.
+    """
+    compression = detect(filename)
+    if compression is None:
+        return open(filename, "r", encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(filename, "rt", encoding="utf-8")
+    if compression == "bz2":
+        return bz2.open(filename, "rt", encoding="utf-8")
+    if compression == "xz":
+        return lzma.open(filename, "rt", encoding="utf-8")
+    return io.TextIOWrapper(_open_zstd(filename), encoding="utf-8")
+
+
+def _open_zstd(filename: str) -> io.BufferedIOBase:
+    """
+    Open a zstd compressed file as a binary stream of its decompressed content.
+
+    Parameters:
+    - filename (str): The path of the file.
+
+    Returns:
+    io.BufferedIOBase: The decompressed stream.
+    """
+    try:
+        from compression import zstd
+        return zstd.open(filename, "rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception(f"{filename} is compressed with zstd, which requires the zstandard package")
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(filename, "rb"), closefd=True))
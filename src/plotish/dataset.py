@@ -30,12 +30,144 @@ Date:
 02/01/2024
 """
 
-import pandas 
-from typing import Tuple,List
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any,Dict,Iterator,Tuple,List,Union
 import numpy 
+from . import columnar, decoders
+from .columnar import ColumnarFile
+from .compression import open_input
 from .interfaces.figureinterface import FigureInterface
 from .interfaces.utils import check_in_dict
+from .profiling import Listener, measure
+from .streaming import FigureStream, build_figure, read_metadata
 import datetime
+import os
+import threading
+
+
+class LazyFigures(Sequence):
+    """
+    Sequence of FigureInterface built on access from the raw figure dictionaries.
+
+    Built figures are kept in a small least-recently-used cache, so that iterating over the
+    dataset or picking a few figures only pays the conversion cost of the figures used.
+
+    Attributes:
+    - _raw (List[Dict]): The raw data dictionaries of the figures.
+    - _root (str): The folder binary line data files are resolved against.
+    - _cache (OrderedDict): The built figures, by index, most recently used last.
+    - _cache_size (int): The maximal number of figures kept in the cache.
+    - _listeners (List[Listener]): The listeners notified of each figure built.
+    """
+
+    def __init__(self, raw: List[Dict], root: str = None, cache_size: int = 8,
+                 listeners: List[Listener] = None) -> None:
+        """
+        Initialize a LazyFigures sequence.
+
+        Parameters:
+        - raw (List[Dict]): The raw data dictionaries of the figures.
+        - root (str): The folder binary line data files are resolved against.
+        - cache_size (int): The maximal number of built figures kept in memory. Defaults to 8.
+        - listeners (List[Listener]): The listeners notified of each figure built. Defaults to none.
+        """
+        self._raw = raw
+        self._root = root
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._listeners = listeners if listeners is not None else []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[FigureInterface, List[FigureInterface]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("figure index out of range")
+        with self._lock:
+            if index in self._cache:
+                self._cache.move_to_end(index)
+                return self._cache[index]
+        fig = self._build(index)
+        with self._lock:
+            self._cache[index] = fig
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return fig
+
+    def title(self, index: int) -> str:
+        """
+        Return the title of a figure without building it.
+
+        Parameters:
+        - index (int): The index of the figure.
+
+        Returns:
+        str: The title of the figure.
+        """
+        return check_in_dict(self._raw[index], "title", "")
+
+    def _build(self, index: int) -> FigureInterface:
+        """
+        Build the FigureInterface of a figure.
+
+        Parameters:
+        - index (int): The index of the figure.
+
+        Returns:
+        FigureInterface: The figure.
+        """
+        return build_figure(self._raw[index], self._root, index, self._listeners)
+
+
+class ColumnarFigures(LazyFigures):
+    """
+    Sequence of FigureInterface built on access from the metadata and the columns of a columnar file.
+
+    Only the columns of a figure are read when it is built, see plotish.columnar.
+
+    Attributes:
+    - _source (ColumnarFile): The open columnar file.
+    """
+
+    def __init__(self, source: ColumnarFile, raw: List[Dict], root: str = None, cache_size: int = 8,
+                 listeners: List[Listener] = None) -> None:
+        """
+        Initialize a ColumnarFigures sequence.
+
+        Parameters:
+        - source (ColumnarFile): The open columnar file.
+        - raw (List[Dict]): The raw data dictionaries of the figures, whose lines reference columns.
+        - root (str): The folder binary line data files are resolved against.
+        - cache_size (int): The maximal number of built figures kept in memory. Defaults to 8.
+        - listeners (List[Listener]): The listeners notified of each figure read and built. Defaults to none.
+        """
+        super().__init__(raw, root, cache_size, listeners)
+        self._source = source
+        self._read_lock = threading.Lock()
+
+    def _build(self, index: int) -> FigureInterface:
+        raw = self._raw[index]
+        with measure(self._listeners, "read", index, detail=self._source.filename) as event:
+            with self._read_lock:
+                ranges = columnar.columns(raw)
+                arrays = self._source.read(ranges)
+            if event is not None:
+                event.bytes = sum(array.nbytes for array in arrays.values())
+        return build_figure(columnar.resolve(raw, arrays, ranges), self._root, index, self._listeners)
+
+    def close(self) -> None:
+        """
+        Close the columnar file. The figures already built stay valid.
+        """
+        with self._read_lock:
+            self._source.close()
+
 
 class DataSet:
     """
@@ -46,6 +178,8 @@ class DataSet:
     - _description (str): The description of the dataset.
     - _data (List[FigureInterface]): List of FigureInterface instances representing plot data.
     - _name (str): The name associated with the dataset.
+    - _selection (Tuple[set, set]): The indices and titles of the selected figures, or None for all figures.
+    - _listeners (List[Listener]): The listeners notified of the stages of the loading, see plotish.profiling.
 
     Methods:
     - load(description: str, date: str, name: str, data: List[FigureInterface]) -> None:
@@ -54,14 +188,38 @@ class DataSet:
     - load_json(filename: str) -> None:
         Load the dataset from a JSON file.
 
+    - load_file(filename: str, stream: bool = False, lazy: bool = False) -> None:
+        Load the dataset from a JSON file, optionally streaming the figures or building them on access.
+
+    - load_document(document: Dict[str, Any], root: str = None, lazy: bool = False) -> None:
+        Load the dataset from an already decoded JSON document.
+
+    - load_columnar(filename: str, format: str = None) -> None:
+        Load the dataset from a Parquet, Arrow IPC or HDF5 file, reading the columns of each figure on access.
+
+    - add_listener(listener: Listener) -> None:
+        Register a callable receiving the timing events of the loading.
+
+    - select(keys: List[Union[int, str]]) -> None:
+        Restrict the figures to plot to the given indices or titles.
+
+    - selected(index: int, title: str) -> bool:
+        Tell whether a figure is part of the selection.
+
+    - close() -> None:
+        Close the file the figures are read from, if any.
+
+    - items() -> Iterator[Tuple[int, FigureInterface]]:
+        Iterate over the selected figures with their index in the dataset.
+
     - getMetaData() -> Tuple[str, str]:
         Extract and return metadata (date and description) from the raw data.
 
     - getData() -> Tuple[numpy.ndarray, int]:
         Extract and return plot data from the raw data.
 
-    - _openfile(filename: str) -> pandas.DataFrame:
-        Open and read a JSON file into a pandas DataFrame.
+    - _openfile(filename: str, decoder: str = None) -> Dict[str, Any]:
+        Open and read a JSON file into a dictionary.
 
     Properties:
     - date (str): Read-only property returning the dataset's date.
@@ -94,7 +252,19 @@ class DataSet:
         """
         Initialize an empty DataSet.
         """
-        pass
+        self._selection = None
+        self._listeners = []
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        Register a callable receiving the timing events of the loading ('read' and 'build' stages).
+
+        Figures built on access (lazy or streamed datasets) are reported when they are built.
+
+        Parameters:
+        - listener (Listener): The callable, receiving a plotish.profiling.Event.
+        """
+        self._listeners.append(listener)
 
     def load(self, description: str, date: str, name: str, data: List[FigureInterface]) -> None:
         """
@@ -111,17 +281,80 @@ class DataSet:
         self._description = description
         self._data = data
 
-    def load_file(self, filename: str) -> None:
+    def load_file(self, filename: str, stream: bool = False, lazy: bool = False, decoder: str = None) -> None:
         """
         Load the dataset from a file.
 
         Parameters:
-        - filename (str): The path to the JSON file.
+        - filename (str): The path to the JSON file. gzip, bz2, xz and zstd compressed files are
+          detected from their first bytes and decompressed while they are read.
+        - stream (bool): If True, only the metadata is read now and `data` becomes a FigureStream
+          that parses one figure at a time when iterated, so memory is bounded by the largest figure.
+        - lazy (bool): If True, `data` is a LazyFigures sequence building each FigureInterface
+          when it is indexed or iterated, instead of converting every figure now.
+        - decoder (str): The JSON decoder, one of plotish.decoders.DECODERS. Defaults to 'auto',
+          the fastest installed one. Not used with `stream`.
+        """
+        if stream:
+            self._load_stream(filename)
+            return
+        with measure(self._listeners, "read", bytes=os.path.getsize(filename), detail=filename):
+            document = DataSet._openfile(filename, decoder)
+        self.load_document(document, os.path.dirname(os.path.abspath(filename)), lazy)
+
+    def load_document(self, document: Dict[str, Any], root: str = None, lazy: bool = False) -> None:
         """
-        self._raw_data = DataSet._openfile(filename)
+        Load the dataset from the decoded content of a JSON dataset file.
+
+        Parameters:
+        - document (Dict[str, Any]): The dataset, with the keys of a JSON dataset file.
+        - root (str): The folder binary line data files are resolved against. Defaults to the working directory.
+        - lazy (bool): If True, `data` is a LazyFigures sequence building each FigureInterface on access.
+        """
+        self._root = root
+        self._raw_data = document
         self._date, self._description = self._getMetaData()
-        self._data, self._n = self._getData()
-        self._name = check_in_dict(self._raw_data, "name", "figure")[0]
+        if lazy:
+            self._data, self._n = self._getLazyData()
+        else:
+            self._data, self._n = self._getData()
+        self._name = check_in_dict(self._raw_data, "name", "figure")
+
+    def load_columnar(self, filename: str, format: str = None) -> None:
+        """
+        Load the dataset from a columnar file (Parquet, Arrow IPC or HDF5), see plotish.columnar.
+
+        Only the metadata is read now: `data` is a ColumnarFigures sequence reading the columns
+        of a figure when it is indexed or iterated, so the figures left out of the selection
+        are never read.
+
+        Parameters:
+        - filename (str): The path to the columnar file.
+        - format (str): 'parquet', 'arrow' or 'hdf5'. Defaults to the format detected from the content.
+        """
+        self._root = os.path.dirname(os.path.abspath(filename))
+        with measure(self._listeners, "read", detail=filename):
+            source = ColumnarFile(filename, format)
+            self._raw_data = source.metadata()
+        self._date, self._description = self._getMetaData()
+        raw = list(self._raw_data["data"]) if "data" in self._raw_data else []
+        self._data, self._n = ColumnarFigures(source, raw, self._root, listeners=self._listeners), len(raw)
+        self._name = check_in_dict(self._raw_data, "name", "figure")
+
+    def _load_stream(self, filename: str) -> None:
+        """
+        Read the metadata of a file and set up incremental loading of its figures.
+
+        Parameters:
+        - filename (str): The path to the JSON file.
+        """
+        with measure(self._listeners, "read", bytes=os.path.getsize(filename), detail=filename):
+            with open_input(filename) as f:
+                metadata, self._n = read_metadata(f)
+        self._date = check_in_dict(metadata, "date", "01/01/1900")
+        self._description = check_in_dict(metadata, "description", "No description")
+        self._name = check_in_dict(metadata, "name", "figure")
+        self._data = FigureStream(filename, self._n, self._listeners)
 
     def _getMetaData(self) -> Tuple[str, str]:
         """
@@ -130,8 +363,8 @@ class DataSet:
         Returns:
         Tuple[str, str]: The date and description associated with the dataset.
         """
-        date = check_in_dict(self._raw_data, "date", ["01/01/1900"])[0]
-        description = check_in_dict(self._raw_data, "description", ["No description"])[0]
+        date = check_in_dict(self._raw_data, "date", "01/01/1900")
+        description = check_in_dict(self._raw_data, "description", "No description")
         return date, description
 
     def _getData(self) -> Tuple[numpy.ndarray, int]:
@@ -145,21 +378,99 @@ class DataSet:
             n = len(self._raw_data["data"])
             data = []
             for i, fig in enumerate(self._raw_data["data"]):
-                data.append(FigureInterface(fig))
+                data.append(build_figure(fig, self._root, i, self._listeners))
         else:
             n = 0
             data = numpy.empty((0))
         return numpy.array(data), n
 
+    def _getLazyData(self) -> Tuple[LazyFigures, int]:
+        """
+        Wrap the raw plot data into a sequence building the figures on access.
+
+        Returns:
+        Tuple[LazyFigures, int]: The plot data and the number of plots in the dataset.
+        """
+        raw = list(self._raw_data["data"]) if "data" in self._raw_data else []
+        return LazyFigures(raw, self._root, listeners=self._listeners), len(raw)
+
+    def select(self, keys: List[Union[int, str]]) -> None:
+        """
+        Restrict the figures to plot to the given indices or titles.
+
+        Parameters:
+        - keys (List[Union[int, str]]): Figure indices (integers or digit strings) or titles.
+          An empty list or None selects every figure.
+        """
+        if not keys:
+            self._selection = None
+            return
+        indices = set()
+        titles = set()
+        for key in keys:
+            if isinstance(key, int) or key.isdigit():
+                indices.add(int(key))
+            else:
+                titles.add(key)
+        self._selection = (indices, titles)
+
+    def selected(self, index: int, title: str) -> bool:
+        """
+        Tell whether a figure is part of the selection.
+
+        Parameters:
+        - index (int): The index of the figure in the dataset.
+        - title (str): The title of the figure.
+
+        Returns:
+        bool: True if the figure is selected.
+        """
+        if self._selection is None:
+            return True
+        indices, titles = self._selection
+        return index in indices or title in titles
+
+    def close(self) -> None:
+        """
+        Close the file the figures are read from, for datasets loaded with load_columnar.
+        """
+        if isinstance(self._data, ColumnarFigures):
+            self._data.close()
+
+    def items(self) -> Iterator[Tuple[int, FigureInterface]]:
+        """
+        Iterate over the selected figures with their index in the dataset.
+
+        The index is the position of the figure in the whole dataset, so that output file
+        names do not depend on the selection.
+
+        Returns:
+        Iterator[Tuple[int, FigureInterface]]: The index and the figure.
+        """
+        if self._selection is None:
+            yield from enumerate(self._data)
+            return
+        if isinstance(self._data, LazyFigures):
+            for i in range(len(self._data)):
+                if self.selected(i, self._data.title(i)):
+                    yield i, self._data[i]
+            return
+        for i, fig in enumerate(self._data):
+            if self.selected(i, fig.title):
+                yield i, fig
+
     @staticmethod
-    def _openfile(filename: str) -> pandas.DataFrame:
+    def _openfile(filename: str, decoder: str = None) -> Dict[str, Any]:
         """
-        Open and read a JSON file into a pandas DataFrame.
+        Open and read a JSON file into a dictionary.
+
+        Line data arrays are decoded straight into NumPy arrays, see plotish.decoders.
 
         Parameters:
         - filename (str): The path to the JSON file.
+        - decoder (str): The JSON decoder, one of plotish.decoders.DECODERS. Defaults to 'auto'.
 
         Returns:
-        pandas.DataFrame: The content of the JSON file as a pandas DataFrame.
+        Dict[str, Any]: The content of the JSON file.
         """
-        return pandas.read_json(filename)
+        return decoders.decode_file(filename, decoder)
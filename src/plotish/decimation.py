@@ -0,0 +1,174 @@
+"""
+plotish.decimation - Shape-preserving downsampling of large lines before plotting.
+
+A line with millions of points is drawn on a few thousand pixel columns, so most of the
+points land on the same pixel. This module reduces lines to a target number of points
+with vectorized NumPy methods that keep the visual shape of the data:
+
+- minmax: keep the minimum and the maximum of each bucket of consecutive points. Every peak
+  is preserved, which makes it the default method.
+- lttb: Largest-Triangle-Three-Buckets, keep the point of each bucket forming the largest
+  triangle with its neighbours. Smoother result, but isolated peaks may be dropped.
+
+In the JSON files, the `downsample` key can be set on a figure (default for its lines) or on
+a line, with one of the following values:
+- "minmax" or "lttb": the method, with a target point count derived from the figure width.
+- {"method": "minmax", "points": 5000}: the method and an explicit target point count.
+- true: same as "minmax".
+- false or "none": disable the downsampling.
+
+Example Usage:
+```python
+from plotish.decimation import decimate, resolve
+
+method, points = resolve("minmax", 4000)
+x_small, y_small = decimate(x, y, method, points)
+```
+"""
+
+from typing import Any, List, Optional, Tuple
+
+import numpy
+
+METHODS = ("minmax", "lttb")
+
+
+def resolve(option: Any, default_points: int) -> Optional[Tuple[str, int]]:
+    """
+    Interpret a `downsample` option from the JSON file.
+
+    Parameters:
+    - option (Any): The option value, see the module documentation.
+    - default_points (int): The target point count used when the option does not give one.
+
+    Returns:
+    Optional[Tuple[str, int]]: The method and target point count, or None if disabled.
+
+    Raises:
+    - Exception: If the method is unknown.
+    """
+    if option is None or option is False or option in ("none", "None"):
+        return None
+    if option is True:
+        method, points = "minmax", default_points
+    elif isinstance(option, dict):
+        method = option.get("method", "minmax")
+        points = int(option.get("points", default_points))
+    else:
+        method, points = option, default_points
+    if method not in METHODS:
+        raise Exception(f"Unknown downsampling method: {method}")
+    return method, points
+
+
+def decimate(x: numpy.ndarray, y: numpy.ndarray, method: str, points: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Reduce a line to about `points` points.
+
+    Lines that are already small enough, or whose x data is not sorted (buckets of consecutive
+    points would not match pixel columns), are returned unchanged.
+
+    Parameters:
+    - x (numpy.ndarray): The x-axis data.
+    - y (numpy.ndarray): The y-axis data.
+    - method (str): The downsampling method, 'minmax' or 'lttb'.
+    - points (int): The target number of points.
+
+    Returns:
+    Tuple[numpy.ndarray, numpy.ndarray]: The downsampled x and y data.
+    """
+    if x.ndim != 1 or len(x) != len(y) or len(y) <= points or points < 4:
+        return x, y
+    if not numpy.all(x[1:] >= x[:-1]):
+        return x, y
+    if method == "lttb":
+        index = lttb_index(x, y, points)
+    else:
+        index = minmax_index(y, points)
+    return x[index], y[index]
+
+
+def minmax_index(y: numpy.ndarray, points: int) -> numpy.ndarray:
+    """
+    Return the sorted indices of the minimum and maximum of each bucket of points.
+
+    NaN values are left out of the extremes, and the first NaN of a bucket is kept as well so
+    that the line still breaks there.
+
+    Parameters:
+    - y (numpy.ndarray): The y-axis data.
+    - points (int): The target number of points, two per bucket.
+
+    Returns:
+    numpy.ndarray: The indices of the kept points, including the first and the last ones.
+    """
+    n = len(y)
+    buckets = max(1, points // 2 - 1)
+    size = n // buckets
+    m = size * buckets
+    offsets = numpy.arange(0, m, size)
+    parts = _extremes(y[:m].reshape(buckets, size), offsets) + [[0, n - 1]]
+    if m < n:
+        parts += _extremes(y[m:].reshape(1, n - m), numpy.array([m]))
+    return numpy.unique(numpy.concatenate(parts))
+
+
+def _extremes(blocks: numpy.ndarray, offsets: numpy.ndarray) -> List[numpy.ndarray]:
+    """
+    Return the indices of the minimum and the maximum of each bucket, ignoring NaN values.
+
+    Parameters:
+    - blocks (numpy.ndarray): The buckets, one per row.
+    - offsets (numpy.ndarray): The index of the first point of each bucket.
+
+    Returns:
+    List[numpy.ndarray]: The indices of the minima and of the maxima, and the index of the
+    first NaN of the buckets holding one.
+    """
+    nan = numpy.isnan(blocks)
+    if not nan.any():
+        return [blocks.argmin(axis=1) + offsets, blocks.argmax(axis=1) + offsets]
+    # Buckets of NaN only give the index of a NaN, which keeps the gap
+    low = numpy.where(nan, numpy.inf, blocks).argmin(axis=1)
+    high = numpy.where(nan, -numpy.inf, blocks).argmax(axis=1)
+    rows = nan.any(axis=1)
+    return [low + offsets, high + offsets, (nan.argmax(axis=1) + offsets)[rows]]
+
+
+def lttb_index(x: numpy.ndarray, y: numpy.ndarray, points: int) -> numpy.ndarray:
+    """
+    Return the indices selected by the Largest-Triangle-Three-Buckets algorithm.
+
+    The bucket averages are computed at once with NumPy, the selection itself runs once per
+    bucket on NumPy slices.
+
+    Parameters:
+    - x (numpy.ndarray): The x-axis data.
+    - y (numpy.ndarray): The y-axis data.
+    - points (int): The number of points to keep, including the first and the last ones.
+
+    Returns:
+    numpy.ndarray: The indices of the kept points.
+    """
+    n = len(y)
+    edges = numpy.linspace(1, n - 1, points - 1).astype(numpy.intp)
+    counts = numpy.diff(edges)
+    mean_x = numpy.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = numpy.add.reduceat(y[:n - 1], edges[:-1]) / counts
+
+    index = numpy.empty(points, dtype=numpy.intp)
+    index[0] = 0
+    index[-1] = n - 1
+    a = 0
+    last = points - 3
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b < last:
+            cx, cy = mean_x[b + 1], mean_y[b + 1]
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        ax, ay = x[a], y[a]
+        area = numpy.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(area.argmax())
+        index[b + 1] = a
+    return index
@@ -0,0 +1,216 @@
+"""
+plotish.decoders - Pluggable JSON decoders for dataset files.
+
+A dataset file is mostly made of the "xdata" and "ydata" number arrays of its lines. Decoding
+them with a JSON parser creates one Python float per number before LineInterface packs them
+into NumPy buffers. The array fast path avoids this: the number arrays of "xdata" and "ydata"
+are cut out of the text and parsed by NumPy directly into float64 arrays, and only the rest
+of the document, which is small, goes through the JSON parser.
+
+Decoders:
+- json: the standard library json module, with the array fast path.
+- orjson, ujson: the orjson or ujson package when installed, with the array fast path.
+- pandas: pandas.read_json, as in the earlier versions of plotish.
+- auto: the fastest installed JSON parser among orjson, ujson and json.
+
+Example Usage:
+```python
+from plotish.decoders import decode_file
+
+raw = decode_file("data.json", "auto")
+print(raw["data"][0]["lines"][0]["ydata"])  # numpy.ndarray
+```
+"""
+
+import io
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy
+
+from .compression import open_input
+
+DECODERS = ("auto", "json", "orjson", "ujson", "pandas")
+
+# Start of the xdata/ydata arrays of the lines
+_ARRAY = re.compile(r'"[xy]data"\s*:\s*\[')
+_PLACEHOLDER = "\u0000plotish:"
+_PLACEHOLDER_JSON = "\\u0000plotish:"
+# Empty fields, which numpy.fromstring reads as -1 instead of failing
+_EMPTY_FIELD = re.compile(r"^\s*,|,\s*,|,\s*$")
+# Below this length, handing the array to the JSON parser is cheaper than a NumPy call
+_MIN_ARRAY_CHARS = 1024
+
+
+def available() -> List[str]:
+    """
+    Return the decoders that can be used, depending on the installed packages.
+
+    Returns:
+    List[str]: The names of the decoders.
+    """
+    names = ["auto", "json"]
+    for module in ("orjson", "ujson", "pandas"):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        names.append(module)
+    return names
+
+
+def decode_file(filename: str, decoder: Optional[str] = None, arrays: bool = True) -> Dict[str, Any]:
+    """
+    Read and decode a dataset file.
+
+    Parameters:
+    - filename (str): The path to the JSON file.
+    - decoder (str): One of DECODERS. Defaults to 'auto'.
+    - arrays (bool): If True, use the array fast path. Defaults to True.
+
+    Returns:
+    Dict[str, Any]: The content of the file. With the array fast path, the long "xdata" and
+    "ydata" number arrays are numpy.ndarray of float64.
+
+    Raises:
+    - Exception: If the decoder is unknown or its package is not installed.
+    """
+    with open_input(filename) as f:
+        text = f.read()
+    return decode(text, decoder, arrays)
+
+
+def decode(text: str, decoder: Optional[str] = None, arrays: bool = True) -> Dict[str, Any]:
+    """
+    Decode the text of a dataset file.
+
+    Parameters:
+    - text (str): The JSON document.
+    - decoder (str): One of DECODERS. Defaults to 'auto'.
+    - arrays (bool): If True, use the array fast path. Defaults to True.
+
+    Returns:
+    Dict[str, Any]: The decoded document.
+    """
+    if decoder == "pandas":
+        return _pandas(text)
+    loads = _loads(decoder or "auto")
+    if not arrays:
+        return loads(text)
+    parsed = []
+    document = loads(_cut_arrays(text, parsed))
+    if parsed:
+        _restore_arrays(document, parsed)
+    return document
+
+
+def _loads(decoder: str) -> Callable[[str], Any]:
+    """
+    Return the loads function of a JSON package.
+
+    Parameters:
+    - decoder (str): 'auto', 'json', 'orjson' or 'ujson'.
+
+    Returns:
+    Callable[[str], Any]: The function decoding a JSON document.
+    """
+    if decoder == "json":
+        return json.loads
+    if decoder not in ("auto", "orjson", "ujson"):
+        raise Exception(f"Unknown JSON decoder: {decoder}, expected one of {', '.join(DECODERS)}")
+    for name in ("orjson", "ujson") if decoder == "auto" else (decoder,):
+        try:
+            return __import__(name).loads
+        except ImportError:
+            if decoder != "auto":
+                raise Exception(f"The {decoder} decoder requires the {decoder} package")
+    return json.loads
+
+
+def _cut_arrays(text: str, arrays: List[numpy.ndarray]) -> str:
+    """
+    Parse the xdata/ydata number arrays with NumPy and replace them by placeholder strings.
+
+    Arrays are located with a search for their key and the closing bracket, so the regular
+    expression engine never walks over the numbers. Arrays that are short, hold something
+    else than numbers, or whose key is quoted inside a string are left to the JSON parser.
+
+    Parameters:
+    - text (str): The JSON document.
+    - arrays (List[numpy.ndarray]): Receives the parsed arrays, a placeholder holds an index in this list.
+
+    Returns:
+    str: The JSON document with placeholders.
+    """
+    parts = []
+    copied = 0
+    pos = 0
+    while True:
+        match = _ARRAY.search(text, pos)
+        if match is None:
+            break
+        start = match.end()
+        end = text.find("]", start)
+        if end < 0:
+            break
+        pos = end
+        if end - start < _MIN_ARRAY_CHARS or text[match.start() - 1] == "\\":
+            continue
+        body = text[start:end]
+        try:
+            array = numpy.fromstring(body, sep=",")
+        except ValueError:
+            continue
+        if len(array) != body.count(",") + 1 or ((array == -1).any() and _EMPTY_FIELD.search(body)):
+            continue
+        parts.append(text[copied:start - 1])
+        parts.append(f'"{_PLACEHOLDER_JSON}{len(arrays)}"')
+        arrays.append(array)
+        copied = end + 1
+    if not arrays:
+        return text
+    parts.append(text[copied:])
+    return "".join(parts)
+
+
+def _restore_arrays(value: Any, arrays: List[numpy.ndarray]) -> None:
+    """
+    Replace the placeholders of a decoded document by their arrays, in place.
+
+    Parameters:
+    - value (Any): The decoded document or one of its containers.
+    - arrays (List[numpy.ndarray]): The arrays, by placeholder index.
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, str):
+                if item.startswith(_PLACEHOLDER):
+                    value[key] = arrays[int(item[len(_PLACEHOLDER):])]
+            elif isinstance(item, (dict, list)):
+                _restore_arrays(item, arrays)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, (dict, list)):
+                _restore_arrays(item, arrays)
+
+
+def _pandas(text: str) -> Dict[str, Any]:
+    """
+    Decode a dataset with pandas.read_json and convert the DataFrame back to a dictionary.
+
+    Parameters:
+    - text (str): The JSON document.
+
+    Returns:
+    Dict[str, Any]: The decoded document.
+    """
+    try:
+        import pandas
+    except ImportError:
+        raise Exception("The pandas decoder requires the pandas package")
+    frame = pandas.read_json(io.StringIO(text), convert_dates=False)
+    document = {column: frame[column].iloc[0] for column in frame.columns if column != "data"}
+    if "data" in frame.columns:
+        document["data"] = list(frame["data"])
+    return document
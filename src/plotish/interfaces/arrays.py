@@ -0,0 +1,103 @@
+"""
+arrays - Binary sidecar files holding line data.
+
+Instead of a list of numbers, the "xdata" or "ydata" of a line can reference an array stored
+in a binary file next to the JSON file. The array is memory-mapped, so nothing is parsed or
+copied when the dataset is loaded:
+
+- {"file": "y.npy"}: a NumPy .npy file.
+- {"file": "arrays.npz", "key": "y"}: a member of a NumPy .npz archive. Members of archives
+  written with numpy.savez are memory-mapped; compressed members (numpy.savez_compressed)
+  have to be read into memory.
+- {"file": "y.bin", "dtype": "<f8", "offset": 0, "count": 1000}: a raw buffer. "dtype" defaults
+  to little-endian float64, "offset" (in bytes) to 0 and "count" to the rest of the file.
+
+Relative paths are resolved against the folder of the JSON file.
+"""
+
+import os
+import struct
+import zipfile
+from typing import Any, Dict, Optional
+
+import numpy
+
+
+def is_reference(value: Any) -> bool:
+    """
+    Tell whether a line data value references a binary file.
+
+    Parameters:
+    - value (Any): The "xdata" or "ydata" value of a line.
+
+    Returns:
+    bool: True if the value is a sidecar file reference.
+    """
+    return isinstance(value, dict) and "file" in value
+
+
+def load_array(ref: Dict[str, Any], root: Optional[str] = None) -> numpy.ndarray:
+    """
+    Open the array referenced by a line, memory-mapped in read-only mode.
+
+    Parameters:
+    - ref (Dict[str, Any]): The reference, see the module documentation.
+    - root (str): The folder relative paths are resolved against. Defaults to the working directory.
+
+    Returns:
+    numpy.ndarray: The array.
+    """
+    path = ref["file"]
+    if root is not None and not os.path.isabs(path):
+        path = os.path.join(root, path)
+    if "key" in ref or path.endswith(".npz"):
+        return _load_npz_member(path, ref.get("key"))
+    if path.endswith(".npy"):
+        return numpy.load(path, mmap_mode="r")
+
+    dtype = numpy.dtype(ref.get("dtype", "<f8"))
+    count = ref.get("count")
+    return numpy.memmap(path, dtype=dtype, mode="r", offset=int(ref.get("offset", 0)),
+                        shape=None if count is None else (int(count),))
+
+
+def _load_npz_member(path: str, key: Optional[str]) -> numpy.ndarray:
+    """
+    Open a member of a .npz archive, memory-mapped if it is stored without compression.
+
+    Parameters:
+    - path (str): The path of the archive.
+    - key (str): The name of the member. Defaults to the only member of the archive.
+
+    Returns:
+    numpy.ndarray: The array.
+    """
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        if key is None:
+            if len(names) != 1:
+                raise Exception(f"A key is required to read {path}, members are {names}")
+            member = names[0]
+        else:
+            member = key if key.endswith(".npy") else f"{key}.npy"
+        info = archive.getinfo(member)
+
+    if info.compress_type != zipfile.ZIP_STORED:
+        with numpy.load(path) as archive:
+            return archive[member[:-4]]
+
+    with open(path, "rb") as f:
+        # Skip the zip local file header to reach the .npy content
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack("<HH", f.read(4))
+        f.seek(name_length + extra_length, os.SEEK_CUR)
+        version = numpy.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = numpy.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if dtype.hasobject:
+        raise Exception(f"Member {member} of {path} holds Python objects and can't be memory-mapped")
+    return numpy.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                        order="F" if fortran_order else "C")
@@ -20,8 +20,8 @@
     >>> len(figure_instance.lines)
     2
     >>> figure_instance.lines[0].data
-    array([[1, 2, 3],
-           [4, 5, 6]])
+    array([[1., 2., 3.],
+           [4., 5., 6.]])
     >>> figure_instance.lines[1].kwargs
     {'color': 'red', 'linestyle': '-', 'label': 'Line 2', 'marker': 'x'}
     
@@ -32,9 +32,9 @@
     02/01/2024
     """
 
-from typing import Dict,List,Union
-import pandas
-import numpy
+from typing import Any,Dict,List
+import hashlib
+import json
 from dataclasses import dataclass
 from .linesInterface import LineInterface
 from .utils import check_in_dict
@@ -49,34 +49,46 @@ class FigureInterface:
     FigureInterface - A class representing a figure for plotting.
 
     Attributes:
-    - _data (Dict): The raw data dictionary containing information about the figure.
+    - _data (Dict): The raw data dictionary containing information about the figure, without its lines.
     - _lines (List[LineInterface]): List of LineInterface instances representing lines to be plotted.
     - _title (str): The title of the figure. Defaults to an empty string if not specified.
     - _legend (str): The legend position for the figure. Defaults to None if not specified.
+    - _downsample (Any): The default downsampling option of the lines (see plotish.decimation). Defaults to None.
 
     Properties:
     - lines (List[LineInterface]): Read-only property returning the list of lines in the figure.
     - title (str): Read-only property returning the title of the figure.
     - legendPosition (str): Read-only property returning the legend position for the figure.
+    - downsample (Any): Read-only property returning the default downsampling option of the lines.
 
     Methods:
-    - __init__(self, data: Dict) -> None:
+    - __init__(self, data: Dict, dtype: Any = None, root: str = None) -> None:
         Initialize a FigureInterface instance with the provided data.
 
+    - fingerprint() -> str:
+        Return a stable hash of the figure content.
+
     """
 
-    def __init__(self, data: Dict) -> None:
+    def __init__(self, data: Dict, dtype: Any = None, root: str = None) -> None:
         """
         Initialize a FigureInterface instance with the provided data.
 
+        The raw line data is not kept once converted to LineInterface buffers.
+
         Parameters:
         - data (Dict): A dictionary containing information about the figure.
+        - dtype (Any): The floating point type of the line data, 'float64' or 'float32'. The "dtype"
+          key of the figure takes precedence. Defaults to float64.
+        - root (str): The folder binary line data files are resolved against. Defaults to the working directory.
         """
-        self._data = data
+        self._data = {key: value for key, value in data.items() if key != "lines"}
         self.xlabel, self.ylabel, self.zlabel = self._getLabels()
         self._legend = check_in_dict(data, "legend_position", None)
         self._title = check_in_dict(data, "title", "")
-        self._lines = self._getLines()
+        self._downsample = check_in_dict(data, "downsample", None)
+        self._lines = self._getLines(check_in_dict(data, "lines", []), check_in_dict(data, "dtype", dtype), root)
+        self._fingerprint = None
 
     @property
     def lines(self) -> List[LineInterface]:
@@ -93,17 +105,48 @@ class FigureInterface:
         """Read-only property returning the legend position for the figure."""
         return self._legend
 
-    def _getLines(self) -> List[LineInterface]:
+    @property
+    def downsample(self):
+        """Read-only property returning the default downsampling option of the lines."""
+        return self._downsample
+
+    def fingerprint(self) -> str:
+        """
+        Return a stable hash of the figure content, computed once.
+
+        The hash covers the figure options (title, labels, legend position, ...), the options of
+        each line (style, color, legend, ...) and the bytes of the line data, so two figures
+        with the same fingerprint are drawn identically.
+
+        Returns:
+        str: The hexadecimal SHA-256 digest.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(json.dumps(self._data, sort_keys=True, default=str).encode())
+            for line in self._lines:
+                digest.update(json.dumps(line._data, sort_keys=True, default=str).encode())
+                for values in (line._xdata, line._ydata):
+                    digest.update(f"{values.dtype.str}{values.shape}".encode())
+                    digest.update(memoryview(values).cast("B"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def _getLines(self, data: List[Dict], dtype: Any, root: str) -> List[LineInterface]:
         """
         Extract and return a list of LineInterface instances representing lines to be plotted.
 
+        Parameters:
+        - data (List[Dict]): The raw data of the lines.
+        - dtype (Any): The floating point type of the line data.
+        - root (str): The folder binary line data files are resolved against.
+
         Returns:
         List[LineInterface]: List of LineInterface instances.
         """
         lines = []
-        if "lines" in self._data:
-            for line in self._data["lines"]:
-                lines.append(LineInterface(line))
+        for line in data:
+            lines.append(LineInterface(line, dtype, root))
 
         if not lines:
             raise Exception("There must be at least one line to plot in the figure")
@@ -9,31 +9,44 @@ line_instance = LineInterface(line_data)
 # Access line properties
 print("Line data:", line_instance.data)
 print("Line properties:", line_instance.kwargs)
+
+# Line data can also be read from binary files (see plotish.interfaces.arrays)
+line_data = {"xdata": {"file": "x.npy"}, "ydata": {"file": "arrays.npz", "key": "y"}}
+line_instance = LineInterface(line_data, root="path/to/json/folder")
 """
 
-from typing import Dict
-from numpy import array, ndarray
+from typing import Any, Dict
+import numpy
+from numpy import ndarray
 from .utils import check_in_dict  
+from .arrays import is_reference, load_array
+
+DTYPES = {"float64": numpy.float64, "float32": numpy.float32}
 
 class LineInterface:
     """
     LineInterface - A class representing a line for plotting.
 
     Attributes:
-    - _data (Dict): The raw data dictionary containing information about the line.
+    - _data (Dict): The raw data dictionary containing information about the line, without the x and y data.
     - _color (str): The color of the line. Defaults to None if not specified.
     - _style (str): The line style. Defaults to None if not specified.
     - _label (str): The legend label for the line. Defaults to None if not specified.
     - _marker (str): The marker style for data points on the line. Defaults to None if not specified.
-    - _xdata (ndarray): The x-axis data for the line. Defaults to None if not specified.
-    - _ydata (ndarray): The y-axis data for the line. Must be provided, otherwise, an exception is raised.
+    - _xdata (ndarray): The x-axis data for the line, a contiguous float buffer. Defaults to the indices of the y data if not specified.
+    - _ydata (ndarray): The y-axis data for the line, a contiguous float buffer. Must be provided, otherwise, an exception is raised.
+    - _downsample (Any): The downsampling option of the line (see plotish.decimation). Defaults to None (inherit from the figure).
+    - _raster (Any): The rasterization option of the line (see plotish.raster). Defaults to None (automatic).
+    - _stacked (ndarray): The combined x and y data, computed on first access. Defaults to None.
 
     Properties:
     - data (ndarray): Read-only property returning the combined x and y data as a 2D array.
     - kwargs (Dict): Read-only property returning a dictionary with line properties suitable for Matplotlib.
+    - downsample (Any): Read-only property returning the downsampling option of the line.
+    - raster (Any): Read-only property returning the rasterization option of the line.
 
     Methods:
-    - __init__(self, data: Dict) -> None:
+    - __init__(self, data: Dict, dtype: Any = None, root: str = None) -> None:
         Initialize a LineInterface instance with the provided data.
 
     Example Usage:
@@ -47,29 +60,44 @@ class LineInterface:
     ```
     """
 
-    def __init__(self, data: Dict) -> None:
+    __slots__ = ("_data", "_color", "_style", "_label", "_marker", "_downsample", "_raster", "_xdata", "_ydata", "_stacked")
+
+    def __init__(self, data: Dict, dtype: Any = None, root: str = None) -> None:
         """
         Initialize a LineInterface instance with the provided data.
 
         Parameters:
         - data (Dict): A dictionary containing information about the line.
+        - dtype (Any): The floating point type of the data, 'float64' or 'float32'. The "dtype" key
+          of the line takes precedence. Defaults to float64 for lists, while floating point arrays,
+          such as memory-mapped binary files, keep their own type to avoid a copy.
+        - root (str): The folder binary file references are resolved against. Defaults to the working directory.
         """
-        self._data = data
+        self._data = {key: value for key, value in data.items() if key not in ("xdata", "ydata")}
         self._color = check_in_dict(data, "color", None)
         self._style = check_in_dict(data, "style", None)
         self._label = check_in_dict(data, "legend", None)
         self._marker = check_in_dict(data, "marker", None)
-        self._xdata = array(check_in_dict(data, "xdata", None))
+        self._downsample = check_in_dict(data, "downsample", None)
+        self._raster = check_in_dict(data, "raster", None)
 
-        if "ydata" in data:
-            self._ydata = array(data["ydata"])
-        else:
+        if "ydata" not in data:
             raise Exception("Line must have Y data")
+        dtype = LineInterface._dtype(check_in_dict(data, "dtype", dtype))
+        xdata = check_in_dict(data, "xdata", None)
+        ydata = data["ydata"]
+        if is_reference(xdata):
+            xdata = load_array(xdata, root)
+        if is_reference(ydata):
+            ydata = load_array(ydata, root)
+        self._xdata, self._ydata, self._stacked = LineInterface._buffers(xdata, ydata, dtype)
 
     @property
     def data(self) -> ndarray:
         """Read-only property returning the combined x and y data as a 2D array."""
-        return array([self._xdata, self._ydata])
+        if self._stacked is None:
+            self._stacked = numpy.vstack((self._xdata, self._ydata))
+        return self._stacked
 
     @property
     def kwargs(self) -> Dict:
@@ -80,3 +108,91 @@ class LineInterface:
             "label": self._label,
             "marker": self._marker
         }
+
+    @property
+    def downsample(self):
+        """Read-only property returning the downsampling option of the line."""
+        return self._downsample
+
+    @property
+    def raster(self):
+        """Read-only property returning the rasterization option of the line."""
+        return self._raster
+
+    @staticmethod
+    def _dtype(dtype: Any) -> Any:
+        """
+        Validate the floating point type of the line data.
+
+        Parameters:
+        - dtype (Any): 'float64', 'float32', a NumPy float type or None (default type).
+
+        Returns:
+        Any: The NumPy type, or None for the default type.
+        """
+        if dtype is None:
+            return None
+        if isinstance(dtype, str):
+            if dtype not in DTYPES:
+                raise Exception(f"Line dtype must be one of {list(DTYPES)}, not '{dtype}'")
+            return DTYPES[dtype]
+        return dtype
+
+    @staticmethod
+    def _buffers(xdata: Any, ydata: Any, dtype: Any):
+        """
+        Convert the x and y data to validated, contiguous 1D buffers.
+
+        Lists are converted straight into a single (2, n) buffer whose rows are the x and y data,
+        so that the combined data needs no extra copy. Arrays are kept as they are when they
+        already have the requested type and layout.
+
+        Parameters:
+        - xdata (Any): The x-axis data, or None to use the indices of the y data.
+        - ydata (Any): The y-axis data.
+        - dtype (Any): The NumPy floating point type, or None for float64 except for floating point arrays.
+
+        Returns:
+        Tuple[ndarray, ndarray, ndarray]: The x data, the y data and the combined data (or None).
+        """
+        if isinstance(xdata, ndarray) or isinstance(ydata, ndarray):
+            y = LineInterface._array(ydata, dtype)
+            if xdata is None:
+                x = numpy.arange(len(y), dtype=y.dtype) if y.ndim == 1 else y
+            else:
+                x = LineInterface._array(xdata, dtype)
+            stacked = None
+        else:
+            dtype = numpy.float64 if dtype is None else dtype
+            if xdata is not None and len(xdata) != len(ydata):
+                raise Exception(f"Line xdata and ydata must have the same length, got {len(xdata)} and {len(ydata)}")
+            if xdata is None:
+                stacked = numpy.empty((2, len(ydata)), dtype=dtype)
+                stacked[0] = numpy.arange(len(ydata))
+                stacked[1] = ydata
+            else:
+                stacked = numpy.array((xdata, ydata), dtype=dtype)
+            x, y = stacked
+
+        if x.ndim != 1 or y.ndim != 1:
+            raise Exception("Line xdata and ydata must be one-dimensional")
+        if len(x) != len(y):
+            raise Exception(f"Line xdata and ydata must have the same length, got {len(x)} and {len(y)}")
+        return x, y, stacked
+
+    @staticmethod
+    def _array(values: Any, dtype: Any) -> ndarray:
+        """
+        Convert one axis of data to a contiguous buffer, copying only when needed.
+
+        Parameters:
+        - values (Any): The data, a list or an array.
+        - dtype (Any): The NumPy floating point type, or None to keep floating point arrays as they are.
+
+        Returns:
+        ndarray: The contiguous data.
+        """
+        if dtype is None:
+            is_float = isinstance(values, ndarray) and values.dtype.kind == "f"
+            dtype = values.dtype if is_float else numpy.float64
+        return numpy.ascontiguousarray(values, dtype=dtype)
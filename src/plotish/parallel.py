@@ -0,0 +1,147 @@
+"""
+plotish.parallel - Helpers for rendering figures in a pool of worker processes.
+
+Figures of a dataset are independent from each other, so they can be drawn and saved
+by separate processes. Each worker uses the non-interactive Agg backend and renders one
+FigureInterface per task, whose line buffers are memory-mapped rather than pickled
+(see plotish.sharing); results are handed back in submission order so that warnings
+line up with the serial mode.
+
+Functions:
+- make_pool(workers: int) -> ProcessPoolExecutor: Create a pool of rendering processes.
+- render_figure(outfolder, name, types, options, i, fi, profile) -> str: Render and save one figure (worker side).
+- imap_ordered(executor, fn, iterable, window) -> Iterator: Submit tasks lazily and yield results in order.
+- done(value) -> Future: Wrap an already known result so that it can be mixed with submitted tasks.
+- warm() -> int: Load the rendering modules and fonts ahead of the first figure.
+"""
+
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+def _init_worker() -> None:
+    """Select a non-interactive backend in a freshly started worker."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def make_pool(workers: int) -> Executor:
+    """
+    Create a pool of rendering processes.
+
+    Workers are started with the 'spawn' method so that they do not inherit the GUI
+    or pyplot state of the parent process.
+
+    Parameters:
+    - workers (int): The number of worker processes.
+
+    Returns:
+    ProcessPoolExecutor: The pool of workers.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+
+
+def warm() -> int:
+    """
+    Draw an empty figure so that matplotlib, its Agg backend and the fonts are loaded.
+
+    Submitted once per worker by long-running processes (see plotish.server), so that the first
+    request does not pay the start-up cost.
+
+    Returns:
+    int: The id of the process, to tell the workers apart.
+    """
+    import io
+    import os
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.add_subplot()
+    ax.plot([0, 1], [0, 1], label="warm")
+    ax.set_title("warm")
+    ax.legend()
+    fig.savefig(io.BytesIO(), format="png")
+    return os.getpid()
+
+
+def render_figure(outfolder: str, name: str, types: List[Any], options: Dict[str, Any], i: int, fi: Any,
+                  profile: bool = False) -> Any:
+    """
+    Render and save one figure. Executed in a worker process.
+
+    Parameters:
+    - outfolder (str): The output folder for saving plots.
+    - name (str): The name of the dataset, used as file name prefix.
+    - types (List[FigType]): List of figure types to save, without FigType.SHOW.
+    - options (Dict[str, Any]): Keyword arguments of the Plottish instance used in the worker.
+    - i (int): Index of the figure in the dataset.
+    - fi (FigureInterface): The figure to render, or its plotish.sharing.FigureSpec.
+    - profile (bool): If True, the profiling events of the rendering are returned with the warning.
+
+    Returns:
+    str: The warning message generated while making the figure, or a tuple of the warning and
+    the list of plotish.profiling.Event if `profile` is True.
+    """
+    from . import Plottish
+    from .dataset import DataSet
+    from .sharing import FigureSpec
+
+    if isinstance(fi, FigureSpec):
+        fi = fi.build()
+    dataset = DataSet()
+    dataset.load("", "", name, [])
+    pl = Plottish(outfolder, types, dataset, **options)
+    if not profile:
+        return pl.render(i, fi)
+    events = []
+    pl.add_listener(events.append)
+    return pl.render(i, fi), events
+
+
+def imap_ordered(executor: Executor, fn: Callable, iterable: Iterable[Tuple], window: int) -> Iterator[Any]:
+    """
+    Submit `fn(*args)` for each args of `iterable` and yield the results in submission order.
+
+    At most `window` tasks are in flight at once, so the iterable is consumed lazily and
+    a streamed dataset is never fully materialized.
+
+    Parameters:
+    - executor (Executor): The executor running the tasks.
+    - fn (Callable): The function to run.
+    - iterable (Iterable[Tuple]): The arguments of each call. Items that are already Future
+      instances (see done()) are not submitted, their result is yielded in turn.
+    - window (int): The maximal number of pending tasks.
+
+    Returns:
+    Iterator[Any]: The results, in the order of the iterable.
+    """
+    pending = deque()
+    for args in iterable:
+        pending.append(args if isinstance(args, Future) else executor.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def done(value: Any) -> Future:
+    """
+    Wrap an already known result into a completed Future.
+
+    Parameters:
+    - value (Any): The result.
+
+    Returns:
+    Future: A Future whose result is `value`.
+    """
+    future = Future()
+    future.set_result(value)
+    return future
@@ -0,0 +1,202 @@
+"""
+plotish.profiling - Per-stage timing of dataset loading and figure rendering.
+
+DataSet and Plottish report what they do to listeners, callables receiving an Event for each
+stage of the work: reading the file, building each FigureInterface, making each figure and
+saving each output. Events carry the duration of the stage, the figure index, the number of
+points plotted and the size of the written outputs. Without listeners nothing is measured.
+
+The Profiler listener gathers the events, prints a summary table by stage and writes them in
+the Chrome trace event format, which can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+Stages:
+- read: decoding the dataset file (bytes: size of the file).
+- build: building a FigureInterface and its lines (points: number of points of the lines).
+- make_fig: making a figure (points: number of points plotted, after downsampling).
+- save_<type>: drawing and writing an output of the figure type (bytes: size of the output).
+- cache: restoring the outputs of a figure from the render cache.
+
+Example Usage:
+```python
+from plotish import DataSet, Plottish, FigType
+from plotish.profiling import Profiler
+
+profiler = Profiler()
+ds = DataSet()
+ds.add_listener(profiler)
+ds.load_file("data.json")
+pl = Plottish("out", [FigType.PNG], ds)
+pl.add_listener(profiler)
+pl.plot()
+print(profiler.summary())
+profiler.dump("trace.json")
+```
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+Listener = Callable[["Event"], None]
+
+
+@dataclass
+class Event:
+    """
+    A stage of the work on a dataset.
+
+    Attributes:
+    - stage (str): The name of the stage, see the module documentation.
+    - figure (int): The index of the figure in the dataset, None for the whole dataset.
+    - start (float): The start time, in seconds since the epoch.
+    - duration (float): The duration, in seconds.
+    - points (int): The number of points handled.
+    - bytes (int): The number of bytes read or written.
+    - detail (str): Additional information, e.g. a file name.
+    - pid (int): The process the stage ran in.
+    - tid (int): The thread the stage ran in.
+    """
+    stage: str
+    figure: Optional[int] = None
+    start: float = 0.0
+    duration: float = 0.0
+    points: int = 0
+    bytes: int = 0
+    detail: str = ""
+    pid: int = field(default_factory=os.getpid)
+    tid: int = field(default_factory=threading.get_ident)
+
+
+@contextmanager
+def measure(listeners: List[Listener], stage: str, figure: Optional[int] = None, **fields: Any) -> Iterator[Optional[Event]]:
+    """
+    Time a stage and send its Event to the listeners.
+
+    The Event is yielded so that the measured code can fill in its points and bytes.
+    Nothing is measured, and None is yielded, when there are no listeners.
+
+    Parameters:
+    - listeners (List[Listener]): The listeners to notify.
+    - stage (str): The name of the stage.
+    - figure (int): The index of the figure, None for the whole dataset.
+    - fields: Initial values of the other Event attributes.
+
+    Returns:
+    Iterator[Optional[Event]]: The Event of the stage, or None without listeners.
+    """
+    if not listeners:
+        yield None
+        return
+    event = Event(stage, figure, start=time.time(), **fields)
+    start = time.perf_counter()
+    yield event
+    event.duration = time.perf_counter() - start
+    emit(listeners, event)
+
+
+def emit(listeners: List[Listener], event: Event) -> None:
+    """
+    Send an Event to the listeners.
+
+    Parameters:
+    - listeners (List[Listener]): The listeners to notify.
+    - event (Event): The event.
+    """
+    for listener in listeners:
+        listener(event)
+
+
+class Profiler:
+    """
+    Listener gathering the events to summarize them or write a trace.
+
+    Attributes:
+    - events (List[Event]): The events received, in order.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty Profiler.
+        """
+        self.events = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def stages(self) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregate the events by stage.
+
+        Returns:
+        Dict[str, Dict[str, float]]: For each stage in order of first appearance, the count,
+        total, mean and maximal duration, and the total points and bytes.
+        """
+        stages = {}
+        for event in self.events:
+            stage = stages.setdefault(event.stage, {"count": 0, "total": 0.0, "max": 0.0, "points": 0, "bytes": 0})
+            stage["count"] += 1
+            stage["total"] += event.duration
+            stage["max"] = max(stage["max"], event.duration)
+            stage["points"] += event.points
+            stage["bytes"] += event.bytes
+        for stage in stages.values():
+            stage["mean"] = stage["total"] / stage["count"]
+        return stages
+
+    def summary(self) -> str:
+        """
+        Return a table of the time spent in each stage.
+
+        Returns:
+        str: The table, one line per stage.
+        """
+        stages = self.stages()
+        total = sum(stage["total"] for stage in stages.values()) or 1.0
+        lines = [f"{'stage':<14}{'count':>7}{'total (s)':>11}{'%':>6}{'mean (ms)':>11}{'max (ms)':>10}"
+                 f"{'points':>12}{'bytes':>12}"]
+        for name, stage in stages.items():
+            lines.append(f"{name:<14}{stage['count']:>7}{stage['total']:>11.3f}{100 * stage['total'] / total:>6.1f}"
+                         f"{1000 * stage['mean']:>11.2f}{1000 * stage['max']:>10.2f}"
+                         f"{stage['points']:>12}{stage['bytes']:>12}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Return the events in the Chrome trace event format.
+
+        Returns:
+        Dict[str, Any]: The trace, with one complete ("X") event per stage.
+        """
+        origin = min((event.start for event in self.events), default=0.0)
+        trace = []
+        for event in self.events:
+            args = {key: value for key, value in asdict(event).items()
+                    if key in ("figure", "points", "bytes", "detail") and value not in (None, "", 0)}
+            name = event.stage if event.figure is None else f"{event.stage} {event.figure}"
+            trace.append({
+                "name": name,
+                "cat": event.stage,
+                "ph": "X",
+                "ts": (event.start - origin) * 1e6,
+                "dur": event.duration * 1e6,
+                "pid": event.pid,
+                "tid": event.tid,
+                "args": args,
+            })
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def dump(self, filename: str) -> None:
+        """
+        Write the events to a file in the Chrome trace event format.
+
+        Parameters:
+        - filename (str): The path of the trace file.
+        """
+        with open(filename, "w") as f:
+            json.dump(self.chrome_trace(), f)
@@ -0,0 +1,102 @@
+"""
+plotish.raster - Dense marker series drawn as images or density maps in vector outputs.
+
+In SVG, PDF and PGF outputs, every marker drawn by ax.plot is a separate vector path: a series
+of a million markers makes files of hundreds of MB, slow to write and to open. Such series can
+be drawn instead with one of the following methods:
+
+- raster: the line is rasterized at the resolution of the output (plotish.DPI) and embedded as
+  an image, while the axes, ticks, labels and legend stay vector. It looks like the vector line.
+- hexbin: the points are aggregated into a grid of hexagons shaded by the logarithm of their
+  point count, in the color of the line. The size of the output depends on the grid, not on
+  the number of points.
+
+In the JSON files, the `raster` key of a line takes one of the following values:
+- absent (default): lines with markers and more than THRESHOLD points, after downsampling,
+  are rasterized.
+- "raster" or true: rasterize the line.
+- "hexbin": aggregate the line.
+- {"method": "hexbin", "points": 100000, "gridsize": 80}: the method, applied only to lines of
+  more than `points` points, and the number of hexagons across the x axis.
+- false or "none": always draw the line as vector paths.
+
+PNG outputs are images anyway, rasterizing a line changes nothing there.
+
+Example Usage:
+```python
+from plotish import raster
+
+method = raster.resolve({"method": "hexbin", "points": 1000}, len(y), marked=True)
+if method is not None and method[0] == "hexbin":
+    raster.hexbin(ax, x, y, "C0", method[1])
+```
+"""
+
+from typing import Any, Optional, Tuple
+
+import numpy
+
+METHODS = ("raster", "hexbin")
+# Point count above which lines with markers are rasterized by default
+THRESHOLD = 10000
+# Default number of hexagons across the x axis
+GRIDSIZE = 100
+
+
+def resolve(option: Any, count: int, marked: bool) -> Optional[Tuple[str, int]]:
+    """
+    Interpret a `raster` option from the JSON file.
+
+    Parameters:
+    - option (Any): The option value, see the module documentation.
+    - count (int): The number of points of the line.
+    - marked (bool): True if the line is drawn with markers.
+
+    Returns:
+    Optional[Tuple[str, int]]: The method and the grid size, or None to draw the line as vector paths.
+
+    Raises:
+    - Exception: If the method is unknown.
+    """
+    if option is False or option in ("none", "None"):
+        return None
+    if option is None:
+        return ("raster", GRIDSIZE) if marked and count > THRESHOLD else None
+    if option is True:
+        method, points, gridsize = "raster", 0, GRIDSIZE
+    elif isinstance(option, dict):
+        method = option.get("method", "raster")
+        points = int(option.get("points", 0))
+        gridsize = int(option.get("gridsize", GRIDSIZE))
+    else:
+        method, points, gridsize = option, 0, GRIDSIZE
+    if method not in METHODS:
+        raise Exception(f"Unknown raster method: {method}")
+    if count <= points:
+        return None
+    return method, gridsize
+
+
+def hexbin(ax: Any, x: numpy.ndarray, y: numpy.ndarray, color: Any, gridsize: int) -> Optional[Any]:
+    """
+    Draw the density map of a series of points.
+
+    Parameters:
+    - ax (Axes): The axes to draw in.
+    - x (numpy.ndarray): The x-axis data.
+    - y (numpy.ndarray): The y-axis data.
+    - color (Any): The matplotlib color of the line, the color of the densest hexagons.
+    - gridsize (int): The number of hexagons across the x axis.
+
+    Returns:
+    Optional[PolyCollection]: The hexagons, or None if the series has no finite point.
+    """
+    from matplotlib.colors import LinearSegmentedColormap, to_rgba
+
+    finite = numpy.isfinite(x) & numpy.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if not len(x):
+        return None
+    cmap = LinearSegmentedColormap.from_list("plotish_density", [to_rgba(color, 0.15), to_rgba(color, 1.0)])
+    return ax.hexbin(x, y, gridsize=gridsize, bins="log", mincnt=1, cmap=cmap, edgecolors="face")
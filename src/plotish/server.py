@@ -0,0 +1,474 @@
+"""
+plotish.server - Long-running render server answering requests on a local socket.
+
+Starting Python and importing matplotlib costs more than rendering a small dataset. A
+RenderServer pays it once: it listens on a Unix socket or a localhost TCP port, queues the
+datasets it receives and renders them with warm workers, threads of the server process or a
+pool of worker processes with --workers.
+
+Protocol: each request is a JSON object on one line, answered by a JSON object on one line.
+A connection can send any number of requests, one after the other.
+
+- {"op": "render", "file": "/abs/data.json", "outfolder": "/abs/out", "types": ["png"],
+   "figures": [0, "Title"], "downsample": "minmax", "timeout": 30, "id": 1}
+  renders a dataset file (JSON or columnar). "dataset" can replace "file" to send the
+  content of a JSON dataset file in the request. Only "file" or "dataset" is required; "types"
+  defaults to ["png"], "outfolder" to the folder of the server. Relative paths are resolved
+  against the working directory of the server.
+  Answer: {"ok": true, "id": 1, "outputs": [...], "warnings": [...], "queued": s, "render": s}.
+- {"op": "stats"}: queue depth and capacity, request counters and the percentiles of the
+  render time and of the total time (queue included) of the recent requests.
+- {"op": "health"}: {"ok": true, "status": "ok"} while the server accepts requests.
+
+Failures are answered with {"ok": false, "status": ..., "error": "..."}, where status is:
+- "busy": the queue is full, the request was not queued. Retry later.
+- "timeout": the request was not rendered within its timeout. A request still in the queue is
+  dropped; a render already started can't be interrupted and completes, unreported.
+- "invalid": the request is malformed.
+- "error": loading or rendering the dataset failed.
+
+Requests name files the server reads and writes, without authentication: TCP servers only
+listen on loopback addresses (localhost, 127.0.0.1) unless allow_remote is set.
+
+Example Usage:
+```python
+from plotish.server import RenderServer, request
+
+with RenderServer("/tmp/plotish.sock", workers=2) as server:
+    server.start()
+    print(request("/tmp/plotish.sock", {"file": "/data/run.json", "outfolder": "/data/out"}))
+```
+"""
+
+import ipaddress
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy
+
+from . import FigType, Plottish, columnar, make_out_folder, parallel
+from .cache import RenderCache
+from .dataset import DataSet
+
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_TIMEOUT = 60.0
+# Number of recent requests the latency percentiles are computed on
+_LATENCY_WINDOW = 1024
+
+
+def parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """
+    Parse a server address: 'HOST:PORT' for TCP, a path (optionally prefixed by 'unix:') for a Unix socket.
+
+    Parameters:
+    - address (str): The address.
+
+    Returns:
+    Tuple[int, Union[str, Tuple[str, int]]]: The socket family and the address to bind or connect to.
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit() and "/" not in host:
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+def is_loopback(host: str) -> bool:
+    """
+    Tell whether a host name or address only refers to the local machine.
+
+    Parameters:
+    - host (str): The host name or IP address.
+
+    Returns:
+    bool: True if every address of the host is a loopback address.
+    """
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        pass
+    try:
+        infos = socket.getaddrinfo(host, None, socket.AF_INET)
+    except OSError:
+        return False
+    return bool(infos) and all(ipaddress.ip_address(info[4][0]).is_loopback for info in infos)
+
+
+def request(address: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Send one request to a render server and wait for the answer.
+
+    Parameters:
+    - address (str): The address of the server, see parse_address.
+    - payload (Dict[str, Any]): The request, see the module documentation.
+    - timeout (float): The maximal time to wait for the answer, in seconds. Defaults to no limit.
+
+    Returns:
+    Dict[str, Any]: The answer.
+    """
+    family, target = parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(target)
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise Exception(f"The render server at {address} closed the connection")
+    return json.loads(line)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    """
+    Summarize durations.
+
+    Parameters:
+    - values (List[float]): The durations, in seconds.
+
+    Returns:
+    Dict[str, float]: The count, the 50th, 90th and 99th percentiles and the maximum.
+    """
+    if not values:
+        return {"count": 0}
+    p50, p90, p99 = numpy.percentile(values, [50, 90, 99])
+    return {"count": len(values), "p50": p50, "p90": p90, "p99": p99, "max": max(values)}
+
+
+class _Job:
+    """
+    A render request waiting in the queue.
+
+    Attributes:
+    - payload (Dict[str, Any]): The request.
+    - deadline (float): The time.monotonic() after which the request is dropped.
+    - timeout (float): The timeout of the request, in seconds.
+    - queued (float): The time.monotonic() the request was queued at.
+    - done (threading.Event): Set once the answer is known.
+    - answer (Dict[str, Any]): The answer.
+    - cancelled (bool): True once the client was answered a timeout.
+    """
+
+    def __init__(self, payload: Dict[str, Any], timeout: float) -> None:
+        self.payload = payload
+        self.timeout = timeout
+        self.queued = time.monotonic()
+        self.deadline = self.queued + timeout
+        self.done = threading.Event()
+        self.answer = None
+        self.cancelled = False
+
+    def expire(self) -> Dict[str, Any]:
+        """
+        Cancel the request and answer a timeout.
+
+        Returns:
+        Dict[str, Any]: The timeout answer, also set as the answer of the job.
+        """
+        self.cancelled = True
+        self.answer = {"ok": False, "status": "timeout", "id": self.payload.get("id"),
+                       "error": f"Not rendered within {self.timeout} s"}
+        return self.answer
+
+
+class RenderServer:
+    """
+    Render datasets sent to a local socket, with warm workers and a bounded queue.
+
+    Attributes:
+    - address (str): The address the server listens on.
+    - workers (int): The number of requests rendered at once. With more than one, figures are
+      rendered by a pool of as many worker processes.
+    - timeout (float): The default timeout of a request, in seconds.
+    - outfolder (str): The default output folder.
+    - _options (Dict[str, Any]): Default keyword arguments of Plottish (downsample, cache).
+    - _queue (queue.Queue): The requests waiting to be rendered.
+    - _pool (Executor): The pool of worker processes, or None.
+    - _stats (Dict[str, int]): The request counters.
+    - _render_times (deque): The render time of the recent requests.
+    - _total_times (deque): The total time, queue included, of the recent requests.
+    """
+
+    def __init__(self, address: str, workers: int = 1, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT, outfolder: str = "out", downsample: Any = None,
+                 cache: Optional[RenderCache] = None, allow_remote: bool = False) -> None:
+        """
+        Initialize a RenderServer. Nothing listens before start() or serve_forever().
+
+        Parameters:
+        - address (str): 'HOST:PORT' for a TCP port, a path for a Unix socket.
+        - workers (int): The number of requests rendered at once. Defaults to 1, which renders in
+          the server process.
+        - queue_size (int): The maximal number of requests waiting; more are answered 'busy'. Defaults to 16.
+        - timeout (float): The default timeout of a request, in seconds. Defaults to 60.
+        - outfolder (str): The output folder of the requests that don't set one. Defaults to 'out'.
+        - downsample (Any): The default downsampling option, see plotish.decimation. Defaults to None.
+        - cache (RenderCache): The render cache shared by the requests. Defaults to None.
+        - allow_remote (bool): Listen on a TCP address other than a loopback one. Any client
+          reaching it can then read and write files as the server. Defaults to False.
+
+        Raises:
+        - Exception: If the address is a non-loopback TCP address and allow_remote is False.
+        """
+        family, target = parse_address(address)
+        if family == socket.AF_INET and not allow_remote and not is_loopback(target[0]):
+            raise Exception(f"{target[0]} is not a loopback address: requests can read and write any file "
+                            f"of the server, allow remote clients explicitly to listen on it")
+        self.address = address
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.outfolder = outfolder
+        self._options = {"downsample": downsample, "cache": cache}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pool = None
+        self._server = None
+        self._serving = False
+        self._serve_thread = None
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "active": 0}
+        self._render_times = deque(maxlen=_LATENCY_WINDOW)
+        self._total_times = deque(maxlen=_LATENCY_WINDOW)
+        self._started = time.monotonic()
+
+    def __enter__(self) -> "RenderServer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+
+    def start(self) -> None:
+        """
+        Warm the workers, then listen and answer requests in background threads.
+        """
+        self._bind()
+        self._serving = True
+        self._serve_thread = threading.Thread(target=self._server.serve_forever, name="plotish-server", daemon=True)
+        self._serve_thread.start()
+
+    def serve_forever(self) -> None:
+        """
+        Warm the workers, then listen and answer requests until shutdown() or KeyboardInterrupt.
+        """
+        self._bind()
+        self._serving = True
+        try:
+            self._server.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """
+        Stop listening, finish the requests being rendered and stop the workers.
+        """
+        if self._server is not None:
+            server, self._server = self._server, None
+            if self._serving:
+                # Returns at once when serve_forever was interrupted in this thread
+                server.shutdown()
+            server.server_close()
+            if isinstance(server.server_address, str) and os.path.exists(server.server_address):
+                os.remove(server.server_address)
+        if self._serve_thread is not None:
+            self._serve_thread.join()
+            self._serve_thread = None
+        self._serving = False
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def handle(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer one request, waiting for its rendering.
+
+        Parameters:
+        - payload (Dict[str, Any]): The request, see the module documentation.
+
+        Returns:
+        Dict[str, Any]: The answer.
+        """
+        if not isinstance(payload, dict):
+            return {"ok": False, "status": "invalid", "error": "A request must be a JSON object"}
+        op = payload.get("op", "render")
+        if op == "health":
+            return {"ok": True, "status": "ok", "id": payload.get("id")}
+        if op == "stats":
+            return {"ok": True, "id": payload.get("id"), **self.stats()}
+        if op != "render":
+            return {"ok": False, "status": "invalid", "id": payload.get("id"), "error": f"Unknown op: {op}"}
+        if ("file" in payload) == ("dataset" in payload):
+            return {"ok": False, "status": "invalid", "id": payload.get("id"),
+                    "error": "A render request needs either 'file' or 'dataset'"}
+
+        timeout = float(payload.get("timeout", self.timeout))
+        job = _Job(payload, timeout)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count("rejected")
+            return {"ok": False, "status": "busy", "id": payload.get("id"),
+                    "error": f"The queue is full ({self._queue.maxsize} requests)"}
+        if not job.done.wait(timeout):
+            with self._lock:
+                if not job.done.is_set():
+                    self._stats["timed_out"] += 1
+                    return job.expire()
+        return job.answer
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the state of the queue, the request counters and the latency percentiles.
+
+        Returns:
+        Dict[str, Any]: The statistics, durations in seconds.
+        """
+        with self._lock:
+            return {
+                "queue": {"depth": self._queue.qsize(), "capacity": self._queue.maxsize},
+                "workers": self.workers,
+                "requests": dict(self._stats),
+                "latency": {"render": _percentiles(list(self._render_times)),
+                            "total": _percentiles(list(self._total_times))},
+                "uptime": time.monotonic() - self._started,
+            }
+
+    def _bind(self) -> None:
+        """
+        Start the workers, warm them and bind the socket.
+        """
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+                raise Exception("Unix sockets are not supported on this platform, use HOST:PORT")
+            if os.path.exists(target):
+                os.remove(target)
+            server_class = _UnixServer
+        else:
+            server_class = _TCPServer
+        if self.workers > 1:
+            self._pool = parallel.make_pool(self.workers)
+            for future in [self._pool.submit(parallel.warm) for _ in range(self.workers)]:
+                future.result()
+        parallel.warm()
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._dispatch, name=f"plotish-render-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._server = server_class(target, _Handler)
+        self._server.render_server = self
+
+    def _dispatch(self) -> None:
+        """
+        Render the queued requests until a None sentinel is received. Executed by the render threads.
+        """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.cancelled or time.monotonic() > job.deadline:
+                    if not job.cancelled:
+                        job.expire()
+                        self._stats["timed_out"] += 1
+                    job.done.set()
+                    continue
+                self._stats["active"] += 1
+            start = time.monotonic()
+            try:
+                outputs, warnings = self._render(job.payload, self._pool)
+                answer = {"ok": True, "outputs": outputs, "warnings": warnings}
+            except Exception as e:
+                answer = {"ok": False, "status": "error", "error": str(e)}
+            end = time.monotonic()
+            answer.update({"id": job.payload.get("id"), "queued": start - job.queued, "render": end - start})
+            with self._lock:
+                self._stats["active"] -= 1
+                self._stats["completed" if answer["ok"] else "failed"] += 1
+                self._render_times.append(end - start)
+                self._total_times.append(end - job.queued)
+                job.answer = answer
+                job.done.set()
+
+    def _render(self, payload: Dict[str, Any], pool: Optional[Executor]) -> Tuple[List[str], List[str]]:
+        """
+        Load and render the dataset of a request.
+
+        Parameters:
+        - payload (Dict[str, Any]): The request.
+        - pool (Executor): The pool of worker processes, or None to render in this thread.
+
+        Returns:
+        Tuple[List[str], List[str]]: The output files and the warnings of the figures.
+        """
+        try:
+            types = [FigType[name.upper()] for name in payload.get("types", ["png"])]
+        except KeyError as e:
+            raise Exception(f"Unknown figure type: {e.args[0]}")
+        types = [fig_type for fig_type in types if fig_type != FigType.SHOW]
+        figures = payload.get("figures")
+        ds = DataSet()
+        if "dataset" in payload:
+            ds.load_document(payload["dataset"], payload.get("root"), lazy=bool(figures))
+        elif columnar.detect(payload["file"]) is not None:
+            ds.load_columnar(payload["file"])
+        else:
+            ds.load_file(payload["file"], lazy=bool(figures))
+        try:
+            ds.select(figures)
+            outfolder = payload.get("outfolder", self.outfolder)
+            make_out_folder(outfolder)
+            options = {**self._options, **{key: payload[key] for key in ("downsample",) if key in payload}}
+            pl = Plottish(outfolder, types, ds, workers=self.workers, pool=pool, **options)
+            warnings = pl.plot()
+            outputs = [path for i in pl.rendered for path in pl.outputs(i)]
+        finally:
+            ds.close()
+        if FigType.PDF_PAGES in types:
+            outputs.append(pl.pages_filename)
+        return outputs, [warn for warn in warnings if warn != "OK"]
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """
+    Answer the requests of one connection, one JSON line each.
+    """
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+            except ValueError as e:
+                answer = {"ok": False, "status": "invalid", "error": f"Invalid JSON: {e}"}
+            else:
+                answer = self.server.render_server.handle(payload)
+            self.wfile.write(json.dumps(answer, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
@@ -0,0 +1,233 @@
+"""
+plotish.sharing - Line buffers shared with the worker processes without copy.
+
+Sending a FigureInterface to a worker process pickles its line arrays: the parent builds a copy
+of every array in the pickled task and each worker unpickles another one. Instead, the parent
+sends a FigureSpec, which holds the figure and line options (title, labels, legend, styles, ...)
+and, for each line buffer, the location of its bytes in a file. Workers memory-map the buffers
+read-only, so the data is never copied between processes:
+
+- Arrays that are already memory-mapped from a file (binary sidecar files, HDF5 datasets) are
+  referenced in place.
+- Other arrays are written to a file of a temporary folder in shared memory (/dev/shm when it
+  exists), one file per figure, deleted once the figure is rendered. Only the figures in flight
+  are held there, so parent memory stays bounded by a few figures, not the dataset.
+
+If a figure can't be written, e.g. the shared memory folder is full, the FigureInterface itself
+is sent and pickled as before.
+
+Example Usage:
+```python
+from plotish.sharing import SharedBuffers
+
+with SharedBuffers() as shared:
+    spec = shared.share(0, fi)   # picklable, small
+    fi_in_worker = spec.build()  # FigureInterface memory-mapping the buffers
+    shared.release(0)
+```
+"""
+
+import mmap
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy
+
+from .interfaces.figureinterface import FigureInterface
+
+# Alignment of the buffers in a shared file, in bytes
+_ALIGN = 64
+
+
+@dataclass
+class BufferRef:
+    """
+    Location of an array in a file.
+
+    Attributes:
+    - path (str): The path of the file.
+    - offset (int): The position of the first byte of the array, in bytes.
+    - dtype (str): The type of the elements, e.g. '<f8'.
+    - shape (Tuple[int, ...]): The shape of the array.
+    """
+    path: str
+    offset: int
+    dtype: str
+    shape: Tuple[int, ...]
+
+    def open(self) -> numpy.ndarray:
+        """
+        Memory-map the array in read-only mode.
+
+        Returns:
+        numpy.ndarray: The array.
+        """
+        if not numpy.prod(self.shape):
+            return numpy.empty(self.shape, dtype=self.dtype)
+        return numpy.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offset, shape=self.shape)
+
+
+@dataclass
+class FigureSpec:
+    """
+    Picklable description of a FigureInterface whose line buffers are memory-mapped files.
+
+    Attributes:
+    - data (Dict[str, Any]): The options of the figure, without its lines.
+    - lines (List[Dict[str, Any]]): The options of each line, whose "xdata" and "ydata" are BufferRef.
+    """
+    data: Dict[str, Any]
+    lines: List[Dict[str, Any]]
+
+    def build(self) -> FigureInterface:
+        """
+        Build the FigureInterface, memory-mapping its line buffers.
+
+        Returns:
+        FigureInterface: The figure.
+        """
+        lines = [{**line, "xdata": line["xdata"].open(), "ydata": line["ydata"].open()} for line in self.lines]
+        return FigureInterface({**self.data, "lines": lines})
+
+
+class SharedBuffers:
+    """
+    Temporary folder holding the line buffers of the figures sent to worker processes.
+
+    Attributes:
+    - folder (str): The temporary folder, created on first use.
+    - _files (Dict[int, str]): The file of each figure in flight, by figure index.
+    """
+
+    def __init__(self, parent: str = None) -> None:
+        """
+        Initialize the shared buffers.
+
+        Parameters:
+        - parent (str): The folder the temporary folder is created in. Defaults to /dev/shm
+          when it exists, the system temporary folder otherwise.
+        """
+        if parent is None:
+            parent = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+        self._parent = parent
+        self.folder = None
+        self._files = {}
+
+    def __enter__(self) -> "SharedBuffers":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def share(self, i: int, fi: FigureInterface) -> Union[FigureSpec, FigureInterface]:
+        """
+        Describe a figure for a worker process, writing the line buffers that are not memory-mapped yet.
+
+        Parameters:
+        - i (int): Index of the figure in the dataset.
+        - fi (FigureInterface): The figure.
+
+        Returns:
+        Union[FigureSpec, FigureInterface]: The FigureSpec of the figure, or the figure itself if
+        its buffers could not be written.
+        """
+        refs = []
+        pending = []
+        size = 0
+        for line in fi.lines:
+            line_refs = []
+            for values in (line._xdata, line._ydata):
+                ref = _mapped(values)
+                if ref is None:
+                    ref = BufferRef("", size, values.dtype.str, values.shape)
+                    pending.append((ref, values))
+                    size += -(-values.nbytes // _ALIGN) * _ALIGN
+                line_refs.append(ref)
+            refs.append(line_refs)
+        if pending:
+            try:
+                path = self._write(i, pending)
+            except OSError:
+                return fi
+            for ref, _ in pending:
+                ref.path = path
+        lines = [{**line._data, "xdata": x, "ydata": y} for line, (x, y) in zip(fi.lines, refs)]
+        return FigureSpec(dict(fi._data), lines)
+
+    def release(self, i: int) -> None:
+        """
+        Delete the buffers of a figure once it is rendered.
+
+        Parameters:
+        - i (int): Index of the figure in the dataset.
+        """
+        path = self._files.pop(i, None)
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """
+        Delete the temporary folder and every buffer left in it.
+        """
+        self._files.clear()
+        if self.folder is not None:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self.folder = None
+
+    def _write(self, i: int, buffers: List[Tuple[BufferRef, numpy.ndarray]]) -> str:
+        """
+        Write the buffers of a figure to its file.
+
+        Parameters:
+        - i (int): Index of the figure in the dataset.
+        - buffers (List[Tuple[BufferRef, numpy.ndarray]]): The arrays and their planned location.
+
+        Returns:
+        str: The path of the file.
+        """
+        if self.folder is None:
+            self.folder = tempfile.mkdtemp(prefix="plotish-", dir=self._parent)
+        path = os.path.join(self.folder, f"{i}.bin")
+        self._files[i] = path
+        try:
+            with open(path, "wb") as f:
+                for ref, values in buffers:
+                    f.seek(ref.offset)
+                    f.write(memoryview(numpy.ascontiguousarray(values)).cast("B"))
+        except OSError:
+            self.release(i)
+            raise
+        return path
+
+
+def _mapped(values: numpy.ndarray) -> Optional[BufferRef]:
+    """
+    Locate an array in the file it is memory-mapped from.
+
+    Parameters:
+    - values (numpy.ndarray): The array.
+
+    Returns:
+    Optional[BufferRef]: The location of the array, or None if it is not a contiguous view of a
+    memory-mapped file.
+    """
+    if not values.flags.c_contiguous or not values.size:
+        return None
+    mapped = None
+    base = values
+    while isinstance(base, numpy.ndarray):
+        if isinstance(base, numpy.memmap) and mapped is None:
+            mapped = base
+        base = base.base
+    if mapped is None or not isinstance(base, mmap.mmap) or not mapped.filename or mapped.mode != "r":
+        return None
+    # numpy.memmap maps the file from the allocation boundary preceding its offset
+    start = mapped.offset - mapped.offset % mmap.ALLOCATIONGRANULARITY
+    origin = numpy.frombuffer(base, dtype=numpy.uint8).ctypes.data
+    return BufferRef(os.fspath(mapped.filename), start + values.ctypes.data - origin, values.dtype.str, values.shape)
@@ -0,0 +1,314 @@
+"""
+plotish.streaming - Incremental reader for plotish JSON datasets.
+
+This module parses a dataset file piece by piece instead of materializing the whole document.
+The top-level metadata (name, date, description, ...) is read as plain values, while the
+elements of the `data` array are decoded and handed out one figure at a time, so that peak
+memory is bounded by the largest single figure rather than by the whole file.
+
+Classes:
+- JsonStreamReader: Buffered reader decoding the top-level object of a JSON document incrementally.
+- FigureStream: Re-iterable sequence of FigureInterface built lazily from a dataset file.
+
+Example Usage:
+```python
+from plotish.streaming import FigureStream, read_metadata
+
+with open("data.json") as f:
+    metadata, n = read_metadata(f)
+
+for fig in FigureStream("data.json", n):
+    print(fig.title)
+```
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from .compression import open_input
+from .interfaces.figureinterface import FigureInterface
+from .profiling import Listener, measure
+
+CHUNK_SIZE = 1 << 20
+_WHITESPACE = " \t\n\r"
+_NUMBER = "0123456789.eE+-"
+# The characters changing the nesting of a JSON value, outside and inside strings
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+_STRING = re.compile(r'["\\]')
+
+
+class JsonStreamReader:
+    """
+    Buffered reader decoding the top-level object of a JSON document incrementally.
+
+    Attributes:
+    - _stream (TextIO): The text stream the document is read from.
+    - _chunk (int): Minimal number of characters read from the stream at once.
+    - _buf (str): Characters read but not consumed yet (starting at _pos).
+    - _pos (int): Current position in the buffer.
+    - _eof (bool): True once the stream has been exhausted.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        Initialize a JsonStreamReader.
+
+        Parameters:
+        - stream (TextIO): The text stream to read from.
+        - chunk_size (int): Minimal number of characters read from the stream at once.
+        """
+        self._stream = stream
+        self._chunk = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def items(self, array_key: str = "data", skip: bool = False) -> Iterator[Tuple[str, Any, bool]]:
+        """
+        Iterate over the members of the top-level JSON object.
+
+        Scalar members are yielded whole. When the member named `array_key` is an array,
+        its elements are yielded one by one instead of the array itself.
+
+        Parameters:
+        - array_key (str): The name of the member whose array is split into elements.
+        - skip (bool): If True, the array elements are scanned without being decoded and yielded as None.
+
+        Returns:
+        Iterator[Tuple[str, Any, bool]]: (key, value, is_element) for each member or array element.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == array_key and self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield key, self._skip() if skip else self._value(), True
+                        if self._separator("]"):
+                            break
+            else:
+                yield key, self._value(), False
+            if self._separator("}"):
+                return
+
+    def _fill(self) -> bool:
+        """
+        Read more characters from the stream, dropping the already consumed part of the buffer.
+
+        The amount read grows with the pending buffer so that decoding a large value costs
+        a bounded number of retries.
+
+        Returns:
+        bool: False if the stream is exhausted.
+        """
+        pending = len(self._buf) - self._pos
+        chunk = self._stream.read(max(self._chunk, pending))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it.
+
+        Returns:
+        str: The next character, or an empty string at the end of the stream.
+        """
+        while True:
+            buf = self._buf
+            while self._pos < len(buf) and buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(buf):
+                return buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        """Consume the next non-whitespace character, which must be `char`."""
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON: expected '{char}' but found '{found}'")
+        self._pos += 1
+
+    def _separator(self, closing: str) -> bool:
+        """
+        Consume a member separator.
+
+        Parameters:
+        - closing (str): The character closing the current container.
+
+        Returns:
+        bool: True if the container is closed, False if another member follows.
+        """
+        found = self._peek()
+        if found == closing:
+            self._pos += 1
+            return True
+        self._expect(",")
+        return False
+
+    def _skip(self) -> None:
+        """
+        Consume the next JSON value without decoding it.
+
+        Objects, arrays and strings are scanned for the characters closing them, which is much
+        faster than building the values they hold.
+        """
+        if self._peek() not in "[{\"":
+            self._value()
+            return
+        depth = 0
+        in_string = False
+        while True:
+            buf = self._buf
+            pattern = _STRING if in_string else _STRUCTURE
+            match = pattern.search(buf, self._pos)
+            if match is None or match.end() == len(buf) and match.group() == "\\":
+                # The rest of the buffer is consumed, except an escape continuing in the next chunk
+                self._pos = len(buf) if match is None else match.start()
+                if not self._fill():
+                    raise ValueError("Malformed JSON: unexpected end of the document")
+                continue
+            char = match.group()
+            self._pos = match.end()
+            if char == "\\":
+                self._pos += 1
+            elif char == '"':
+                in_string = not in_string
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+            if depth == 0 and not in_string:
+                return
+
+    def _value(self) -> Any:
+        """
+        Decode the next JSON value, reading more of the stream until it is complete.
+
+        Returns:
+        Any: The decoded value.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number ending the buffer, or followed by an incomplete fraction or exponent, may
+                # continue in the next chunk
+                if self._eof or end < len(self._buf) and not (
+                        isinstance(value, (int, float)) and self._buf[end] in _NUMBER):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+
+def read_metadata(stream: TextIO, array_key: str = "data") -> Tuple[Dict[str, Any], int]:
+    """
+    Read the top-level metadata of a dataset and count the elements of its figure array.
+
+    Figures are scanned without being decoded, so memory stays bounded by the largest figure
+    and the arrays are only parsed when the figures are iterated.
+
+    Parameters:
+    - stream (TextIO): The text stream containing the dataset.
+    - array_key (str): The name of the member holding the figures.
+
+    Returns:
+    Tuple[Dict[str, Any], int]: The metadata members and the number of figures.
+    """
+    metadata = {}
+    n = 0
+    for key, value, is_element in JsonStreamReader(stream).items(array_key, skip=True):
+        if is_element:
+            n += 1
+        else:
+            metadata[key] = value
+    return metadata, n
+
+
+def iter_array(stream: TextIO, array_key: str = "data") -> Iterator[Any]:
+    """
+    Yield the elements of the top-level array `array_key` one at a time.
+
+    Parameters:
+    - stream (TextIO): The text stream containing the dataset.
+    - array_key (str): The name of the member holding the figures.
+
+    Returns:
+    Iterator[Any]: The decoded array elements.
+    """
+    for _, value, is_element in JsonStreamReader(stream).items(array_key):
+        if is_element:
+            yield value
+
+
+def build_figure(raw: Dict[str, Any], root: Optional[str], index: int, listeners: List[Listener]) -> FigureInterface:
+    """
+    Build a FigureInterface, reporting the 'build' stage to the listeners.
+
+    Parameters:
+    - raw (Dict[str, Any]): The raw data dictionary of the figure.
+    - root (str): The folder binary line data files are resolved against.
+    - index (int): The index of the figure in the dataset.
+    - listeners (List[Listener]): The listeners to notify, see plotish.profiling.
+
+    Returns:
+    FigureInterface: The figure.
+    """
+    with measure(listeners, "build", index) as event:
+        fig = FigureInterface(raw, root=root)
+        if event is not None:
+            event.points = sum(len(line._ydata) for line in fig.lines)
+    return fig
+
+
+class FigureStream:
+    """
+    Re-iterable sequence of FigureInterface built lazily from a dataset file.
+
+    Each iteration re-opens the file and builds one FigureInterface at a time, so only the
+    figure being processed is held in memory.
+
+    Attributes:
+    - _filename (str): The path to the JSON file.
+    - _n (int): The number of figures in the file.
+    - _listeners (List[Listener]): The listeners notified of each figure built.
+    """
+
+    def __init__(self, filename: str, n: int, listeners: Optional[List[Listener]] = None) -> None:
+        """
+        Initialize a FigureStream.
+
+        Parameters:
+        - filename (str): The path to the JSON file.
+        - n (int): The number of figures in the file, as counted by read_metadata.
+        - listeners (List[Listener]): The listeners notified of each figure built. Defaults to none.
+        """
+        self._filename = filename
+        self._n = n
+        self._listeners = listeners if listeners is not None else []
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> Iterator[FigureInterface]:
+        root = os.path.dirname(os.path.abspath(self._filename))
+        with open_input(self._filename) as stream:
+            for i, fig in enumerate(iter_array(stream)):
+                yield build_figure(fig, root, i, self._listeners)
@@ -0,0 +1,114 @@
+"""
+plotish.template - Figures reused for consecutive figures sharing the same layout.
+
+Many datasets hold series of figures that only differ by their data, e.g. the frames of a
+simulation. Making each figure from scratch creates its axes, title, labels, ticks, lines and
+legend again. In template mode (Plottish(template=True), --template), the last figure made by
+each thread is kept with its layout: when the next figure has the same axes labels, legend
+position and lines (count, colors, styles, markers, legend labels, raster mode), the figure is
+reused and only the title, the line data and the axis limits are updated.
+
+Figures whose lines are batched into collections (more than plotish.COLLECTION_THRESHOLD lines)
+or aggregated into density maps (see plotish.raster) are always made from scratch, as are the
+figures displayed with FigType.SHOW.
+
+Example Usage:
+```python
+from plotish import Plottish
+
+pl = Plottish("out", [FigType.PNG], dataset, template=True)
+pl.plot()
+```
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+from .interfaces.figureinterface import FigureInterface
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# The template of each thread, worker processes keep theirs between figures
+_local = threading.local()
+
+
+def layout(fi: FigureInterface) -> Tuple:
+    """
+    Return the layout signature of a figure, what a template must match besides the raster mode of the lines.
+
+    Parameters:
+    - fi (FigureInterface): The figure.
+
+    Returns:
+    Tuple: The axes labels, the legend position and the matplotlib properties of each line.
+    """
+    return fi.xlabel, fi.ylabel, fi.legendPosition, tuple(tuple(line.kwargs.values()) for line in fi.lines)
+
+
+class FigureTemplate:
+    """
+    A figure kept to be reused by the next figures of the same layout.
+
+    Attributes:
+    - fig (Figure): The figure.
+    - warn (str): The warning generated while making the figure.
+    - layout (Tuple): The layout signature of the figure, see layout().
+    - methods (Tuple[Optional[str], ...]): The raster method of each line, 'raster' or None.
+    - lines (List[Line2D]): The artist of each line, in line order.
+    """
+
+    def __init__(self, fig: "Figure", warn: str, layout: Tuple, methods: Tuple[Optional[str], ...]) -> None:
+        """
+        Initialize a template from a figure made with one Line2D per line.
+
+        Parameters:
+        - fig (Figure): The figure.
+        - warn (str): The warning generated while making the figure.
+        - layout (Tuple): The layout signature of the figure.
+        - methods (Tuple[Optional[str], ...]): The raster method of each line.
+        """
+        self.fig = fig
+        self.warn = warn
+        self.layout = layout
+        self.methods = methods
+        self.lines = fig.axes[0].get_lines()
+
+    def update(self, title: str, data: List[Tuple[Any, Any]]) -> "Figure":
+        """
+        Show another figure of the same layout.
+
+        Parameters:
+        - title (str): The title of the figure.
+        - data (List[Tuple[Any, Any]]): The x and y data of each line.
+
+        Returns:
+        Figure: The updated figure.
+        """
+        ax = self.fig.axes[0]
+        ax.set_title(title)
+        for artist, (x, y) in zip(self.lines, data):
+            artist.set_data(x, y)
+        ax.relim()
+        ax.autoscale_view()
+        return self.fig
+
+
+def get() -> Optional[FigureTemplate]:
+    """
+    Return the template of the current thread.
+
+    Returns:
+    Optional[FigureTemplate]: The template, or None.
+    """
+    return getattr(_local, "template", None)
+
+
+def keep(template: Optional[FigureTemplate]) -> None:
+    """
+    Set the template of the current thread.
+
+    Parameters:
+    - template (FigureTemplate): The template, or None to release the figure of the current one.
+    """
+    _local.template = template
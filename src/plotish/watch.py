@@ -0,0 +1,178 @@
+"""
+plotish.watch - Keep the outputs of a dataset file up to date while it is edited.
+
+A Watcher polls the dataset file, and the binary files its lines reference, for changes.
+On a change, the file is read again with the streaming reader and the content of each figure
+is compared with the previous poll: only the figures that were added or modified are built
+and rendered again. Appending a figure to `data` therefore renders just that figure.
+
+The process stays alive between the changes, so matplotlib is imported and configured once.
+
+Example Usage:
+```python
+from plotish import FigType
+from plotish.watch import Watcher
+
+watcher = Watcher("data.json", "out", [FigType.PNG])
+watcher.run(lambda rendered: print(f"{len(rendered)} figures rendered"))
+```
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from . import FigType, Plottish, _PARENT_TYPES
+from .compression import open_input
+from .dataset import DataSet
+from .interfaces.arrays import is_reference
+from .interfaces.figureinterface import FigureInterface
+from .interfaces.utils import check_in_dict
+from .streaming import JsonStreamReader
+
+
+class Watcher:
+    """
+    Re-render the figures of a dataset file that changed since the last poll.
+
+    Attributes:
+    - filename (str): The path to the JSON file.
+    - outfolder (str): The output folder for saving plots.
+    - types (List[FigType]): The figure types to generate, without FigType.SHOW and FigType.PDF_PAGES.
+    - interval (float): The time between two polls, in seconds.
+    - _figures (List[Union[int, str]]): The indices or titles of the figures to render, None for all.
+    - _options (Dict[str, Any]): Keyword arguments of the Plottish instances rendering the figures.
+    - _stats (Dict[str, Tuple[int, int]]): Modification time and size of the watched files.
+    - _digests (List[str]): The content hash of each figure at the last poll.
+    - _name (str): The name of the dataset at the last poll.
+    """
+
+    def __init__(self, filename: str, outfolder: str, types: List[FigType],
+                 figures: Optional[List[Union[int, str]]] = None, interval: float = 1.0, **options: Any) -> None:
+        """
+        Initialize a Watcher. Nothing is rendered before the first poll.
+
+        Parameters:
+        - filename (str): The path to the JSON file.
+        - outfolder (str): The output folder for saving plots.
+        - types (List[FigType]): The figure types to generate. FigType.SHOW and FigType.PDF_PAGES
+          gather the whole dataset and are ignored.
+        - figures (List[Union[int, str]]): The indices or titles of the figures to render. Defaults to all.
+        - interval (float): The time between two polls, in seconds. Defaults to 1.
+        - options: Keyword arguments of Plottish, e.g. downsample or cache.
+        """
+        self.filename = filename
+        self.outfolder = outfolder
+        self.types = [t for t in types if t not in _PARENT_TYPES]
+        self.interval = interval
+        self._figures = figures
+        self._options = options
+        self._stats = {}
+        self._digests = []
+        self._name = None
+
+    def poll(self) -> Optional[List[Tuple[int, str]]]:
+        """
+        Render the figures that changed since the last poll.
+
+        Returns:
+        Optional[List[Tuple[int, str]]]: The index and warning of each rendered figure,
+        or None if no watched file changed.
+        """
+        stats = {path: _stat(path) for path in self._stats or [self.filename]}
+        if stats == self._stats:
+            return None
+
+        root = os.path.dirname(os.path.abspath(self.filename))
+        metadata = {}
+        digests = []
+        changed = []
+        files = {self.filename}
+        with open_input(self.filename) as f:
+            for key, value, is_element in JsonStreamReader(f).items("data"):
+                if not is_element:
+                    metadata[key] = value
+                    continue
+                refs = _references(value, root)
+                files.update(refs)
+                digest = _digest(value, refs)
+                i = len(digests)
+                digests.append(digest)
+                if i >= len(self._digests) or self._digests[i] != digest:
+                    changed.append((i, value))
+
+        dataset = DataSet()
+        dataset.load(check_in_dict(metadata, "description", "No description"),
+                     check_in_dict(metadata, "date", "01/01/1900"),
+                     check_in_dict(metadata, "name", "figure"), [])
+        dataset.select(self._figures)
+        if dataset.name != self._name and self._name is not None:
+            # Output file names depend on the name of the dataset, every figure is rendered again
+            self._digests = []
+            self._stats = {}
+            self._name = None
+            return self.poll()
+
+        pl = Plottish(self.outfolder, self.types, dataset, **self._options)
+        rendered = []
+        try:
+            for i, raw in changed:
+                if dataset.selected(i, check_in_dict(raw, "title", "")):
+                    rendered.append((i, pl.render(i, FigureInterface(raw, root=root))))
+        finally:
+            pl.close()
+            if pl.cache is not None:
+                pl.cache.flush()
+
+        self._digests = digests
+        self._name = dataset.name
+        self._stats = {path: _stat(path) for path in files}
+        return rendered
+
+    def run(self, callback: Optional[Callable[[List[Tuple[int, str]]], None]] = None) -> None:
+        """
+        Poll the files until interrupted (KeyboardInterrupt).
+
+        Errors while reading or rendering, e.g. on a file saved halfway, are reported to the callback
+        as a warning with index -1, the next change of the files is polled as usual.
+
+        Parameters:
+        - callback (Callable): Called with the result of each poll that rendered figures.
+        """
+        while True:
+            try:
+                rendered = self.poll()
+            except Exception as e:
+                self._stats = {path: _stat(path) for path in self._stats or [self.filename]}
+                rendered = [(-1, f"Watching {self.filename}:\r\n{e}")]
+            if rendered and callback is not None:
+                callback(rendered)
+            time.sleep(self.interval)
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    """Return the modification time and size of a file, None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _references(raw: Dict[str, Any], root: str) -> List[str]:
+    """Return the paths of the binary files referenced by the lines of a raw figure."""
+    paths = []
+    for line in check_in_dict(raw, "lines", []):
+        for key in ("xdata", "ydata"):
+            value = line.get(key) if isinstance(line, dict) else None
+            if is_reference(value):
+                paths.append(os.path.join(root, value["file"]))
+    return paths
+
+
+def _digest(raw: Dict[str, Any], refs: List[str]) -> str:
+    """Return the content hash of a raw figure, covering the state of the files it references."""
+    content = json.dumps([raw, [(path, _stat(path)) for path in refs]], sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
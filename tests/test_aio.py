@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import plotish
+from plotish import DataSet, FigType, FigureInterface
+from plotish.aio import FigureResult, render_async
+from plotish.cache import RenderCache
+
+
+def _write(path, n=3):
+    data = [{"title": f"Figure {i}", "lines": [{"xdata": [0, 1, 2], "ydata": [i, i + 1, i]}]} for i in range(n)]
+    with open(path, "w") as f:
+        json.dump({"name": "async", "data": data}, f)
+    return str(path)
+
+def test_render_async_iterates_figures(tmp_path):
+    # Test that each figure is reported once written, while the event loop keeps running
+    filename = _write(tmp_path / "data.json")
+
+    async def run():
+        ticks = []
+        ticker = asyncio.create_task(_tick(ticks))
+        results = []
+        async for result in plotish.render_async(filename, str(tmp_path), [FigType.PNG, FigType.PDF_PAGES]):
+            assert all(os.path.exists(output) for output in result.outputs)
+            results.append(result)
+        ticker.cancel()
+        return results, len(ticks)
+
+    results, ticks = asyncio.run(run())
+    assert sorted(result.index for result in results) == [0, 1, 2]
+    assert results[0].outputs == [f"{tmp_path}/async_{results[0].index}.png"]
+    assert (tmp_path / "async.pdf").exists()
+    assert ticks > 0
+
+async def _tick(ticks):
+    while True:
+        await asyncio.sleep(0.001)
+        ticks.append(None)
+
+def test_render_async_await_selection(tmp_path):
+    # Test that awaiting returns the selected figures of a DataSet in dataset order
+    ds = DataSet()
+    ds.load("", "", "selected", [FigureInterface({"title": f"F{i}", "lines": [{"ydata": [i, 1]}]}) for i in range(4)])
+
+    async def run():
+        return await render_async(ds, str(tmp_path), [FigType.SVG], figures=[3, "F1"])
+
+    results = asyncio.run(run())
+    assert [(result.index, result.title) for result in results] == [(1, "F1"), (3, "F3")]
+    assert sorted(os.listdir(tmp_path)) == ["selected_1.svg", "selected_3.svg"]
+
+def test_render_async_workers_cache(tmp_path):
+    # Test rendering in worker processes, with figures restored from the cache on the second run
+    filename = _write(tmp_path / "data.json", 4)
+    out = str(tmp_path / "out")
+
+    async def run():
+        cache = RenderCache(str(tmp_path / "cache"))
+        return await render_async(filename, out, [FigType.PNG], workers=2, cache=cache)
+
+    first = asyncio.run(run())
+    os.remove(os.path.join(out, "async_2.png"))
+    second = asyncio.run(run())
+    assert [result.index for result in first] == [0, 1, 2, 3]
+    assert [result.warning for result in second] == [result.warning for result in first]
+    assert sorted(os.listdir(out)) == [f"async_{i}.png" for i in range(4)]
+
+def test_render_async_early_exit(tmp_path):
+    # Test that leaving the iteration stops the rendering
+    filename = _write(tmp_path / "data.json", 6)
+
+    async def run():
+        async for result in render_async(filename, str(tmp_path / "out")):
+            return result
+
+    assert isinstance(asyncio.run(run()), FigureResult)
+    assert len(os.listdir(tmp_path / "out")) < 6
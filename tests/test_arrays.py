@@ -0,0 +1,62 @@
+import json
+import numpy as np
+import pytest
+from plotish import DataSet, LineInterface
+from plotish.interfaces.arrays import load_array
+
+
+def test_load_npy(tmp_path):
+    # Test that .npy files are memory-mapped
+    np.save(tmp_path / "y.npy", np.arange(10.0))
+    array = load_array({"file": "y.npy"}, str(tmp_path))
+
+    assert isinstance(array, np.memmap)
+    assert array.tolist() == list(range(10))
+
+def test_load_npz_member(tmp_path):
+    # Test that stored .npz members are memory-mapped and compressed ones are read
+    np.savez(tmp_path / "stored.npz", x=np.arange(5.0), y=np.arange(5.0) ** 2)
+    np.savez_compressed(tmp_path / "packed.npz", y=np.arange(5.0) ** 2)
+
+    stored = load_array({"file": "stored.npz", "key": "y"}, str(tmp_path))
+    packed = load_array({"file": "packed.npz", "key": "y"}, str(tmp_path))
+
+    assert isinstance(stored, np.memmap)
+    assert stored.tolist() == [0, 1, 4, 9, 16]
+    assert packed.tolist() == [0, 1, 4, 9, 16]
+    with pytest.raises(Exception):
+        load_array({"file": "stored.npz"}, str(tmp_path))
+
+def test_load_raw_buffer(tmp_path):
+    # Test a raw buffer with a header to skip
+    path = tmp_path / "raw.bin"
+    path.write_bytes(b"HEADER__" + np.arange(6, dtype="<f4").tobytes())
+    array = load_array({"file": str(path), "dtype": "<f4", "offset": 8, "count": 4})
+
+    assert array.dtype == np.float32
+    assert array.tolist() == [0, 1, 2, 3]
+
+def test_line_interface_zero_copy(tmp_path):
+    # Test that sidecar arrays are used without copy, keeping their floating point type
+    np.save(tmp_path / "y.npy", np.arange(10, dtype=np.float32))
+    line = LineInterface({"ydata": {"file": "y.npy"}}, root=str(tmp_path))
+
+    assert line._ydata.dtype == np.float32
+    assert not line._ydata.flags.owndata
+    assert line.data.tolist() == [list(range(10)), list(range(10))]
+
+def test_dataset_sidecar_relative_path(tmp_path):
+    # Test that references are resolved against the folder of the JSON file
+    np.save(tmp_path / "x.npy", np.arange(3.0))
+    np.savez(tmp_path / "lines.npz", y=np.array([4.0, 5.0, 6.0]))
+    dataset = {"name": "sidecar", "data": [{"lines": [
+        {"xdata": {"file": "x.npy"}, "ydata": {"file": "lines.npz", "key": "y"}}
+    ]}]}
+    filename = tmp_path / "data.json"
+    filename.write_text(json.dumps(dataset))
+
+    for stream in (False, True):
+        ds = DataSet()
+        ds.load_file(str(filename), stream=stream)
+        line = list(ds.data)[0].lines[0]
+        assert line.data.tolist() == [[0, 1, 2], [4, 5, 6]]
@@ -0,0 +1,129 @@
+import os
+from plotish import Plottish, FigType, DataSet, FigureInterface
+from plotish.cache import RenderCache
+
+
+def _figure(i, offset=0):
+    return FigureInterface({
+        "title": f"Figure {i}",
+        # An invalid legend position produces a warning for the second figure
+        "legend_position": "nowhere" if i == 1 else "best",
+        "lines": [{"xdata": [0, 1, 2], "ydata": [i, i + 1, i * 2 + offset], "legend": "line"}]
+    })
+
+def _dataset(n, offset=0):
+    ds = DataSet()
+    ds.load("Cached dataset", "2024-01-01", "cached", [_figure(i, offset) for i in range(n)])
+    return ds
+
+def _no_render(self, fi):
+    raise AssertionError(f"{fi.title} was rendered again")
+
+def test_cache_skips_unchanged_figures(tmp_path, monkeypatch):
+    # Test that a second run restores the warnings without making any figure
+    out = tmp_path / "out"
+    out.mkdir()
+    cache = RenderCache(str(tmp_path / "cache"))
+    first = Plottish(str(out), [FigType.PNG, FigType.SVG], _dataset(3), cache=cache).plot()
+
+    monkeypatch.setattr(Plottish, "make_fig", _no_render)
+    cache = RenderCache(str(tmp_path / "cache"))
+    second = Plottish(str(out), [FigType.PNG, FigType.SVG], _dataset(3), cache=cache).plot()
+
+    assert second == first
+    assert first[1] != "OK"
+
+def test_cache_renders_changed_figures(tmp_path):
+    # Test that only the figures whose data changed are rendered again
+    out = tmp_path / "out"
+    out.mkdir()
+    Plottish(str(out), [FigType.PNG], _dataset(3), cache=RenderCache(str(tmp_path / "cache"))).plot()
+
+    rendered = []
+    pl = Plottish(str(out), [FigType.PNG], _dataset(3, offset=1), cache=RenderCache(str(tmp_path / "cache")))
+    make_fig = pl.make_fig
+    pl.make_fig = lambda fi: rendered.append(fi.title) or make_fig(fi)
+    pl.plot()
+
+    # ydata[2] = 2 * i + offset: every figure changed
+    assert rendered == ["Figure 0", "Figure 1", "Figure 2"]
+
+    rendered.clear()
+    pl.plot()
+    assert rendered == []
+
+def test_cache_restores_deleted_and_modified_outputs(tmp_path, monkeypatch):
+    # Test that outputs removed or overwritten since the last run are copied back from the cache
+    out = tmp_path / "out"
+    out.mkdir()
+    Plottish(str(out), [FigType.PNG], _dataset(2), cache=RenderCache(str(tmp_path / "cache"), copies=True)).plot()
+    expected = (out / "cached_1.png").read_bytes()
+
+    os.remove(out / "cached_0.png")
+    (out / "cached_1.png").write_bytes(b"not a png")
+
+    monkeypatch.setattr(Plottish, "make_fig", _no_render)
+    Plottish(str(out), [FigType.PNG], _dataset(2), cache=RenderCache(str(tmp_path / "cache"), copies=True)).plot()
+
+    assert (out / "cached_0.png").exists()
+    assert (out / "cached_1.png").read_bytes() == expected
+
+def test_cache_without_copies(tmp_path):
+    # Test that the default cache keeps no copy and renders removed or overwritten outputs again
+    out = tmp_path / "out"
+    out.mkdir()
+    Plottish(str(out), [FigType.PNG], _dataset(2), cache=RenderCache(str(tmp_path / "cache"))).plot()
+    expected = (out / "cached_1.png").read_bytes()
+
+    assert not (tmp_path / "cache" / "blobs").exists()
+    os.remove(out / "cached_0.png")
+    (out / "cached_1.png").write_bytes(b"not a png")
+
+    rendered = []
+    pl = Plottish(str(out), [FigType.PNG], _dataset(2), cache=RenderCache(str(tmp_path / "cache")))
+    make_fig = pl.make_fig
+    pl.make_fig = lambda fi: rendered.append(fi.title) or make_fig(fi)
+    pl.plot()
+
+    assert rendered == ["Figure 0", "Figure 1"]
+    assert (out / "cached_1.png").read_bytes() == expected
+
+def test_cache_key_depends_on_settings():
+    # Test that the figure type and rendering options are part of the key
+    fi = _figure(0)
+    pl = Plottish("out", [FigType.PNG], _dataset(1))
+    downsampled = Plottish("out", [FigType.PNG], _dataset(1), downsample="lttb")
+
+    assert pl.cache_key(fi, FigType.PNG) == pl.cache_key(_figure(0), FigType.PNG)
+    assert pl.cache_key(fi, FigType.PNG) != pl.cache_key(fi, FigType.SVG)
+    assert pl.cache_key(fi, FigType.PNG) != downsampled.cache_key(fi, FigType.PNG)
+    assert pl.cache_key(fi, FigType.PNG) != pl.cache_key(_figure(0, offset=1), FigType.PNG)
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    # Test that copies above the size limit are evicted, oldest first
+    out = tmp_path / "out"
+    out.mkdir()
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=1, copies=True)
+    Plottish(str(out), [FigType.PNG], _dataset(3), cache=cache).plot()
+
+    blobs = [f for _, _, files in os.walk(tmp_path / "cache" / "blobs") for f in files]
+    assert blobs == []
+    # Evicted figures are rendered again
+    os.remove(out / "cached_0.png")
+    cache = RenderCache(str(tmp_path / "cache"))
+    pl = Plottish(str(out), [FigType.PNG], _dataset(3), cache=cache)
+    assert pl._restore(0, _figure(0), [FigType.PNG]) == ([FigType.PNG], None)
+
+def test_cache_parallel(tmp_path, monkeypatch):
+    # Test that the parallel mode uses and updates the cache of the parent process
+    out = tmp_path / "out"
+    out.mkdir()
+    first = Plottish(str(out), [FigType.PNG], _dataset(4), workers=2,
+                     cache=RenderCache(str(tmp_path / "cache"))).plot()
+
+    monkeypatch.setattr(Plottish, "make_fig", _no_render)
+    second = Plottish(str(out), [FigType.PNG], _dataset(4), workers=2,
+                      cache=RenderCache(str(tmp_path / "cache"))).plot()
+
+    assert second == first
+    assert sorted(os.listdir(out)) == [f"cached_{i}.png" for i in range(4)]
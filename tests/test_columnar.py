@@ -0,0 +1,131 @@
+import numpy
+import pytest
+from plotish import DataSet, FigType, Plottish
+from plotish.columnar import ColumnarFile, detect, write_columnar
+from plotish.dataset import ColumnarFigures
+from plotish.profiling import Profiler
+
+FORMATS = [
+    ("data.parquet", "parquet", "pyarrow"),
+    ("data.arrow", "arrow", "pyarrow"),
+    ("data.h5", "hdf5", "h5py"),
+]
+
+
+def _document():
+    x = numpy.linspace(0, 1, 1000)
+    return {
+        "name": "columnar",
+        "date": "01/02/2024",
+        "description": "Lines in columns",
+        "data": [
+            {"title": "Full", "xlabel": "t", "lines": [
+                {"xdata": x, "ydata": numpy.sin(x), "legend": "sin", "color": "red", "style": "--"},
+                {"ydata": numpy.cos(x).astype(numpy.float32), "legend": "cos"},
+            ]},
+            {"title": "Short", "lines": [{"xdata": [0, 1, 2], "ydata": [3, 4, 5]}]},
+        ],
+    }
+
+@pytest.mark.parametrize("name,format,module", FORMATS)
+def test_load_columnar(tmp_path, name, format, module):
+    # Test that a columnar file maps onto the figures and lines of the dataset
+    pytest.importorskip(module)
+    filename = str(tmp_path / name)
+    write_columnar(filename, _document())
+    assert detect(filename) == format
+
+    ds = DataSet()
+    ds.load_columnar(filename)
+    assert (ds.name, ds.date, ds.description) == ("columnar", "01/02/2024", "Lines in columns")
+    assert isinstance(ds.data, ColumnarFigures)
+    full, short = ds.data
+    assert full.title == "Full"
+    assert full.lines[0].kwargs["color"] == "red"
+    assert numpy.array_equal(full.lines[0].data[1], numpy.sin(numpy.linspace(0, 1, 1000)))
+    assert full.lines[1]._ydata.dtype == numpy.float32
+    assert numpy.array_equal(full.lines[1].data[0], numpy.arange(1000))
+    assert short.lines[0].data.tolist() == [[0, 1, 2], [3, 4, 5]]
+
+@pytest.mark.parametrize("name,format,module", FORMATS)
+def test_columnar_reads_selected_figures(tmp_path, name, format, module):
+    # Test that only the columns of the selected figures are read
+    pytest.importorskip(module)
+    filename = str(tmp_path / name)
+    write_columnar(filename, _document())
+    ds = DataSet()
+    profiler = Profiler()
+    ds.add_listener(profiler)
+    ds.load_columnar(filename)
+    ds.select(["Short"])
+
+    assert [(i, fi.title) for i, fi in ds.items()] == [(1, "Short")]
+    reads = [event for event in profiler.events if event.stage == "read" and event.figure is not None]
+    assert [event.figure for event in reads] == [1]
+
+def test_columnar_zero_copy(tmp_path):
+    # Test that uncompressed Arrow IPC and HDF5 columns are used without copy
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("h5py")
+    for name in ("data.arrow", "data.h5"):
+        filename = str(tmp_path / name)
+        write_columnar(filename, _document())
+        with ColumnarFile(filename) as source:
+            array = source.read({"y": (0, 1000)})["y"]
+        assert not array.flags.owndata
+        assert numpy.array_equal(array, numpy.sin(numpy.linspace(0, 1, 1000)))
+
+@pytest.mark.parametrize("name,format,module", FORMATS)
+def test_columnar_shared_columns(tmp_path, name, format, module):
+    # Test that the lines share a column per axis instead of being padded to the longest one
+    pytest.importorskip(module)
+    filename = str(tmp_path / name)
+    lines = [{"xdata": numpy.arange(100000.0), "ydata": numpy.zeros(100000)}]
+    lines += [{"xdata": [0, 1], "ydata": [float(k), k + 1.0]} for k in range(200)]
+    write_columnar(filename, {"name": "shared", "data": [{"title": "Many", "lines": lines}]})
+    # Two columns of 100400 float64, where padding would store 201 columns of 100000
+    assert (tmp_path / name).stat().st_size < 2 * 100400 * 8 + 100000
+
+    ds = DataSet()
+    ds.load_columnar(filename)
+    fi = ds.data[0]
+    assert len(fi.lines) == 201
+    assert fi.lines[0].data.shape == (2, 100000)
+    assert fi.lines[200].data.tolist() == [[0, 1], [199, 200]]
+    ds.close()
+
+@pytest.mark.parametrize("name,format,module", FORMATS)
+def test_columnar_close(tmp_path, name, format, module):
+    # Test that closing a columnar dataset closes its file and keeps the figures built
+    pytest.importorskip(module)
+    filename = str(tmp_path / name)
+    write_columnar(filename, _document())
+    ds = DataSet()
+    ds.load_columnar(filename)
+    short = ds.data[1]
+    ds.close()
+    assert short.lines[0].data.tolist() == [[0, 1, 2], [3, 4, 5]]
+    if format == "hdf5":
+        assert not ds.data._source._handle
+    if format == "arrow":
+        assert ds.data._source._mmap.closed
+
+def test_columnar_plot(tmp_path):
+    # Test that a columnar dataset is rendered like a JSON one
+    pytest.importorskip("pyarrow")
+    filename = str(tmp_path / "data.parquet")
+    write_columnar(filename, _document(), compression="zstd")
+    ds = DataSet()
+    ds.load_columnar(filename)
+    Plottish(str(tmp_path), [FigType.SVG], ds).plot()
+    assert (tmp_path / "columnar_0.svg").exists() and (tmp_path / "columnar_1.svg").exists()
+
+def test_columnar_errors(tmp_path):
+    # Test that unknown formats are reported
+    path = tmp_path / "data.json"
+    path.write_text("{}")
+    assert detect(str(path)) is None
+    with pytest.raises(Exception):
+        ColumnarFile(str(path))
+    with pytest.raises(Exception):
+        write_columnar(str(tmp_path / "data.csv"), _document())
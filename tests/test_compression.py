@@ -0,0 +1,64 @@
+import bz2
+import gzip
+import json
+import lzma
+import numpy
+import pytest
+from plotish import DataSet, FigType
+from plotish.compression import detect, open_input
+from plotish.watch import Watcher
+
+
+def _document(figures=3):
+    x = numpy.linspace(0, 1, 2000)
+    return {
+        "name": "compressed",
+        "description": "A compressed dataset",
+        "data": [{"title": f"Figure {i}", "lines": [{"xdata": x.tolist(), "ydata": (x * i).tolist()}]}
+                 for i in range(figures)],
+    }
+
+def _write(path, compress, document):
+    path.write_bytes(compress(json.dumps(document).encode("utf-8")))
+    return str(path)
+
+@pytest.mark.parametrize("compress,name", [(gzip.compress, "gzip"), (bz2.compress, "bz2"), (lzma.compress, "xz")])
+@pytest.mark.parametrize("mode", [{}, {"lazy": True}, {"stream": True}])
+def test_load_compressed(tmp_path, compress, name, mode):
+    # Test that compressed files are decompressed while they are loaded, in every loading mode
+    filename = _write(tmp_path / "data.json.z", compress, _document())
+    assert detect(filename) == name
+
+    ds = DataSet()
+    ds.load_file(filename, **mode)
+    assert ds.name == "compressed"
+    assert len(ds.data) == 3
+    figures = list(ds.data)
+    assert [fi.title for fi in figures] == ["Figure 0", "Figure 1", "Figure 2"]
+    assert numpy.allclose(figures[2].lines[0].data[1][-1], 2.0)
+
+def test_detect_from_content(tmp_path):
+    # Test that the format comes from the content of the file and not from its extension
+    plain = tmp_path / "data.json.gz"
+    plain.write_text(json.dumps(_document(1)))
+    assert detect(str(plain)) is None
+    packed = _write(tmp_path / "data.json", gzip.compress, _document(1))
+    with open_input(packed) as f:
+        assert json.load(f)["name"] == "compressed"
+
+def test_load_zstd(tmp_path):
+    # Test that zstd files are read when a zstd module is installed
+    zstandard = pytest.importorskip("zstandard")
+    filename = _write(tmp_path / "data.json.zst", zstandard.ZstdCompressor().compress, _document())
+    assert detect(filename) == "zstd"
+    ds = DataSet()
+    ds.load_file(filename, stream=True)
+    assert [fi.title for fi in ds.data] == ["Figure 0", "Figure 1", "Figure 2"]
+
+def test_watch_compressed(tmp_path):
+    # Test that watch mode reads compressed files
+    filename = _write(tmp_path / "data.json.xz", lzma.compress, _document(2))
+    out = tmp_path / "out"
+    out.mkdir()
+    watcher = Watcher(filename, str(out), [FigType.SVG])
+    assert [i for i, _ in watcher.poll()] == [0, 1]
@@ -78,3 +78,43 @@ def test_dataset_load_file_nonexistent_file():
 #     assert len(data) == 1
 #     assert isinstance(data[0], FigureInterface)
 
+
+def test_dataset_load_file_lazy(test_dataset_file):
+    # Test that figures are only built when accessed, and cached
+    dataset_instance = DataSet()
+    dataset_instance.load_file(test_dataset_file, lazy=True)
+
+    assert len(dataset_instance.data) == 1
+    assert len(dataset_instance.data._cache) == 0
+    fig = dataset_instance.data[0]
+    assert isinstance(fig, FigureInterface)
+    assert dataset_instance.data[-1] is fig
+    assert [f.title for f in dataset_instance.data] == ["test"]
+    with pytest.raises(IndexError):
+        dataset_instance.data[1]
+
+def test_lazy_figures_cache_size():
+    # Test the least-recently-used eviction of built figures
+    from plotish.dataset import LazyFigures
+    raw = [{"title": str(i), "lines": [{"ydata": [i]}]} for i in range(5)]
+    figures = LazyFigures(raw, cache_size=2)
+
+    first = figures[0]
+    figures[1]
+    assert figures[0] is first
+    figures[2]
+    assert list(figures._cache) == [0, 2]
+    assert figures.title(4) == "4"
+
+def test_dataset_select():
+    # Test selecting figures by index or title, keeping their dataset index
+    from plotish.dataset import LazyFigures
+    raw = [{"title": f"t{i}", "lines": [{"ydata": [i]}]} for i in range(4)]
+
+    for data in ([FigureInterface(f) for f in raw], LazyFigures(raw)):
+        dataset_instance = DataSet()
+        dataset_instance.load("", "", "sel", data)
+        dataset_instance.select(["1", "t3"])
+        assert [(i, f.title) for i, f in dataset_instance.items()] == [(1, "t1"), (3, "t3")]
+        dataset_instance.select(None)
+        assert len(list(dataset_instance.items())) == 4
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from plotish import Plottish, FigType, DataSet, FigureInterface
+from plotish.decimation import decimate, resolve
+
+
+def test_resolve_options():
+    # Test the interpretation of the JSON options
+    assert resolve(None, 100) is None
+    assert resolve(False, 100) is None
+    assert resolve("none", 100) is None
+    assert resolve(True, 100) == ("minmax", 100)
+    assert resolve("lttb", 100) == ("lttb", 100)
+    assert resolve({"method": "lttb", "points": 50}, 100) == ("lttb", 50)
+    assert resolve({"points": 50}, 100) == ("minmax", 50)
+
+    with pytest.raises(Exception):
+        resolve("unknown", 100)
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_decimate_reduces_points(method):
+    # Test that large lines are reduced to about the target point count
+    x = np.linspace(0, 10, 100_001)
+    y = np.sin(x)
+    xs, ys = decimate(x, y, method, 1000)
+
+    assert len(xs) == len(ys)
+    assert len(xs) <= 1002
+    assert xs[0] == x[0] and xs[-1] == x[-1]
+    assert np.all(np.diff(xs) > 0)
+
+def test_decimate_minmax_keeps_peaks():
+    # Test that isolated peaks survive the minmax downsampling
+    rng = np.random.default_rng(0)
+    x = np.arange(1_000_000, dtype=float)
+    y = rng.normal(size=x.size)
+    y[123_457] = 100.0
+    y[876_543] = -100.0
+    xs, ys = decimate(x, y, "minmax", 500)
+
+    assert ys.max() == 100.0
+    assert ys.min() == -100.0
+    assert 123_457.0 in xs and 876_543.0 in xs
+
+def test_decimate_minmax_nan():
+    # Test that a bucket partly NaN keeps its peaks and a NaN breaking the line
+    x = np.arange(100_000, dtype=float)
+    y = np.sin(x / 1000)
+    y[40_000:40_050] = np.nan
+    y[40_100] = 50.0
+    y[39_990] = -50.0
+    y[90_000:] = np.nan
+    xs, ys = decimate(x, y, "minmax", 100)
+
+    assert np.nanmax(ys) == 50.0 and np.nanmin(ys) == -50.0
+    assert np.isnan(ys[(xs >= 40_000) & (xs < 40_050)]).any()
+    assert np.isnan(ys[xs >= 90_000]).all()
+
+def test_decimate_unchanged():
+    # Test that small or unsorted lines are returned unchanged
+    x = np.arange(10.0)
+    assert decimate(x, x, "minmax", 100)[0] is x
+    unsorted = np.random.default_rng(0).random(1000)
+    assert decimate(unsorted, unsorted, "minmax", 100)[0] is unsorted
+
+def test_make_fig_downsample_line(tmp_path):
+    # Test that the option of a line overrides the one of the figure
+    x = list(range(100_000))
+    figure = FigureInterface({
+        "downsample": {"method": "minmax", "points": 1000},
+        "lines": [
+            {"xdata": x, "ydata": x},
+            {"xdata": x, "ydata": x, "downsample": False},
+        ]
+    })
+    ds = DataSet()
+    ds.load("", "", "ds", [figure])
+    fig, warn = Plottish(str(tmp_path), [FigType.PNG], ds).make_fig(figure)
+    lines = fig.axes[0].get_lines()
+
+    assert len(lines[0].get_xdata()) <= 1000
+    assert len(lines[1].get_xdata()) == 100_000
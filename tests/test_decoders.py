@@ -0,0 +1,55 @@
+import json
+import numpy
+import pytest
+from plotish import DataSet
+from plotish.decoders import available, decode
+
+
+def _document():
+    x = numpy.linspace(0, 1, 200)
+    return {
+        "name": "decoded",
+        "description": "Line keys in a string: \"xdata\": [1, 2, 3]",
+        "data": [{
+            "title": "[1, 2, 3]",
+            "lines": [
+                {"xdata": x.tolist(), "ydata": (x * 1e-7 - 3).tolist(), "legend": "long"},
+                {"xdata": [0, 1], "ydata": [1, 2], "legend": "short"},
+            ],
+        }],
+    }
+
+@pytest.mark.parametrize("decoder", [d for d in available() if d != "pandas"])
+def test_decode_arrays(decoder):
+    # Test that long line arrays are decoded into NumPy arrays with the values of the JSON parser
+    text = json.dumps(_document())
+    expected = json.loads(text)
+    document = decode(text, decoder)
+
+    long, short = document["data"][0]["lines"]
+    assert isinstance(long["ydata"], numpy.ndarray)
+    assert long["ydata"].tolist() == expected["data"][0]["lines"][0]["ydata"]
+    assert short["ydata"] == [1, 2]
+    assert document["description"] == expected["description"]
+    assert document["data"][0]["title"] == "[1, 2, 3]"
+
+def test_decode_without_arrays():
+    # Test that the fast path can be disabled, and malformed arrays are left to the JSON parser
+    text = json.dumps(_document())
+    assert decode(text, "json", arrays=False) == json.loads(text)
+    with pytest.raises(ValueError):
+        decode('{"data": [{"lines": [{"ydata": [' + "1, " * 400 + ', 2]}]}]}', "json")
+
+def test_decode_unknown():
+    # Test that an unknown decoder is reported
+    with pytest.raises(Exception, match="Unknown JSON decoder"):
+        decode("{}", "yaml")
+
+@pytest.mark.parametrize("decoder", available())
+def test_dataset_decoders(test_dataset_file, decoder):
+    # Test that every decoder loads the same dataset
+    ds = DataSet()
+    ds.load_file(test_dataset_file, decoder=decoder)
+    assert ds.name == "example"
+    assert ds.date == "05/02/2023"
+    assert ds.data[0].lines[0].data.shape == (2, 11)
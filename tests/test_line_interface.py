@@ -30,3 +30,37 @@ def test_line_interface_no_ydata():
     with pytest.raises(Exception):
         LineInterface(line_data)
 
+
+def test_line_interface_buffers():
+    # Test that the data is stored as contiguous float64 buffers shared with the combined data
+    import numpy as np
+    line_instance = LineInterface({"xdata": [1, 2, 3], "ydata": [4, 5, 6]})
+
+    assert line_instance._xdata.dtype == np.float64
+    assert line_instance._xdata.flags.c_contiguous
+    assert line_instance._ydata.flags.c_contiguous
+    assert line_instance.data is line_instance.data
+    assert np.shares_memory(line_instance.data, line_instance._ydata)
+    assert not hasattr(line_instance, "__dict__")
+
+def test_line_interface_float32():
+    # Test the float32 option, from the argument or from the line
+    import numpy as np
+    assert LineInterface({"ydata": [1, 2]}, "float32")._ydata.dtype == np.float32
+    assert LineInterface({"ydata": [1, 2], "dtype": "float32"})._ydata.dtype == np.float32
+
+    with pytest.raises(Exception):
+        LineInterface({"ydata": [1, 2], "dtype": "int8"})
+
+def test_line_interface_no_xdata():
+    # Test that missing x data defaults to the indices of the y data
+    line_instance = LineInterface({"ydata": [4, 5, 6]})
+    assert line_instance.data.tolist() == [[0, 1, 2], [4, 5, 6]]
+
+def test_line_interface_length_mismatch():
+    # Test that x and y data of different lengths are rejected at load time
+    import numpy as np
+    with pytest.raises(Exception):
+        LineInterface({"xdata": [1, 2, 3], "ydata": [4, 5]})
+    with pytest.raises(Exception):
+        LineInterface({"xdata": np.arange(3), "ydata": np.arange(2)})
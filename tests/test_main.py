@@ -0,0 +1,79 @@
+import json
+import os
+import pytest
+from plotish.__main__ import main
+
+
+def _write(path, name, n=1):
+    data = [{"title": f"Figure {i}", "lines": [{"xdata": [0, 1, 2], "ydata": [i, i + 1, i]}]} for i in range(n)]
+    with open(path, "w") as f:
+        json.dump({"name": name, "date": "2024-01-01", "description": name, "data": data}, f)
+
+def _run(*args):
+    argv = ["__main__.py", *args, "-t", "png", "--no-cache"]
+    main(len(argv), argv)
+
+def test_main_outfolder_positional(tmp_path):
+    # Test that the former 'FILE OUTFOLDER' form still sets the output folder
+    _write(tmp_path / "a.json", "a", 2)
+    _run(str(tmp_path / "a.json"), str(tmp_path / "plots"))
+
+    assert sorted(os.listdir(tmp_path / "plots")) == ["a_0.png", "a_1.png"]
+
+def test_main_batch_globs_and_manifest(tmp_path):
+    # Test that globs and manifest entries are rendered in one run, each file in its own subfolder
+    (tmp_path / "runs").mkdir()
+    _write(tmp_path / "runs" / "a.json", "a")
+    _write(tmp_path / "runs" / "b.json", "b")
+    _write(tmp_path / "c.json", "c")
+    (tmp_path / "list.txt").write_text("# extra files\nc.json\n\nruns/a.json\n")
+
+    _run(str(tmp_path / "runs" / "*.json"), "@" + str(tmp_path / "list.txt"), "-o", str(tmp_path / "out"))
+
+    assert sorted(os.listdir(tmp_path / "out")) == ["c", "runs"]
+    assert sorted(os.listdir(tmp_path / "out" / "runs")) == ["a", "b"]
+    assert os.listdir(tmp_path / "out" / "c") == ["c_0.png"]
+
+def test_main_batch_same_file_names(tmp_path, capsys):
+    # Test that files of the same name in different folders get their own output folders
+    for run in ("a", "b"):
+        (tmp_path / "runs" / run).mkdir(parents=True)
+        _write(tmp_path / "runs" / run / "data.json", "data")
+    _write(tmp_path / "runs" / "a" / "data.txt", "data")
+
+    with pytest.raises(SystemExit):
+        _run(str(tmp_path / "runs" / "*" / "data.*"), "-o", str(tmp_path / "out"))
+
+    assert os.listdir(tmp_path / "out" / "a" / "data") == ["data_0.png"]
+    assert os.listdir(tmp_path / "out" / "b" / "data") == ["data_0.png"]
+    out = capsys.readouterr().out
+    assert "2 of 3 files rendered" in out
+    assert "data.txt: its output folder" in out
+
+def test_main_batch_collects_errors(tmp_path, capsys):
+    # Test that a failing file does not stop the other ones and sets the exit status
+    _write(tmp_path / "a.json", "a")
+    (tmp_path / "broken.json").write_text("{not json")
+    _write(tmp_path / "z.json", "z")
+
+    with pytest.raises(SystemExit) as e:
+        _run(str(tmp_path / "a.json"), str(tmp_path / "broken.json"), str(tmp_path / "missing_*.json"),
+             str(tmp_path / "z.json"), "-o", str(tmp_path / "out"))
+
+    assert e.value.code == 1
+    assert sorted(os.listdir(tmp_path / "out")) == ["a", "broken", "z"]
+    assert os.listdir(tmp_path / "out" / "z") == ["z_0.png"]
+    out = capsys.readouterr().out
+    assert "2 of 3 files rendered" in out
+    assert "missing_*.json" in out
+
+def test_main_columnar_input(tmp_path):
+    # Test that Parquet inputs are detected and loaded as columnar datasets
+    pytest.importorskip("pyarrow")
+    from plotish.columnar import write_columnar
+    _write(tmp_path / "a.json", "a", 2)
+    with open(tmp_path / "a.json") as f:
+        write_columnar(str(tmp_path / "a.parquet"), json.load(f))
+    _run(str(tmp_path / "a.parquet"), "-f", "1", "-o", str(tmp_path / "plots"))
+
+    assert os.listdir(tmp_path / "plots") == ["a_1.png"]
@@ -0,0 +1,74 @@
+import os
+from plotish import Plottish, FigType, DataSet, FigureInterface
+
+
+def _dataset(n):
+    data = []
+    for i in range(n):
+        data.append(FigureInterface({
+            "title": f"Figure {i}",
+            # An invalid legend position produces a warning for the second figure
+            "legend_position": "nowhere" if i == 1 else "best",
+            "lines": [{"xdata": [0, 1, 2], "ydata": [i, i + 1, i * 2], "legend": "line"}]
+        }))
+    ds = DataSet()
+    ds.load("Parallel dataset", "2024-01-01", "par", data)
+    return ds
+
+def test_plot_parallel_matches_serial(tmp_path):
+    # Test that the parallel mode writes the same files and warnings as the serial mode
+    serial_dir = tmp_path / "serial"
+    parallel_dir = tmp_path / "parallel"
+    serial_dir.mkdir()
+    parallel_dir.mkdir()
+
+    serial = Plottish(str(serial_dir), [FigType.PNG], _dataset(4)).plot()
+    parallel = Plottish(str(parallel_dir), [FigType.PNG], _dataset(4), workers=2).plot()
+
+    assert parallel == serial
+    assert serial[0] == "OK"
+    assert serial[1] != "OK"
+    assert sorted(os.listdir(parallel_dir)) == sorted(os.listdir(serial_dir))
+    assert sorted(os.listdir(parallel_dir)) == [f"par_{i}.png" for i in range(4)]
+
+def test_plot_parallel_pdf_pages(tmp_path):
+    # Test that the multi-page PDF is written by the parent process in dataset order
+    import re
+
+    Plottish(str(tmp_path), [FigType.PNG, FigType.PDF_PAGES], _dataset(3), workers=2).plot()
+
+    content = (tmp_path / "par.pdf").read_bytes()
+    assert len(re.findall(rb"/Type\s*/Page\b(?!s)", content)) == 3
+    assert (tmp_path / "par_2.png").exists()
+
+def test_plot_parallel_options(tmp_path, monkeypatch):
+    # Test that the rendering options of the instance are used by the workers
+    from concurrent.futures import ThreadPoolExecutor
+
+    exported = []
+    export = Plottish.export
+
+    def recorded(self, *args):
+        exported.append(self.overlap_writes)
+        export(self, *args)
+
+    monkeypatch.setattr(Plottish, "export", recorded)
+    with ThreadPoolExecutor(2) as pool:
+        Plottish(str(tmp_path), [FigType.PNG, FigType.SVG], _dataset(2), workers=2, pool=pool,
+                 overlap_writes=True).plot()
+
+    assert exported == [True, True]
+    assert sorted(os.listdir(tmp_path)) == ["par_0.png", "par_0.svg", "par_1.png", "par_1.svg"]
+
+def test_plot_parallel_shared_pool(tmp_path):
+    # Test that several datasets can be rendered by the same pool of workers
+    from plotish import parallel
+
+    with parallel.make_pool(2) as pool:
+        for name in ("first", "second"):
+            (tmp_path / name).mkdir()
+            warns = Plottish(str(tmp_path / name), [FigType.PNG], _dataset(2), workers=2, pool=pool).plot()
+            assert len(warns) == 2
+        # The pool is left running by Plottish
+        assert pool.submit(abs, -1).result() == 1
+    assert sorted(os.listdir(tmp_path / "second")) == ["par_0.png", "par_1.png"]
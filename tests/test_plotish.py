@@ -76,3 +76,213 @@ def test_plottish_init():
 #     # Check if the return value is as expected
 #     assert warnings == ["OK"]
 
+
+def test_plottish_plot_closes_figures(tmp_path, monkeypatch):
+    # Test that memory stays flat when rendering 1,000 figures
+    import gc
+    import os
+    import matplotlib
+    import matplotlib.pyplot as plt
+    import plotish
+    from matplotlib.figure import Figure
+
+    if not os.path.exists("/proc/self/statm"):
+        pytest.skip("the resident set size is read from /proc")
+
+    def rss():
+        # The current resident set size, unlike ru_maxrss which only grows
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    line = {"xdata": [0, 1, 2], "ydata": [0, 1, 0]}
+    data = [FigureInterface({"title": f"F{i}", "lines": [line]}) for i in range(1000)]
+    ds = DataSet()
+    ds.load("Many figures", "2022-01-01", "many", data)
+    plottish_instance = Plottish(str(tmp_path), [FigType.PNG], ds)
+    # Small figures without ticks are cheap to draw
+    monkeypatch.setattr(plotish, "DPI", 10)
+
+    plt.close("all")
+    # e.g. the figure kept by a template test
+    gc.collect()
+    kept = {id(o) for o in gc.get_objects() if isinstance(o, Figure)}
+    cheap = {"figure.figsize": (1, 1), "xtick.bottom": False, "ytick.left": False,
+             "xtick.labelbottom": False, "ytick.labelleft": False}
+    with matplotlib.rc_context(cheap):
+        for i, fig in enumerate(data[:100]):
+            plottish_instance.render(i, fig)
+        gc.collect()
+        warm = rss()
+        for i, fig in enumerate(data[100:], 100):
+            plottish_instance.render(i, fig)
+        gc.collect()
+        end = rss()
+
+    assert plt.get_fignums() == []
+    assert len(list(tmp_path.glob("*.png"))) == 1000
+    assert not [o for o in gc.get_objects() if isinstance(o, Figure) and id(o) not in kept]
+    # 900 leaked figures take over 400 MB
+    assert end - warm < 32 * 1024 * 1024
+
+def test_plottish_plot_keeps_shown_figures(tmp_path, sample_dataset, monkeypatch):
+    # Test that figures requested for display are kept open
+    import matplotlib.pyplot as plt
+
+    monkeypatch.setattr(plt, "show", lambda: None)
+    plt.close("all")
+    plottish_instance = Plottish(str(tmp_path), [FigType.SHOW], sample_dataset)
+    plottish_instance.plot()
+
+    assert len(plt.get_fignums()) == 2
+    plt.close("all")
+
+def test_plottish_render_threads(tmp_path, sample_dataset):
+    # Test that figures rendered concurrently from several threads match the serial output
+    from concurrent.futures import ThreadPoolExecutor
+
+    serial_dir = tmp_path / "serial"
+    threaded_dir = tmp_path / "threaded"
+    serial_dir.mkdir()
+    threaded_dir.mkdir()
+    figures = list(sample_dataset.data) * 4
+
+    serial = Plottish(str(serial_dir), [FigType.PNG], sample_dataset)
+    for i, fig in enumerate(figures):
+        serial.render(i, fig)
+
+    threaded = Plottish(str(threaded_dir), [FigType.PNG], sample_dataset)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        warns = list(pool.map(threaded.render, range(len(figures)), figures))
+
+    assert warns == ["OK"] * len(figures)
+    for i in range(len(figures)):
+        expected = (serial_dir / f"Test_{i}.png").read_bytes()
+        assert (threaded_dir / f"Test_{i}.png").read_bytes() == expected
+
+def test_plottish_no_pyplot_import():
+    # Test that rendering files does not import pyplot
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, tempfile\n"
+        "from plotish import Plottish, FigType, DataSet, FigureInterface\n"
+        "ds = DataSet()\n"
+        "ds.load('', '', 't', [FigureInterface({'lines': [{'xdata': [0, 1], 'ydata': [1, 2]}]})])\n"
+        "Plottish(tempfile.mkdtemp(), [FigType.PNG], ds).plot()\n"
+        "assert 'matplotlib.pyplot' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_plottish_import_modules():
+    # Test that importing plotish and its command line does not import pandas, matplotlib or
+    # pyplot, nor the modules of the server and watch modes
+    import subprocess
+    import sys
+
+    code = (
+        "import sys\n"
+        "import plotish\n"
+        "assert plotish.__version__\n"
+        "assert not {'pandas', 'matplotlib', 'matplotlib.pyplot'} & set(sys.modules), sys.modules.keys()\n"
+        "import plotish.__main__\n"
+        "assert not {'pandas', 'matplotlib', 'plotish.server', 'plotish.watch'} & set(sys.modules)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_plottish_import_budget():
+    # Test that importing plotish and loading a dataset stay within the start-up budget of
+    # benchmarks/bench_import.py. The wall-clock time depends on the machine: the budget is four
+    # times the default one, the benchmark still fails whenever pandas or pyplot is imported
+    import os
+    import subprocess
+    import sys
+
+    bench = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "bench_import.py")
+    result = subprocess.run([sys.executable, bench, "--runs", "3", "--budget", "2000"], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
+
+def test_plottish_export_multiple_formats(tmp_path, sample_dataset):
+    # Test that the export with overlapped writes writes the same files as saving each format
+    looped_dir = tmp_path / "looped"
+    exported_dir = tmp_path / "exported"
+    looped_dir.mkdir()
+    exported_dir.mkdir()
+    types = [FigType.PNG, FigType.SVG]
+    fi = sample_dataset.data[0]
+
+    looped = Plottish(str(looped_dir), types, sample_dataset)
+    fig, _ = looped.make_fig(fi)
+    for fig_type in types:
+        looped.save(fig_type, 0, fig)
+
+    exported = Plottish(str(exported_dir), types, sample_dataset, overlap_writes=True)
+    fig, _ = exported.make_fig(fi)
+    exported.export(fig, 0)
+
+    assert (exported_dir / "Test_0.png").read_bytes() == (looped_dir / "Test_0.png").read_bytes()
+    assert (exported_dir / "Test_0.svg").stat().st_size > 0
+
+def test_plottish_native_pdf(tmp_path, sample_dataset):
+    # Test that the default PDF export does not need LaTeX
+    Plottish(str(tmp_path), [FigType.PDF], sample_dataset).plot()
+
+    for i in range(2):
+        assert (tmp_path / f"Test_{i}.pdf").read_bytes().startswith(b"%PDF")
+
+def test_plottish_pdf_latex_filename(tmp_path, sample_dataset):
+    # Test that the PDF typeset by LaTeX does not overwrite the native PDF
+    pl = Plottish(str(tmp_path), [FigType.PDF, FigType.PDF_LATEX], sample_dataset)
+
+    assert pl.outputs(1) == [f"{tmp_path}/Test_1.pdf", f"{tmp_path}/Test_1_latex.pdf"]
+
+def test_plottish_pdf_pages(tmp_path, sample_dataset):
+    # Test that every figure is written as a page of a single PDF file
+    import re
+
+    Plottish(str(tmp_path), [FigType.PDF_PAGES, FigType.PNG], sample_dataset).plot()
+
+    content = (tmp_path / "Test.pdf").read_bytes()
+    assert len(re.findall(rb"/Type\s*/Page\b(?!s)", content)) == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Test.pdf", "Test_0.png", "Test_1.png"]
+
+def test_plottish_line_collections(tmp_path, monkeypatch):
+    # Test that figures with many lines batch the lines without markers into one collection per style
+    import numpy
+    import plotish
+    from matplotlib.collections import LineCollection
+
+    lines = [{"ydata": [k, k + 1, numpy.nan, k + 2], "style": "--" if k % 2 else "-"} for k in range(6)]
+    lines[0]["legend"] = "first"
+    lines[3].update({"legend": "marked", "marker": "o"})
+    lines[4].update({"legend": "dashed", "color": "red"})
+    ds = DataSet()
+    ds.load("Test", "", "Many lines", [FigureInterface({"lines": lines, "legend_position": "best"})])
+    pl = Plottish(str(tmp_path), [FigType.PNG], ds)
+
+    monkeypatch.setattr(plotish, "COLLECTION_THRESHOLD", 3)
+    fig, warn = pl.make_fig(ds.data[0])
+    ax = fig.axes[0]
+    collections = [c for c in ax.collections if isinstance(c, LineCollection)]
+    assert warn == "OK"
+    assert len(collections) == 2 and len(ax.get_lines()) == 1
+    assert plotish._plotted_points(fig) == 6 * 4
+    assert [t.get_text() for t in ax.get_legend().get_texts()] == ["first", "marked", "dashed"]
+    assert ax.get_legend().legend_handles[2].get_color() == "red"
+    batched = ax.get_ylim()
+
+    monkeypatch.setattr(plotish, "COLLECTION_THRESHOLD", 100)
+    fig, _ = pl.make_fig(ds.data[0])
+    assert len(fig.axes[0].get_lines()) == 6
+    assert fig.axes[0].get_ylim() == pytest.approx(batched)
+
+def test_plottish_empty_line_collections(tmp_path, monkeypatch):
+    # Test that batching lines which are all empty makes an empty figure
+    import plotish
+
+    ds = DataSet()
+    ds.load("Test", "", "Empty lines", [FigureInterface({"lines": [{"xdata": [], "ydata": []} for _ in range(5)]})])
+    monkeypatch.setattr(plotish, "COLLECTION_THRESHOLD", 3)
+    fig, warn = Plottish(str(tmp_path), [FigType.PNG], ds).make_fig(ds.data[0])
+    assert warn == "OK"
+    assert plotish._plotted_points(fig) == 0
@@ -0,0 +1,76 @@
+import json
+import os
+from plotish import Plottish, FigType, DataSet
+from plotish.profiling import Profiler
+
+
+def _write(path, n):
+    data = [{"title": f"Figure {i}", "lines": [{"xdata": [0, 1, 2, 3], "ydata": [i, i + 1, i, i]}] * (i + 1)}
+            for i in range(n)]
+    with open(path, "w") as f:
+        json.dump({"name": "profiled", "data": data}, f)
+
+def test_profiler_stages(tmp_path):
+    # Test that loading and rendering report every stage with points and bytes
+    _write(tmp_path / "data.json", 2)
+    profiler = Profiler()
+    ds = DataSet()
+    ds.add_listener(profiler)
+    ds.load_file(str(tmp_path / "data.json"))
+    pl = Plottish(str(tmp_path), [FigType.PNG, FigType.SVG], ds)
+    pl.add_listener(profiler)
+    pl.plot()
+
+    stages = profiler.stages()
+    assert list(stages) == ["read", "build", "make_fig", "save_png", "save_svg"]
+    assert stages["read"]["bytes"] == os.path.getsize(tmp_path / "data.json")
+    assert stages["build"]["count"] == 2
+    assert stages["build"]["points"] == 4 + 8
+    assert stages["make_fig"]["points"] == 4 + 8
+    assert stages["save_png"]["bytes"] == sum(os.path.getsize(tmp_path / f"profiled_{i}.png") for i in range(2))
+    assert [e.figure for e in profiler.events if e.stage == "make_fig"] == [0, 1]
+    assert "save_svg" in profiler.summary()
+
+def test_profiler_lazy_build(tmp_path):
+    # Test that lazily built figures are reported when they are accessed
+    _write(tmp_path / "data.json", 3)
+    profiler = Profiler()
+    ds = DataSet()
+    ds.add_listener(profiler)
+    ds.load_file(str(tmp_path / "data.json"), lazy=True)
+    assert [e.stage for e in profiler.events] == ["read"]
+
+    ds.data[2]
+    assert [(e.stage, e.figure) for e in profiler.events] == [("read", None), ("build", 2)]
+
+def test_profiler_chrome_trace(tmp_path):
+    # Test that the trace holds one complete event per stage, in microseconds from the first one
+    _write(tmp_path / "data.json", 1)
+    profiler = Profiler()
+    ds = DataSet()
+    ds.add_listener(profiler)
+    ds.load_file(str(tmp_path / "data.json"))
+    pl = Plottish(str(tmp_path), [FigType.PNG], ds)
+    pl.add_listener(profiler)
+    pl.plot()
+    profiler.dump(str(tmp_path / "trace.json"))
+
+    with open(tmp_path / "trace.json") as f:
+        trace = json.load(f)["traceEvents"]
+    assert [event["name"] for event in trace] == ["read", "build 0", "make_fig 0", "save_png 0"]
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in trace)
+    assert trace[0]["ts"] == 0
+    assert trace[3]["args"]["bytes"] > 0
+
+def test_profiler_parallel(tmp_path):
+    # Test that the events of the worker processes are forwarded to the listeners
+    _write(tmp_path / "data.json", 3)
+    ds = DataSet()
+    ds.load_file(str(tmp_path / "data.json"))
+    profiler = Profiler()
+    pl = Plottish(str(tmp_path), [FigType.PNG], ds, workers=2)
+    pl.add_listener(profiler)
+    pl.plot()
+
+    assert [e.figure for e in profiler.events if e.stage == "make_fig"] == [0, 1, 2]
+    assert all(e.pid != os.getpid() for e in profiler.events)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from plotish import Plottish, FigType, DataSet, FigureInterface
+from plotish.raster import THRESHOLD, resolve
+
+
+def test_resolve_options():
+    # Test the interpretation of the JSON options
+    assert resolve(None, THRESHOLD + 1, True) == ("raster", 100)
+    assert resolve(None, THRESHOLD + 1, False) is None
+    assert resolve(None, THRESHOLD, True) is None
+    assert resolve(False, 10**9, True) is None
+    assert resolve("none", 10**9, True) is None
+    assert resolve(True, 10, False) == ("raster", 100)
+    assert resolve("hexbin", 10, True) == ("hexbin", 100)
+    assert resolve({"method": "hexbin", "points": 50, "gridsize": 20}, 100, True) == ("hexbin", 20)
+    assert resolve({"method": "hexbin", "points": 500}, 100, True) is None
+
+    with pytest.raises(Exception):
+        resolve("unknown", 100, True)
+
+def test_dense_markers_vector_outputs(tmp_path):
+    # Test that dense marker series keep the vector outputs small while the axes stay vector
+    rng = np.random.default_rng(0)
+    n = 50_000
+    lines = [{"xdata": rng.normal(size=n), "ydata": rng.normal(size=n), "marker": "o", "style": "None",
+              "legend": "points", "raster": raster} for raster in (False, None, "hexbin")]
+    ds = DataSet()
+    ds.load("Test", "", "Dense", [FigureInterface({"title": "Dense", "lines": [line]}) for line in lines])
+    pl = Plottish(str(tmp_path), [FigType.SVG], ds)
+    sizes = []
+    for i, fi in ds.items():
+        pl.render(i, fi)
+        sizes.append((tmp_path / f"Dense_{i}.svg").stat().st_size)
+
+    vector, rasterized, aggregated = sizes
+    assert rasterized * 20 < vector and aggregated * 5 < vector
+    assert b"<image" in (tmp_path / "Dense_1.svg").read_bytes()
+    assert b"Dense" in (tmp_path / "Dense_1.svg").read_bytes()
+
+def test_hexbin_legend(tmp_path):
+    # Test that an aggregated line keeps its legend entry and color
+    x = np.array([0.0, 1.0, np.nan, 2.0])
+    figure = FigureInterface({"legend_position": "best", "lines": [
+        {"xdata": x, "ydata": x, "marker": "x", "color": "red", "legend": "density", "raster": "hexbin"},
+    ]})
+    ds = DataSet()
+    ds.load("", "", "ds", [figure])
+    fig, warn = Plottish(str(tmp_path), [FigType.PNG], ds).make_fig(figure)
+    ax = fig.axes[0]
+
+    assert warn == "OK"
+    assert len(ax.collections) == 1 and len(ax.get_lines()[0].get_xdata()) == 0
+    assert [t.get_text() for t in ax.get_legend().get_texts()] == ["density"]
+    assert ax.get_legend().legend_handles[0].get_color() == "red"
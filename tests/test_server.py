@@ -0,0 +1,123 @@
+import json
+import os
+import socket
+import pytest
+from plotish.server import RenderServer, is_loopback, parse_address, request
+
+
+def _document(name, n=2):
+    data = [{"title": f"Figure {i}", "lines": [{"xdata": [0, 1, 2], "ydata": [i, i + 1, i]}]} for i in range(n)]
+    return {"name": name, "date": "2024-01-01", "description": name, "data": data}
+
+def test_server_renders_requests(tmp_path):
+    # Test that files and inline datasets are rendered and reported in the stats
+    path = tmp_path / "a.json"
+    path.write_text(json.dumps(_document("a")))
+    address = str(tmp_path / "plotish.sock")
+    with RenderServer(address, outfolder=str(tmp_path / "default")) as server:
+        server.start()
+        assert request(address, {"op": "health"})["status"] == "ok"
+
+        answer = request(address, {"file": str(path), "outfolder": str(tmp_path / "out"), "types": ["png", "svg"],
+                                   "figures": [1], "id": 7})
+        assert answer["ok"] and answer["id"] == 7
+        assert answer["outputs"] == [str(tmp_path / "out" / "a_1.png"), str(tmp_path / "out" / "a_1.svg")]
+        assert all(os.path.exists(output) for output in answer["outputs"])
+
+        answer = request(address, {"dataset": _document("b", 1), "types": ["pdf_pages"]})
+        assert answer["outputs"] == [str(tmp_path / "default" / "b.pdf")]
+        assert os.path.exists(answer["outputs"][0])
+
+        stats = request(address, {"op": "stats"})
+        assert stats["requests"]["completed"] == 2
+        assert stats["latency"]["render"]["count"] == 2
+        assert stats["latency"]["total"]["p99"] >= stats["latency"]["render"]["p50"]
+    assert not os.path.exists(address)
+
+def test_server_errors(tmp_path):
+    # Test that malformed requests and failures are answered without stopping the server
+    address = str(tmp_path / "plotish.sock")
+    with RenderServer(address) as server:
+        server.start()
+        assert request(address, {"op": "reload"})["status"] == "invalid"
+        assert request(address, {"outfolder": str(tmp_path)})["status"] == "invalid"
+        answer = request(address, {"file": str(tmp_path / "missing.json")})
+        assert answer["status"] == "error" and "missing.json" in answer["error"]
+        with socket.socket(socket.AF_UNIX) as sock:
+            sock.connect(address)
+            sock.sendall(b"{not json\n")
+            assert json.loads(sock.makefile("rb").readline())["status"] == "invalid"
+        assert request(address, {"op": "stats"})["requests"]["failed"] == 1
+
+def test_server_backpressure(tmp_path):
+    # Test that requests time out in the queue and are rejected once the queue is full
+    server = RenderServer(str(tmp_path / "plotish.sock"), queue_size=1)
+    payload = {"dataset": _document("c"), "outfolder": str(tmp_path)}
+    assert server.handle({**payload, "timeout": 0.05})["status"] == "timeout"
+    assert server.handle(payload)["status"] == "busy"
+    stats = server.stats()
+    assert stats["queue"] == {"depth": 1, "capacity": 1}
+    assert stats["requests"]["timed_out"] == 1 and stats["requests"]["rejected"] == 1
+
+def test_server_dispatcher_expires(tmp_path):
+    # Test that a request dropped by the dispatcher once its deadline passed is answered a timeout
+    import threading
+    import time
+
+    server = RenderServer(str(tmp_path / "plotish.sock"), queue_size=2)
+    answers = []
+    client = threading.Thread(target=lambda: answers.append(server.handle(
+        {"dataset": _document("e"), "outfolder": str(tmp_path), "timeout": 30, "id": 3})))
+    client.start()
+    while not server._queue.qsize():
+        time.sleep(0.01)
+    server._queue.queue[0].deadline = 0
+    server._queue.put(None)
+    server._dispatch()
+    client.join()
+    assert answers[0]["status"] == "timeout" and answers[0]["id"] == 3
+    assert server.stats()["requests"]["timed_out"] == 1
+    assert not os.listdir(tmp_path)
+
+def test_server_worker_pool(tmp_path):
+    # Test that a server with several workers renders the figures in its pool
+    address = str(tmp_path / "plotish.sock")
+    with RenderServer(address, workers=2) as server:
+        server.start()
+        answer = request(address, {"dataset": _document("d", 3), "outfolder": str(tmp_path)})
+    assert answer["ok"]
+    assert sorted(os.listdir(tmp_path)) == ["d_0.png", "d_1.png", "d_2.png"]
+
+def test_server_builds_each_figure_once(tmp_path, monkeypatch):
+    # Test that the outputs of a request are listed without building the figures again
+    import plotish.dataset
+    built = []
+    build_figure = plotish.dataset.build_figure
+
+    def counted(raw, root, index, listeners):
+        built.append(index)
+        return build_figure(raw, root, index, listeners)
+
+    monkeypatch.setattr(plotish.dataset, "build_figure", counted)
+    address = str(tmp_path / "plotish.sock")
+    with RenderServer(address) as server:
+        server.start()
+        answer = request(address, {"dataset": _document("f", 12), "figures": list(range(1, 11)),
+                                   "outfolder": str(tmp_path)})
+    assert answer["ok"]
+    assert answer["outputs"] == [str(tmp_path / f"f_{i}.png") for i in range(1, 11)]
+    assert built == list(range(1, 11))
+
+def test_parse_address():
+    # Test that TCP and Unix socket addresses are told apart
+    assert parse_address("127.0.0.1:8765") == (socket.AF_INET, ("127.0.0.1", 8765))
+    assert parse_address("/tmp/plotish.sock") == (socket.AF_UNIX, "/tmp/plotish.sock")
+    assert parse_address("unix:run:1") == (socket.AF_UNIX, "run:1")
+
+def test_server_loopback_only():
+    # Test that TCP servers refuse non-loopback addresses unless remote clients are allowed
+    assert is_loopback("127.0.0.1") and is_loopback("localhost")
+    assert not is_loopback("0.0.0.0") and not is_loopback("192.168.1.10")
+    with pytest.raises(Exception):
+        RenderServer("0.0.0.0:8765")
+    assert RenderServer("0.0.0.0:8765", allow_remote=True).address == "0.0.0.0:8765"
@@ -0,0 +1,54 @@
+import os
+import pickle
+import numpy
+from plotish import FigureInterface
+from plotish.sharing import FigureSpec, SharedBuffers
+
+
+def _figure(root=None, ydata=None):
+    x = numpy.linspace(0, 1, 5000)
+    return FigureInterface({"title": "Shared", "xlabel": "t", "lines": [
+        {"xdata": x.tolist(), "ydata": (x * 2).tolist(), "legend": "a", "color": "red"},
+        {"ydata": ydata if ydata is not None else x.astype(numpy.float32), "legend": "b"},
+    ]}, root=root)
+
+def test_share_figure(tmp_path):
+    # Test that workers get the options and memory-mapped buffers of a figure, deleted once released
+    fi = _figure()
+    with SharedBuffers(str(tmp_path)) as shared:
+        spec = shared.share(3, fi)
+        assert isinstance(spec, FigureSpec)
+        assert len(pickle.dumps(spec)) < 2000
+        built = pickle.loads(pickle.dumps(spec)).build()
+
+        assert built.title == "Shared" and built.xlabel == "t"
+        assert built.lines[0].kwargs == fi.lines[0].kwargs
+        for line, expected in zip(built.lines, fi.lines):
+            assert isinstance(line._ydata.base, numpy.memmap) or isinstance(line._ydata, numpy.memmap)
+            assert numpy.array_equal(line._xdata, expected._xdata)
+            assert line._ydata.dtype == expected._ydata.dtype
+            assert numpy.array_equal(line._ydata, expected._ydata)
+        assert built.fingerprint() == fi.fingerprint()
+
+        path = spec.lines[0]["xdata"].path
+        assert os.path.exists(path)
+        shared.release(3)
+        assert not os.path.exists(path)
+        folder = shared.folder
+    assert not os.path.exists(folder)
+
+def test_share_mapped_file(tmp_path):
+    # Test that arrays memory-mapped from a file are referenced in place
+    y = numpy.arange(5000, dtype=numpy.float64)
+    numpy.save(tmp_path / "y.npy", y)
+    fi = _figure(str(tmp_path), {"file": "y.npy"})
+    with SharedBuffers(str(tmp_path)) as shared:
+        ref = shared.share(0, fi).lines[1]["ydata"]
+        assert ref.path == str(tmp_path / "y.npy")
+        assert numpy.array_equal(ref.open(), y)
+
+def test_share_fallback(tmp_path):
+    # Test that a figure whose buffers can't be written is sent as it is
+    fi = _figure()
+    with SharedBuffers(str(tmp_path / "missing")) as shared:
+        assert shared.share(0, fi) is fi
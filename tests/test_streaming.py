@@ -0,0 +1,64 @@
+import io
+import json
+import pytest
+from plotish import DataSet, FigureInterface
+from plotish.streaming import JsonStreamReader, read_metadata, iter_array
+
+
+def test_reader_small_chunks():
+    # Test that values spanning several chunks are decoded correctly
+    document = {"name": "example", "count": 12345, "data": [{"a": [1, 2, 3]}, {"b": "text"}], "date": "x"}
+    reader = JsonStreamReader(io.StringIO(json.dumps(document)), chunk_size=3)
+    items = list(reader.items("data"))
+
+    assert items == [
+        ("name", "example", False),
+        ("count", 12345, False),
+        ("data", {"a": [1, 2, 3]}, True),
+        ("data", {"b": "text"}, True),
+        ("date", "x", False),
+    ]
+
+def test_read_metadata_after_data():
+    # Test that metadata placed after the figure array is still found
+    text = '{"data": [{"title": "t1"}, {"title": "t2"}], "name": "late"}'
+    metadata, n = read_metadata(io.StringIO(text))
+
+    assert metadata == {"name": "late"}
+    assert n == 2
+
+def test_read_metadata_skips_figures():
+    # Test that the figures are counted without being decoded, whatever the chunk boundaries
+    data = [{"title": "a]\\\"}{[", "lines": [{"ydata": [1, 2, 3]}]}, [], "text", 1.5, {"b": {"c": [[]]}}]
+    text = json.dumps({"name": "skip", "data": data, "date": "x"})
+    for chunk_size in (1, 2, 3, 7, 1 << 20):
+        items = list(JsonStreamReader(io.StringIO(text), chunk_size).items("data", skip=True))
+        assert items == [("name", "skip", False)] + [("data", None, True)] * 5 + [("date", "x", False)]
+    assert read_metadata(io.StringIO(text)) == ({"name": "skip", "date": "x"}, 5)
+
+def test_iter_array_empty():
+    # Test an empty figure array
+    assert list(iter_array(io.StringIO('{"name": "empty", "data": []}'))) == []
+
+def test_reader_malformed():
+    # Test that a malformed document raises an exception
+    with pytest.raises(ValueError):
+        list(iter_array(io.StringIO('{"data": [{"title": "t1"} {"title": "t2"}]}')))
+
+def test_dataset_load_file_stream(test_dataset_file):
+    # Test loading a dataset in streaming mode
+    dataset_instance = DataSet()
+    dataset_instance.load_file(test_dataset_file, stream=True)
+
+    assert dataset_instance.name == "example"
+    assert dataset_instance.date == "05/02/2023"
+    assert dataset_instance.description == "Example"
+    assert len(dataset_instance.data) == 1
+
+    # The stream can be iterated several times
+    for _ in range(2):
+        figures = list(dataset_instance.data)
+        assert len(figures) == 1
+        assert isinstance(figures[0], FigureInterface)
+        assert figures[0].title == "test"
+        assert len(figures[0].lines) == 2
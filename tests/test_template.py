@@ -0,0 +1,45 @@
+import numpy as np
+from plotish import Plottish, FigType, DataSet, FigureInterface
+
+
+def _figures(count, **layout):
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, 100)
+    return [FigureInterface({"title": f"Frame {i}", "xlabel": "x", "legend_position": "best", "lines": [
+        {"xdata": x, "ydata": rng.normal(size=100).cumsum() * (i + 1), "legend": f"line {k}",
+         "marker": "o" if k == 0 else None, **layout} for k in range(3)
+    ]}) for i in range(count)]
+
+def test_template_matches_fresh_figures(tmp_path):
+    # Test that figures of the same layout reuse the figure and give the same image
+    ds = DataSet()
+    ds.load("Test", "", "Frames", _figures(3))
+    fresh = Plottish(str(tmp_path / "fresh"), [FigType.PNG], ds)
+    templated = Plottish(str(tmp_path / "templated"), [FigType.PNG], ds, template=True)
+    for folder, pl in (("fresh", fresh), ("templated", templated)):
+        (tmp_path / folder).mkdir()
+        pl.plot()
+
+    for i in range(3):
+        assert (tmp_path / "templated" / f"Frames_{i}.png").read_bytes() == (tmp_path / "fresh" / f"Frames_{i}.png").read_bytes()
+
+    first, _ = templated.make_fig(ds.data[0])
+    second, warn = templated.make_fig(ds.data[1])
+    assert second is first and warn == "OK"
+    assert second.axes[0].get_title() == "Frame 1"
+    templated.close()
+
+def test_template_layout_change(tmp_path):
+    # Test that a figure of another layout, or drawn with collections, is made from scratch
+    import plotish
+
+    ds = DataSet()
+    ds.load("Test", "", "Frames", _figures(2) + _figures(1, style="--") + _figures(2, raster="hexbin"))
+    pl = Plottish(str(tmp_path), [FigType.PNG], ds, template=True)
+    figs = [pl.make_fig(fi)[0] for fi in ds.data]
+
+    assert figs[1] is figs[0]
+    assert figs[2] is not figs[1]
+    assert figs[4] is not figs[3] and len(figs[4].axes[0].collections) == 3
+    pl.close()
+    assert plotish.template.get() is None
@@ -0,0 +1,60 @@
+import json
+import os
+import numpy
+from plotish import FigType
+from plotish.watch import Watcher
+
+
+def _figure(i, offset=0):
+    return {"title": f"Figure {i}", "lines": [{"xdata": [0, 1, 2], "ydata": [i, i + 1, i + offset]}]}
+
+def _write(path, figures, name="watched"):
+    with open(path, "w") as f:
+        json.dump({"name": name, "date": "2024-01-01", "description": "Watched", "data": figures}, f)
+    # Make sure the modification is seen even on coarse file system timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9 * len(figures)))
+
+def test_watch_renders_only_changed_figures(tmp_path):
+    # Test that each poll renders the new and modified figures only
+    path = tmp_path / "data.json"
+    out = tmp_path / "out"
+    out.mkdir()
+    _write(path, [_figure(0), _figure(1)])
+    watcher = Watcher(str(path), str(out), [FigType.PNG, FigType.SHOW])
+
+    assert watcher.types == [FigType.PNG]
+    assert [i for i, _ in watcher.poll()] == [0, 1]
+    assert watcher.poll() is None
+
+    _write(path, [_figure(0), _figure(1), _figure(2)])
+    assert [i for i, _ in watcher.poll()] == [2]
+
+    _write(path, [_figure(0), _figure(1, offset=5), _figure(2), _figure(3)])
+    assert [i for i, _ in watcher.poll()] == [1, 3]
+    assert sorted(os.listdir(out)) == [f"watched_{i}.png" for i in range(4)]
+
+def test_watch_renaming_renders_everything(tmp_path):
+    # Test that output names follow a change of the dataset name
+    path = tmp_path / "data.json"
+    _write(path, [_figure(0), _figure(1)])
+    watcher = Watcher(str(path), str(tmp_path), [FigType.PNG], figures=["1"])
+
+    assert [i for i, _ in watcher.poll()] == [1]
+    _write(path, [_figure(0), _figure(1)], name="renamed")
+    assert [i for i, _ in watcher.poll()] == [1]
+    assert (tmp_path / "renamed_1.png").exists()
+    assert not (tmp_path / "renamed_0.png").exists()
+
+def test_watch_binary_files(tmp_path):
+    # Test that a change of a referenced binary file renders the figure again
+    path = tmp_path / "data.json"
+    numpy.save(tmp_path / "y.npy", numpy.arange(3.0))
+    _write(path, [_figure(0), {"title": "Binary", "lines": [{"ydata": {"file": "y.npy"}}]}])
+    watcher = Watcher(str(path), str(tmp_path), [FigType.PNG])
+    watcher.poll()
+
+    numpy.save(tmp_path / "y.npy", numpy.arange(4.0))
+    stat = os.stat(tmp_path / "y.npy")
+    os.utime(tmp_path / "y.npy", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert [i for i, _ in watcher.poll()] == [1]